@@ -6,6 +6,13 @@ from langchain_core.language_models.chat_models import BaseChatModel
 from registry.service import Registry
 from registry.views import ToolResult
 from prompt.service import Prompt
+from checkpoint.service import Checkpoint
+from cache.service import LLMCache
+from workflow.service import WorkflowRecorder
+from profiler.service import Profiler, profiler
+from prefetch.service import Prefetcher
+from model.base import BaseModel as ModelBackend
+from model.model import ChatModel
 from langchain_core.tools import BaseTool
 from rich.markdown import Markdown
 from rich.console import Console
@@ -24,18 +31,36 @@ default_tools = [
     done_tool,
     human_tool,
     load_dataframe_tool,
+    trim_footer_tool,
     excel_head_tool,
+    inspect_workbook_tool,
     excel_info_tool,
     dataframe2excel_tool,
+    save_changes_tool,
     read_dataframe_tool,
+    query_dataframe_tool,
+    merge_dataframe_tool,
+    create_view_tool,
     write_dataframe_tool,
+    load_chunked_dataframe_tool,
+    chunked_aggregate_tool,
+    chunked_filter_tool,
     # Add any other default tools here, e.g.:
     # get_json_data_tool
 ]
 
-skip_keys={"file_path","df_name", "sheet_name", "start_row", "start_col", "axis", "answer", "question"} # 不需要进行动态表达式解析的键
+skip_keys={"file_path","output_path","df_name", "sheet_name", "start_row", "start_col", "axis", "answer", "question"} # 不需要进行动态表达式解析的键
 
-ctx = AgentContext() # 全局上下文，用于注册和解析工具输出
+ctx = AgentContext(resolver=get_dataframe) # 全局上下文，用于注册和解析工具输出；注册表中的 DataFrame 和视图在求值时按名称解析
+
+def reset_session():
+    """
+    清空全局 DataFrame 注册表、分块句柄、视图缓存和上下文变量，使同一进程中的下一次查询不会看到上一次查询的数据。
+    """
+    DATAFRAME_REGISTRY.clear()
+    CHUNKED_REGISTRY.clear()
+    VIEW_CACHE.clear()
+    ctx.variables.clear()
 
 class Agent:
     """
@@ -45,39 +70,73 @@ class Agent:
     Args:
         instructions (list[str], optional): 代理的指令列表。默认为空列表
         additional_tools (list[BaseTool], optional): 额外的工具列表。默认为空列表
-        llm (BaseChatModel, optional): 用于代理的语言模型。默认为 None
+        llm (BaseChatModel | model.BaseModel, optional): 用于代理的语言模型或模型后端，LangChain 聊天模型会被包装为 ChatModel。默认为 None
         max_steps (int, optional): 代理的最大步骤数。默认为 100
         max_memory (int, optional): 代理的最大额外记忆大小。默认为 10(不包括最开始的system_message和user_query,也就是实际最大12条消息)
         file_path (str, optional): 文件路径。默认为 None
+        checkpoint_dir (str, optional): 检查点目录，设置后每完成一步保存一次检查点，可通过 resume 从中断处继续。默认为 None
+        llm_cache (LLMCache, optional): LLM 响应缓存，相同的消息和模型配置直接返回缓存的响应。默认为 None
+        workflow_recorder (WorkflowRecorder, optional): 工作流录制器，记录工具调用序列，运行成功后生成可回放的工作流。默认为 None
+        profile (bool, optional): 是否记录各阶段耗时与 token 数量，运行结束后打印汇总表。默认为 False
+        profile_path (str, optional): 计时结果导出路径，.jsonl 为 JSON Lines，其余为 Chrome Trace 格式。设置后自动启用 profile。默认为 None
+        speculative_k (int, optional): 推测执行模式下每一步最多并发执行的动作数（含首选动作）。大于1时允许模型用 <action_candidates> 为只读工具提出备选动作，与首选动作一起并发执行，结果合并为一次观察。默认为 0（关闭）
+        prefetch (bool | Prefetcher, optional): 是否在每次 invoke 开始时后台预取 file_path 中查询提到的文件的工作表元数据和预览，并在运行期间监视文件变化，运行结束时停止。可传入自定义的 Prefetcher，由调用方负责调用其 stop()。默认为 False
     """
     def __init__(self,
                  instructions: list[str] = [],
                  additional_tools: list[BaseTool] = [],
-                 llm: BaseChatModel = None,
+                 llm: Union[BaseChatModel, ModelBackend] = None,
                  max_steps:int=100,
                  max_memory:int=10,
-                 file_path: str = None):
+                 file_path: str = None,
+                 checkpoint_dir: str = None,
+                 llm_cache: LLMCache = None,
+                 workflow_recorder: WorkflowRecorder = None,
+                 profile: bool = False,
+                 profile_path: str = None,
+                 prefetch: Union[bool, Prefetcher] = False,
+                 speculative_k: int = 0):
         self.name = 'Data Use Agent'
         self.description = 'An agent that can interact with data'
-        self.registry = Registry(tools=default_tools + additional_tools)
+        self.registry = Registry(tools=default_tools + additional_tools, resource_version=resource_version, resource_dependencies=resource_dependencies)
         self.instructions = instructions
         self.llm = llm
+        self.model = llm if llm is None or isinstance(llm, ModelBackend) else ChatModel(llm)
         self.agent_state = AgentState(max_memory=max_memory)
         self.agent_step = AgentStep(max_steps=max_steps)
         self.file_path = file_path
+        self.query = None
+        self.checkpoint = Checkpoint(checkpoint_dir) if checkpoint_dir else None
+        self.llm_cache = llm_cache
+        self.workflow_recorder = workflow_recorder
+        self.profile = profile or profile_path is not None
+        self.profile_path = profile_path
+        self.profiler: Profiler | None = None # 最近一次运行的计时会话
+        self._profile_token = None
+        self.speculative_k = speculative_k
+        self.owns_prefetcher = not isinstance(prefetch, Prefetcher) # 代理创建的预取器在每次运行结束时停止
+        if isinstance(prefetch, Prefetcher):
+            self.prefetcher = prefetch
+        else:
+            self.prefetcher = Prefetcher(file_path) if prefetch and file_path and os.path.exists(file_path) else None
 
     def reason(self):
-        message = self.llm.invoke(self.agent_state.messages)
-        agent_data = extract_agent_data(message=message)
+        with profiler.span('llm.invoke') as span:
+            if self.llm_cache is not None:
+                message = self.llm_cache.invoke(self.model, self.agent_state.messages)
+            else:
+                message = self.model.invoke(self.agent_state.messages)
+            profiler.record_usage(span, message)
+        with profiler.span('agent.parse'):
+            agent_data = extract_agent_data(message=message)
 
         # 解析动态表达式
-        if DATAFRAME_REGISTRY is not None:
-            for df_name, df_info in DATAFRAME_REGISTRY.items():
-                df_obj = df_info.get('dataframe')
-                if df_obj is not None and not ctx.has(df_name):
-                    ctx.register_tool_output(df_name, df_obj)
-        agent_data.action.params = ctx.resolve_dict(agent_data.action.params,
-                                                    skip_keys=skip_keys)
+        with profiler.span('agent.resolve'):
+            agent_data.action.expressions = ctx.expressions(agent_data.action.params, skip_keys=skip_keys)
+            agent_data.action.params = ctx.resolve_dict(agent_data.action.params,
+                                                        skip_keys=skip_keys)
+            for candidate in agent_data.candidates:
+                candidate.params = ctx.resolve_dict(candidate.params, skip_keys=skip_keys)
         
         self.agent_state.update_state(
             agent_data=agent_data,
@@ -94,13 +153,72 @@ class Agent:
         name = self.agent_state.agent_data.action.name
         params = self.agent_state.agent_data.action.params
         logger.info(colored(f"🔧: Action: {name}({', '.join(f'{k}={v}' for k, v in params.items())})",color='blue',attrs=['bold']))
-        tool_result = self.registry.execute(tool_name=name, **params)
+        if self.speculative_k > 1 and self.agent_state.agent_data.candidates:
+            tool_result = self.speculate(name, params, self.agent_state.agent_data.candidates)
+        else:
+            tool_result = self.registry.execute(tool_name=name, **params)
+            if self.workflow_recorder is not None:
+                self.workflow_recorder.record(name, params, tool_result, expressions=self.agent_state.agent_data.action.expressions)
         observation=tool_result.content if tool_result.is_success else tool_result.error
         logger.info(colored(f"🔭: Observation: {shorten(observation,500,placeholder='...')}",color='green',attrs=['bold']))
         prompt=Prompt.observation_prompt(agent_step=self.agent_step, agent_state=self.agent_state, tool_result=tool_result)
         human_message = HumanMessage(content=prompt)
         self.agent_state.update_state(agent_data=None,observation=observation,messages=[ai_message, human_message])
 
+    def speculate(self, name: str, params: dict, candidates: list) -> ToolResult:
+        """
+        推测执行：首选动作和备选动作都是只读工具时并发执行（最多 speculative_k 个），所有结果合并为一次观察。
+        首选动作不是只读工具时只执行首选动作，非只读的备选动作被跳过。
+
+        Args:
+            name (str): 首选动作的工具名称。
+            params (dict): 首选动作的参数。
+            candidates (list[Action]): 备选动作。
+
+        Returns:
+            ToolResult: 合并后的结果，是否成功取决于首选动作。工作流录制器只记录首选动作。
+        """
+        if not self.registry.is_read_only(name, params):
+            tool_result = self.registry.execute(tool_name=name, **params)
+            if self.workflow_recorder is not None:
+                self.workflow_recorder.record(name, params, tool_result, expressions=self.agent_state.agent_data.action.expressions)
+            note = f"\n(Action candidates ignored: '{name}' changes data, only read-only actions can run as candidates.)"
+            if tool_result.is_success:
+                return ToolResult(is_success=True, content=f"{tool_result.content}{note}")
+            return ToolResult(is_success=False, error=f"{tool_result.error}{note}")
+
+        # 编号与模型提出的顺序一致：[1] 为首选动作，[2] 起依次为 <action_candidates> 中的备选动作
+        calls, positions, skipped, seen = [(name, params)], [1], [], {repr((name, params))}
+        for position, candidate in enumerate(candidates, start=2):
+            key = repr((candidate.name, candidate.params))
+            if key in seen:
+                skipped.append(f"[{position}] '{candidate.name}' (same as an earlier action)")
+                continue
+            seen.add(key)
+            if not self.registry.is_read_only(candidate.name, candidate.params):
+                skipped.append(f"[{position}] '{candidate.name}' (not a read-only tool)")
+            elif len(calls) >= self.speculative_k:
+                skipped.append(f"[{position}] '{candidate.name}' (more than {self.speculative_k} actions)")
+            else:
+                calls.append((candidate.name, candidate.params))
+                positions.append(position)
+        for candidate_name, candidate_params in calls[1:]:
+            logger.info(colored(f"🔀: Candidate: {candidate_name}({', '.join(f'{k}={v}' for k, v in candidate_params.items())})",color='blue'))
+
+        results = self.registry.execute_many(calls, max_workers=len(calls))
+        if self.workflow_recorder is not None:
+            self.workflow_recorder.record(name, params, results[0], expressions=self.agent_state.agent_data.action.expressions) # 备选动作只是探索，工作流只录制首选动作
+        sections = []
+        for position, (call_name, call_params), result in zip(positions, calls, results):
+            outcome = result.content if result.is_success else f"Error: {result.error}"
+            sections.append(f"[{position}] {call_name}({call_params}):\n{outcome}")
+        observation = f"Ran {len(calls)} actions in parallel:\n\n" + "\n\n".join(sections)
+        if skipped:
+            observation += f"\n\nSkipped candidates: {', '.join(skipped)}."
+        if results[0].is_success: # 成败以首选动作为准，备选动作的结果只体现在观察中
+            return ToolResult(is_success=True, content=observation)
+        return ToolResult(is_success=False, error=observation)
+
     def answer(self):
         self.agent_state.messages.pop()  # Remove the last message to avoid duplication
         last_message = self.agent_state.messages[-1]
@@ -113,9 +231,55 @@ class Agent:
         logger.info(colored(f"📜: Final Answer: {tool_result.content}",color='cyan',attrs=['bold']))
         self.agent_state.update_state(agent_data=None,observation=None,result=tool_result.content,messages=[ai_message])
 
+    def save_checkpoint(self):
+        """
+        保存当前步骤的检查点。
+        """
+        path = self.checkpoint.save(
+            agent_state=self.agent_state,
+            agent_step=self.agent_step,
+            context=ctx,
+            registry=DATAFRAME_REGISTRY,
+            chunked_registry=CHUNKED_REGISTRY,
+            extra={'query': self.query, 'file_path': self.file_path, 'instructions': self.instructions},
+        )
+        logger.info(colored(f"💾: Checkpoint saved to {path}", color='light_grey'))
+
+    def resume(self, checkpoint_dir: str = None):
+        """
+        从检查点恢复并继续运行，已完成步骤的 LLM 调用和文件加载不会重复执行。
+
+        Args:
+            checkpoint_dir (str, optional): 检查点目录，默认为创建代理时指定的 checkpoint_dir。
+
+        Returns:
+            AgentResult: 代理执行结果。
+        """
+        if checkpoint_dir:
+            self.checkpoint = Checkpoint(checkpoint_dir)
+        if self.checkpoint is None:
+            raise ValueError("No checkpoint_dir given")
+        data = self.checkpoint.load()
+        self.checkpoint.restore(data, self.agent_state, self.agent_step, ctx, DATAFRAME_REGISTRY, CHUNKED_REGISTRY)
+        self.query = data.meta.extra.get('query')
+        self.file_path = data.meta.extra.get('file_path', self.file_path)
+        self.instructions = data.meta.extra.get('instructions', self.instructions)
+        self.start_profile()
+        logger.info(colored(f"⏯️: Resuming from {data.path} at step {self.agent_step.step_number}", color='blue', attrs=['bold']))
+        return self.run()
+
     def invoke(self,query: str):
+        self.query = query
+        self.start_profile()
+        if self.prefetcher is not None:
+            self.prefetcher.start(query)
+        if self.workflow_recorder is not None:
+            self.workflow_recorder.reset()
         max_steps = self.agent_step.max_steps
         tools_prompt = self.registry.get_tools_prompt()
+        instructions = self.instructions
+        if self.speculative_k > 1:
+            instructions = instructions + [Prompt.speculative_prompt(k=self.speculative_k)]
         prompt = Prompt.observation_prompt(
             agent_step= self.agent_step,
             agent_state=self.agent_state,
@@ -123,7 +287,7 @@ class Agent:
         )
         system_message = SystemMessage(
             content=Prompt.system_prompt(
-                instructions=self.instructions,
+                instructions=instructions,
                 tools_prompt=tools_prompt,
                 file_path=self.file_path,
                 max_steps=max_steps
@@ -134,26 +298,61 @@ class Agent:
                     HumanMessage(content=f'<user_query>{query}</user_query>'),
                     human_message]
         self.agent_state.init_state(messages=messages)
+        return self.run()
+
+    def start_profile(self):
+        """
+        为本次运行新建计时会话并在当前上下文中激活，其他代理的运行不会清空或关闭它；未启用 profile 时沿用调用方的会话。
+        """
+        if self.profile and self._profile_token is None:
+            self.profiler = Profiler(enabled=True)
+            self._profile_token = profiler.activate(self.profiler)
+
+    def stop_profile(self):
+        """
+        停用本次运行的计时会话，打印汇总并按需导出。
+        """
+        if self._profile_token is None:
+            return
+        profiler.deactivate(self._profile_token)
+        self._profile_token = None
+        self.profiler.print_summary()
+        if self.profile_path:
+            self.profiler.export(self.profile_path)
+            logger.info(colored(f"⏱️: Profile written to {self.profile_path}", color='light_grey'))
+
+    def run(self):
         try:
             while True:
                 if self.agent_step.is_last_step():
                     logger.info(colored("🚫: Reached maximum steps, stopping execution.", color='red', attrs=['bold']))
                     return AgentResult(is_done=False, content=None, error="Reached maximum steps")
-                self.reason()
+                step = self.agent_step.step_number
+                with profiler.span('agent.reason', step=step):
+                    self.reason()
                 if self.agent_state.is_done():
                     logger.info(colored("✅: Task completed successfully.", color='green', attrs=['bold']))
-                    self.answer()
+                    with profiler.span('agent.answer', step=step):
+                        self.answer()
+                    if self.workflow_recorder is not None:
+                        self.workflow_recorder.finish(query=self.query, file_path=self.file_path)
                     return AgentResult(is_done=True, content=self.agent_state.result, error=None)
-                self.action()
+                with profiler.span('agent.action', step=step, tool=self.agent_state.agent_data.action.name):
+                    self.action()
                 if self.agent_state.consecutive_failures >= 3:
                     logger.warning(colored("⚠️: Consecutive failures exceeded, stopping execution.", color='yellow', attrs=['bold']))
                     return AgentResult(is_done=False, content=None, error="Consecutive failures exceeded")
                 self.agent_step.increment_step()
+                if self.checkpoint is not None:
+                    self.save_checkpoint()
         except Exception as error:
             logger.error(colored(f"❌: An error occurred during agent execution: {error}", color='red', attrs=['bold']))
             return AgentResult(is_done=False, content=None, error=str(error))
         finally:
             logger.info(colored("🛑: Agent execution finished.", color='blue', attrs=['bold']))
+            if self.prefetcher is not None and self.owns_prefetcher:
+                self.prefetcher.stop()
+            self.stop_profile()
 
     def print_response(self, query: str):
         console=Console()
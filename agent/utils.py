@@ -3,7 +3,7 @@ from agent.views import AgentData
 import ast
 import re
 import json
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
 def read_file(file_path: str) -> str:
     with open(file_path, 'r') as file:
@@ -51,8 +51,36 @@ def extract_agent_data(message: BaseMessage) -> AgentData:
             # If there's an issue with conversion, store it as raw string
             action['params'] = action_input_str
     result['action'] = action
+
+    candidates_match = re.search(r"<action_candidates>(.*?)<\/action_candidates>", text, re.DOTALL)
+    if candidates_match:
+        result['candidates'] = parse_candidates(candidates_match.group(1).strip())
     return  AgentData.model_validate(result)
 
+def parse_candidates(text: str) -> list[dict]:
+    """
+    解析 <action_candidates> 中的备选动作列表，格式为 [{'name': ..., 'params': {...}}, ...]，无法解析的条目被忽略。
+
+    Args:
+        text (str): <action_candidates> 标签中的文本。
+
+    Returns:
+        list[dict]: 备选动作，每个包含 name 和 params。
+    """
+    try:
+        items = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return []
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, (list, tuple)):
+        return []
+    candidates = []
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get('name'), str) and isinstance(item.get('params', {}), dict):
+            candidates.append({'name': item['name'].strip(), 'params': item.get('params', {})})
+    return candidates
+
 
 
 
@@ -76,9 +104,34 @@ SAFE_FUNCS = {
 
 
 
+UNRESOLVED_PREFIXES = ("[UndefinedVariableError", "[EvalError") # safe_eval 解析失败时返回值的前缀
+
+class LazyNamespace(dict):
+    """
+    表达式求值的局部变量，未登记的名称在表达式实际用到时才通过 resolver 解析。
+    """
+    def __init__(self, variables: Dict[str, Any], resolver: Callable[[str], Any]):
+        super().__init__(variables)
+        self.resolver = resolver
+
+    def __missing__(self, name: str) -> Any:
+        value = self.resolver(name)
+        if value is None:
+            raise KeyError(name)
+        self[name] = value
+        return value
+
 class AgentContext:
-    def __init__(self):
+    """
+    动态表达式的解析上下文。
+
+    Args:
+        resolver (Optional[Callable[[str], Any]]): 按名称查找未登记变量的函数（如注册表中的 DataFrame 和视图），
+            每次求值时调用，得到的总是最新的值；找不到时返回 None。
+    """
+    def __init__(self, resolver: Optional[Callable[[str], Any]] = None):
         self.variables: Dict[str, Any] = {}
+        self.resolver = resolver
 
     def set(self, name: str, value: Any):
         self.variables[name] = value
@@ -88,6 +141,14 @@ class AgentContext:
 
     def has(self, name: str) -> bool:
         return name in self.variables
+
+    def lookup(self, name: str) -> Any:
+        """
+        返回变量的值，未登记时通过 resolver 查找。
+        """
+        if name in self.variables or self.resolver is None:
+            return self.variables.get(name)
+        return self.resolver(name)
     
     def is_expression(self, value: Any) -> bool:
         if not isinstance(value, str):
@@ -104,7 +165,10 @@ class AgentContext:
     
     def safe_eval(self, expr: str, context: dict):
         try:
-            return eval(expr, {"__builtins__": {}}, {**SAFE_FUNCS, **context})
+            namespace = {**SAFE_FUNCS, **context}
+            if self.resolver is not None:
+                namespace = LazyNamespace(namespace, self.resolver)
+            return eval(expr, {"__builtins__": {}}, namespace)
         except NameError as e:
             return f"[UndefinedVariableError: {e}]"
         except Exception as e:
@@ -113,6 +177,19 @@ class AgentContext:
     def resolve_expression(self, expr: str) -> Any:
         return self.safe_eval(expr, self.variables)
 
+    def is_unresolved(self, value: Any) -> bool:
+        """
+        判断 resolve_expression 的结果是否为解析失败时返回的错误信息。
+        """
+        return isinstance(value, str) and value.startswith(UNRESOLVED_PREFIXES)
+
+    def expressions(self, data: Dict[str, Any], skip_keys: set = None) -> Dict[str, str]:
+        """
+        返回 resolve_dict 会当作动态表达式解析的参数（解析前的原文）。
+        """
+        skip_keys = skip_keys or set()
+        return {key: value for key, value in data.items() if key not in skip_keys and self.is_expression(value)}
+
     def resolve_dict(self, data: Dict[str, Any], skip_keys: set = None) -> Dict[str, Any]:
         skip_keys = skip_keys or set()
         resolved = {}
@@ -1,8 +1,10 @@
 from langchain_core.messages.base import BaseMessage
-from pydantic import BaseModel,Field
+from pydantic import BaseModel,ConfigDict,Field,field_validator,model_validator
 from typing import Optional
 from uuid import uuid4
 
+from buffer import MessageBuffer
+
 class AgentState(BaseModel):
     """
     代理状态模型，包含代理的唯一标识符和当前状态。
@@ -12,35 +14,47 @@ class AgentState(BaseModel):
         consecutive_failures (int): 连续失败次数，默认为0。
         result (str): 代理执行的结果，默认为空字符串。
         agent_data (AgentData): 代理的数据，默认为 None。
-        messages (list[BaseMessage]): 代理的消息列表，默认为空列表。
+        messages (MessageBuffer): 代理的消息列表，前两条固定保留，其余消息超出 max_memory 时淘汰最早的一条，默认为空。
         previous_observation (str): 上一次观察到的内容，默认为 None。
     """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     id: str = Field(default_factory=lambda: str(uuid4()), description="代理的唯一标识符")
     consecutive_failures: int = Field(default=0, description="连续失败次数")
     result: str = ''
     agent_data: 'AgentData' = None
-    messages: list[BaseMessage] = Field(default_factory=list, description="代理的消息列表")
+    messages: MessageBuffer = Field(default_factory=MessageBuffer, description="代理的消息列表，前两条固定保留，其余最多保留 max_memory 条")
     previous_observation: str = None
     max_memory: int = Field(default=10, ge=1, description="最大记忆数量")
     forgotten_memories: int = Field(default=0, description="被遗忘的记忆数量")
 
+    @field_validator('messages', mode='before')
+    @classmethod
+    def _to_buffer(cls, value):
+        return value if isinstance(value, MessageBuffer) else MessageBuffer(value)
+
+    @model_validator(mode='after')
+    def _bound_buffer(self):
+        if self.messages.maxlen != self.max_memory or self.messages.pinned != 2:
+            self.messages = MessageBuffer(self.messages, maxlen=self.max_memory, pinned=2)
+        return self
+
     def is_done(self):
          return self.agent_data is not None and self.agent_data.action.name == 'Done Tool'
     
     def init_state(self, messages: list[BaseMessage]):
         self.consecutive_failures = 0
         self.result = ""
-        self.messages = messages
-        self.forgotten_memories = 0
+        self.messages = MessageBuffer(messages, maxlen=self.max_memory, pinned=2)
+        self.forgotten_memories = self.messages.evicted
 
     def update_state(self, agent_data: 'AgentData' = None, observation: str = None, result: str = None, messages: list[BaseMessage] = None):
         self.result = result
         self.previous_observation = observation
         self.agent_data = agent_data
+        evicted = self.messages.evicted
         self.messages.extend(messages or [])
-        while len(self.messages) > self.max_memory + 2:
-            self.messages.pop(2)
-            self.forgotten_memories += 1
+        self.forgotten_memories += self.messages.evicted - evicted
 
         
 class AgentStep(BaseModel):
@@ -61,12 +75,14 @@ class AgentResult(BaseModel):
 class Action(BaseModel):
     name:str
     params: dict
+    expressions: dict = Field(default_factory=dict, exclude=True) # 解析前的动态表达式，工作流回放时重新解析
 
 class AgentData(BaseModel):
     evaluate: Optional[str]=None
     memory: Optional[str]=None
     thought: Optional[str]=None
     action: Optional[Action]=None
+    candidates: list[Action]=Field(default_factory=list) # 推测执行模式下与 action 一起并发执行的备选只读动作
 
 
     
\ No newline at end of file
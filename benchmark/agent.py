@@ -0,0 +1,157 @@
+"""
+端到端代理基准测试。
+
+在合成工作簿上用 ScriptedChatModel 回放固定的动作序列驱动 Agent.invoke，不需要网络。统计每个工具、
+每个步骤的耗时和吞吐量，以及每个工具执行期间的峰值内存（tracemalloc），用于发现 pandas/openpyxl 路径上的性能回退：
+
+    python -m benchmark.agent
+    python -m benchmark.agent --rows 1000 20000 --repeat 3 --output bench.json
+    python -m benchmark.agent --no-memory
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from functools import wraps
+from statistics import mean
+from rich.console import Console
+from rich.table import Table
+
+from benchmark.utils import make_workbook, action_message, ScriptedChatModel
+from agent.service import Agent, reset_session
+from tools.reader import invalidate_parsed
+from profiler.service import profiler
+
+def build_script(file_path: str, rows: int, save: bool = True) -> list[str]:
+    """
+    生成固定动作序列：检查工作簿、预览、加载、查看信息、读取、写入、分块聚合、保存，最后完成。
+    """
+    script = [
+        action_message('Inspect Workbook Tool', {'file_path': file_path}),
+        action_message('Excel Head Tool', {'file_path': file_path, 'head': 10}),
+        action_message('Load DataFrame Tool', {'df_name': 'ledger', 'file_path': file_path, 'origin_header_row': 'auto', 'trim_footer': True}),
+        action_message('Excel Info Tool', {'df_name': 'ledger'}),
+        action_message('Read DataFrame Tool', {'df_name': 'ledger', 'row': list(range(min(rows, 20))), 'col': ['Document', 'Amount']}),
+        action_message('Write DataFrame Tool', {'df_name': 'ledger', 'start_row': 0, 'start_col': 'Amount', 'values': [1.5] * min(rows, 100), 'axis': 'column'}),
+        action_message('Load Chunked DataFrame Tool', {'df_name': 'ledger_chunked', 'file_path': file_path, 'origin_header_row': 2}),
+        action_message('Chunked Aggregate Tool', {'df_name': 'ledger_chunked', 'column': 'Amount', 'agg': 'sum', 'group_by': ['Cost Center']}),
+    ]
+    if save:
+        script.append(action_message('DataFrame to Excel Tool', {'df_name': 'ledger'}))
+    script.append(action_message('Done Tool', {'answer': 'Benchmark finished'}))
+    return script
+
+def reset_state():
+    """
+    清空全局注册表、解析缓存和上下文，使每次运行互不影响。
+    """
+    reset_session()
+    invalidate_parsed()
+
+def trace_tool_memory(agent: Agent, peaks: dict):
+    """
+    包装代理注册表中的工具函数，记录每次执行期间的峰值内存增量（字节）。
+    """
+    for name, tool in agent.registry.tool_registry.items():
+        def traced(func=tool.function, name=name, **kwargs):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            try:
+                return func(**kwargs)
+            finally:
+                peaks[name] = max(peaks.get(name, 0), tracemalloc.get_traced_memory()[1] - baseline)
+        tool.function = wraps(tool.function)(traced)
+
+def run_once(file_path: str, rows: int, save: bool = True, memory: bool = False) -> dict:
+    """
+    运行一次完整的脚本化代理。
+
+    Returns:
+        dict: total（总耗时）、steps（每步耗时列表）、tools（工具名到耗时列表）、peaks（工具名到峰值内存）、peak（整体峰值内存）。
+    """
+    reset_state()
+    llm = ScriptedChatModel(script=build_script(file_path, rows, save=save))
+    agent = Agent(llm=llm, file_path=file_path)
+    peaks = {}
+    if memory:
+        trace_tool_memory(agent, peaks)
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with profiler.session() as session:
+            result = agent.invoke('Run the benchmark script')
+    finally:
+        total = time.perf_counter() - start
+        peak = max([tracemalloc.get_traced_memory()[1], *peaks.values()]) if memory else 0 # 工具执行时会重置峰值
+        if memory:
+            tracemalloc.stop()
+    if not result.is_done:
+        raise RuntimeError(f"Scripted run failed: {result.error}")
+
+    tools, steps = {}, {}
+    for span in session.spans:
+        if span.name.startswith('tool:'):
+            tools.setdefault(span.name[len('tool:'):], []).append(span.duration)
+        elif span.name in ('agent.reason', 'agent.action', 'agent.answer'):
+            step = span.attrs.get('step')
+            steps[step] = steps.get(step, 0.0) + span.duration
+    return {'total': total, 'steps': [steps[k] for k in sorted(steps)], 'tools': tools, 'peaks': peaks, 'peak': peak}
+
+def run(rows_list: list[int], repeat: int = 3, memory: bool = True, save: bool = True, work_dir: str = None, output: str = None):
+    for name in ('agent.service', 'workflow.service'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    work_dir = work_dir or tempfile.mkdtemp(prefix='data_use_bench_')
+    console = Console()
+    summary = Table(title=f"Agent end-to-end (best of {repeat})")
+    for column in ("Rows", "Total (s)", "Steps", "Mean step (ms)", "Max step (ms)", "Peak memory (MiB)"):
+        summary.add_column(column, justify="right")
+    results = {}
+
+    for rows in rows_list:
+        file_path = make_workbook(os.path.join(work_dir, f"agent_{rows}.xlsx"), rows=rows)
+        runs = [run_once(file_path, rows, save=save) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r['total'])
+        tools = {name: min(min(r['tools'][name]) for r in runs) for name in best['tools']}
+        profiled = run_once(file_path, rows, save=save, memory=True) if memory else {'peaks': {}, 'peak': 0}
+
+        table = Table(title=f"{rows:,} rows: per tool")
+        for column in ("Tool", "Time (ms)", "Rows/s", "Peak memory (MiB)"):
+            table.add_column(column, justify="left" if column == "Tool" else "right", no_wrap=column == "Tool")
+        for name, duration in sorted(tools.items(), key=lambda item: -item[1]):
+            peak = profiled['peaks'].get(name)
+            table.add_row(name, f"{duration * 1000:.1f}", f"{rows / duration:,.0f}" if duration else "",
+                          f"{peak / 2**20:.1f}" if peak is not None else "")
+        console.print(table)
+
+        summary.add_row(f"{rows:,}", f"{best['total']:.3f}", str(len(best['steps'])),
+                        f"{mean(best['steps']) * 1000:.1f}", f"{max(best['steps']) * 1000:.1f}",
+                        f"{profiled['peak'] / 2**20:.1f}" if memory else "")
+        results[rows] = {
+            'total': best['total'],
+            'steps': best['steps'],
+            'tools': tools,
+            'tool_peaks': profiled['peaks'],
+            'peak': profiled['peak'],
+        }
+    console.print(summary)
+    reset_state()
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        console.print(f"Results written to {output}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the agent end to end with a scripted model")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    parser.add_argument('--no-save', action='store_true', help="Skip the DataFrame to Excel step")
+    parser.add_argument('--work-dir', default=None)
+    parser.add_argument('--output', default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+    run(args.rows, repeat=args.repeat, memory=not args.no_memory, save=not args.no_save, work_dir=args.work_dir, output=args.output)
@@ -0,0 +1,41 @@
+"""
+Excel 读取引擎基准测试。
+
+在 1k/10k/100k 行的合成工作簿上比较各个已安装引擎的整表读取和前20行预览耗时：
+
+    python -m benchmark.excel_engines
+    python -m benchmark.excel_engines --rows 1000 10000 --repeat 5
+"""
+import os
+import argparse
+import tempfile
+from rich.console import Console
+from rich.table import Table
+
+from benchmark.utils import make_workbook, best_of
+from tools.reader import available_excel_engines, read_excel
+
+def run(rows_list: list[int], repeat: int = 3, work_dir: str = None):
+    engines = available_excel_engines('synthetic.xlsx')
+    work_dir = work_dir or tempfile.mkdtemp(prefix='data_use_bench_')
+    table = Table(title=f"Excel engines (best of {repeat}, seconds)")
+    table.add_column("Rows", justify="right")
+    table.add_column("Case")
+    for engine in engines:
+        table.add_column(engine, justify="right")
+
+    for rows in rows_list:
+        file_path = make_workbook(os.path.join(work_dir, f"synthetic_{rows}.xlsx"), rows=rows)
+        for case, kwargs in (("full read", {'header': 2}), ("head 20", {'header': None, 'nrows': 20})):
+            timings = [best_of(lambda: read_excel(file_path, engine=engine, **kwargs), repeat=repeat) for engine in engines]
+            fastest = min(timings)
+            table.add_row(f"{rows:,}", case, *[f"[bold]{t:.3f}[/bold]" if t == fastest else f"{t:.3f}" for t in timings])
+    Console().print(table)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Excel reader engines on synthetic workbooks")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--work-dir', default=None)
+    args = parser.parse_args()
+    run(args.rows, repeat=args.repeat, work_dir=args.work_dir)
@@ -0,0 +1,56 @@
+"""
+批量工具执行基准测试。
+
+比较 Registry.execute_many 顺序执行与线程池并发执行若干个互不依赖的 Load DataFrame 调用的耗时：
+
+    python -m benchmark.execute_many
+    python -m benchmark.execute_many --files 8 --rows 50000 --workers 1 4 8 --format csv
+"""
+import os
+import argparse
+import tempfile
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+from benchmark.utils import make_workbook, best_of
+from registry.service import Registry
+from agent.service import default_tools
+
+def make_files(count: int, rows: int, file_format: str, work_dir: str) -> list[str]:
+    paths = []
+    for i in range(count):
+        path = make_workbook(os.path.join(work_dir, f"batch_{rows}_{i}.xlsx"), rows=rows, title_rows=0)
+        if file_format != 'excel':
+            df = pd.read_excel(path)
+            path = os.path.splitext(path)[0] + ('.csv' if file_format == 'csv' else '.parquet')
+            df.to_csv(path, index=False) if file_format == 'csv' else df.astype(str).to_parquet(path)
+        paths.append(path)
+    return paths
+
+def run(count: int, rows: int, workers: list[int], file_format: str = 'excel', repeat: int = 3, work_dir: str = None):
+    work_dir = work_dir or tempfile.mkdtemp(prefix='data_use_bench_')
+    registry = Registry(tools=default_tools)
+    calls = [('Load DataFrame Tool', {'df_name': f"df_{i}", 'file_path': path})
+             for i, path in enumerate(make_files(count, rows, file_format, work_dir))]
+
+    table = Table(title=f"{count} independent loads of {rows:,} rows ({file_format}, best of {repeat}, {os.cpu_count()} CPUs)")
+    table.add_column("Workers", justify="right")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Speedup", justify="right")
+    baseline = None
+    for max_workers in workers:
+        seconds = best_of(lambda: registry.execute_many(calls, max_workers=max_workers), repeat=repeat)
+        baseline = baseline or seconds
+        table.add_row(str(max_workers), f"{seconds:.3f}", f"{baseline / seconds:.2f}x")
+    Console().print(table)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Registry.execute_many")
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--format', choices=['excel', 'csv', 'parquet'], default='excel')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.files, args.rows, args.workers, file_format=args.format, repeat=args.repeat)
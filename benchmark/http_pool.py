@@ -0,0 +1,124 @@
+"""
+LLM 客户端连接复用基准测试。
+
+在本地启动一个兼容 OpenAI Chat Completions 接口的桩服务器（HTTP/1.1 keep-alive），统计服务器接受的 TCP 连接数，
+比较每个模型实例各自创建 HTTP 客户端（ChatDeepSeek 的默认行为）与使用 model.client 共享连接池时，
+多个 Agent、多个步骤发出同样数量的请求需要新建多少连接、耗时多少（共享连接池只在第一次请求时建立一个连接）：
+
+    python -m benchmark.http_pool
+    python -m benchmark.http_pool --agents 20 --steps 10 --latency 0.005
+"""
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from rich.console import Console
+from rich.table import Table
+from langchain_core.messages import HumanMessage
+from langchain_deepseek import ChatDeepSeek
+
+from model.client import get_http_client
+
+class StubServer(ThreadingHTTPServer):
+    """
+    本地 OpenAI 兼容桩服务器，每个请求返回固定的回复，记录接受的连接数和请求数。
+
+    Args:
+        latency (float): 每个请求的模拟延迟（秒）。
+    """
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def reset(self):
+        with self._lock:
+            self.connections = self.requests = 0
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # 支持 keep-alive，同一连接可以处理多个请求
+    disable_nagle_algorithm = True # 响应头和响应体分两次写入，避免 Nagle 算法与延迟确认叠加造成约 40ms 的等待
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        with self.server._lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        payload = json.dumps({
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': 'ok'}}],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def build_llm(base_url: str, shared: bool) -> ChatDeepSeek:
+    kwargs = {'http_client': get_http_client()} if shared else {}
+    return ChatDeepSeek(model='deepseek-chat', api_key='stub', api_base=base_url, temperature=0.0, max_retries=0, **kwargs)
+
+def run_scenario(server: StubServer, agents: int, steps: int, shared: bool) -> dict:
+    """
+    模拟 agents 个 Agent 依次运行，每个 Agent 创建一个模型实例并调用 steps 次。
+    """
+    server.reset()
+    start = time.perf_counter()
+    for _ in range(agents):
+        llm = build_llm(server.base_url, shared)
+        for step in range(steps):
+            llm.invoke([HumanMessage(content=f"step {step}")])
+    seconds = time.perf_counter() - start
+    return {'requests': server.requests, 'connections': server.connections, 'seconds': seconds}
+
+def run(agents: int = 10, steps: int = 5, latency: float = 0.0):
+    server = StubServer(latency=latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        run_scenario(server, 1, 1, shared=False) # 只预热导入，不预先建立共享连接池的连接，两种方式都从零连接开始计数
+        results = {
+            'Client per model instance': run_scenario(server, agents, steps, shared=False),
+            'Shared connection pool': run_scenario(server, agents, steps, shared=True),
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    table = Table(title=f"{agents} agents x {steps} LLM calls against a local stub server (latency {latency * 1000:.0f} ms)")
+    for column in ("Scenario", "Requests", "New connections", "Seconds", "ms / request"):
+        table.add_column(column, justify="left" if column == "Scenario" else "right", no_wrap=column == "Scenario")
+    for name, result in results.items():
+        table.add_row(name, str(result['requests']), str(result['connections']),
+                      f"{result['seconds']:.3f}", f"{result['seconds'] / result['requests'] * 1000:.2f}")
+    Console().print(table)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark LLM HTTP connection reuse against a local stub server")
+    parser.add_argument('--agents', type=int, default=10)
+    parser.add_argument('--steps', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help="Simulated server latency per request in seconds")
+    args = parser.parse_args()
+    run(args.agents, args.steps, latency=args.latency)
@@ -0,0 +1,54 @@
+"""
+有界消息缓冲区基准测试。
+
+比较原先 list + pop(2) 的裁剪方式与 MessageBuffer 在不同 max_memory 下追加消息的耗时：
+
+    python -m benchmark.message_buffer
+    python -m benchmark.message_buffer --max-memory 10 1000 100000 --messages 200000
+"""
+import argparse
+from rich.console import Console
+from rich.table import Table
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from agent.views import AgentState
+from buffer import MessageBuffer
+from benchmark.utils import best_of
+
+def list_trim(messages: list, max_memory: int):
+    buffer = list(messages[:3])
+    for message in messages[3:]:
+        buffer.append(message)
+        while len(buffer) > max_memory + 2:
+            buffer.pop(2)
+
+def ring_buffer(messages: list, max_memory: int):
+    buffer = MessageBuffer(messages[:3], maxlen=max_memory, pinned=2)
+    buffer.extend(messages[3:])
+
+def agent_state(messages: list, max_memory: int):
+    state = AgentState(max_memory=max_memory)
+    state.init_state(messages=list(messages[:3]))
+    for i in range(3, len(messages), 2):
+        state.update_state(messages=messages[i:i + 2])
+
+def run(max_memories: list[int], count: int, repeat: int = 3):
+    messages = [SystemMessage(content='system'), HumanMessage(content='query')]
+    messages += [AIMessage(content=f'action {i}') if i % 2 else HumanMessage(content=f'observation {i}') for i in range(count)]
+
+    table = Table(title=f"Appending {count:,} messages (best of {repeat}, seconds)")
+    table.add_column("max_memory", justify="right")
+    for case in ("list + pop(2)", "MessageBuffer", "AgentState.update_state"):
+        table.add_column(case, justify="right")
+    for max_memory in max_memories:
+        timings = [best_of(lambda: func(messages, max_memory), repeat=repeat) for func in (list_trim, ring_buffer, agent_state)]
+        table.add_row(f"{max_memory:,}", *[f"{t:.4f}" for t in timings])
+    Console().print(table)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bounded conversation buffers")
+    parser.add_argument('--max-memory', type=int, nargs='+', default=[10, 1000, 10000, 100000])
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.max_memory, args.messages, repeat=args.repeat)
@@ -0,0 +1,88 @@
+import os
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, List
+from openpyxl import Workbook
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+def make_workbook(file_path: str, rows: int, cols: int = 12, title_rows: int = 2, sheet_name: str = 'Tabelle1') -> str:
+    """
+    生成用于基准测试的合成工作簿：若干标题行、一行表头、rows 行混合类型数据和一行总计行。
+
+    Args:
+        file_path (str): 输出文件路径。
+        rows (int): 数据行数。
+        cols (int): 列数，至少为4。
+        title_rows (int): 表头之前的标题行数。
+        sheet_name (str): 工作表名。
+
+    Returns:
+        str: 生成的文件路径。
+    """
+    cols = max(cols, 4)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    for i in range(title_rows):
+        ws.append([f"Synthetic report line {i + 1}"])
+    ws.append(['Document', 'Date', 'Cost Center', 'Amount'] + [f"Field {c}" for c in range(4, cols)])
+    start, total = date(2024, 1, 1), 0.0
+    for r in range(rows):
+        amount = round((r * 37 % 10000) / 7, 2)
+        total += amount
+        ws.append([f"DOC{r:07d}", start + timedelta(days=r % 365), f"CC{r % 50:03d}", amount]
+                  + [(r * c) % 1000 if c % 2 else f"text {r % 97}" for c in range(4, cols)])
+    ws.append(['Total', None, None, round(total, 2)])
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    wb.save(file_path)
+    return file_path
+
+def best_of(func: Callable[[], object], repeat: int = 3) -> float:
+    """
+    重复执行 repeat 次，返回最短耗时（秒）。
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def action_message(name: str, params: dict, thought: str = 'Scripted step') -> str:
+    """
+    按代理的输出格式生成一条动作消息。
+    """
+    return (f"<output><evaluate>Success</evaluate><memory>{thought}</memory><thought>{thought}</thought>"
+            f"<action_name>{name}</action_name><action_input>{params!r}</action_input></output>")
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    按顺序回放固定动作序列的聊天模型，用于在无网络的情况下驱动 Agent.invoke。
+
+    每次调用返回 script 中的下一条消息，并按字符数粗略估算 usage_metadata，使 profiler 可以统计 token 数量。
+
+    Args:
+        script (list[str]): 依次返回的消息内容，可以用 action_message 生成。
+        calls (int): 已调用次数。
+    """
+    script: List[str]
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return 'scripted'
+
+    def _generate(self, messages: List[Any], stop: Any = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        if self.calls >= len(self.script):
+            raise IndexError(f"Script exhausted after {self.calls} calls")
+        content = self.script[self.calls]
+        self.calls += 1
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        output_tokens = len(content) // 4
+        message = AIMessage(content=content, usage_metadata={
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'total_tokens': input_tokens + output_tokens,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,5 @@
+from buffer.service import MessageBuffer
+
+__all__=[
+    'MessageBuffer'
+]
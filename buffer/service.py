@@ -0,0 +1,124 @@
+from collections import deque
+from collections.abc import MutableSequence
+from itertools import chain, islice
+from typing import Any, Iterable, Optional
+
+class MessageBuffer(MutableSequence):
+    """
+    有界消息缓冲区：固定保留的前缀 + 带 maxlen 的 deque。
+
+    前 pinned 条消息（如 system_message 和 user_query）永不淘汰；其余消息存放在环形缓冲区中，
+    超出 maxlen 时自动淘汰最早的一条，追加和淘汰都是 O(1)。对外表现为普通的可变序列。
+
+    Args:
+        items (Iterable[Any]): 初始元素。
+        maxlen (Optional[int]): 前缀之外最多保留的元素数量，None 表示不限制。
+        pinned (int): 固定保留的前缀长度，默认0。
+    """
+    def __init__(self, items: Iterable[Any] = (), maxlen: Optional[int] = None, pinned: int = 0):
+        self.pinned = pinned
+        self.evicted = 0 # 被淘汰的元素数量
+        self._prefix = []
+        self._recent = deque(maxlen=maxlen)
+        self.extend(items)
+
+    @property
+    def maxlen(self) -> Optional[int]:
+        return self._recent.maxlen
+
+    def append(self, item: Any):
+        if len(self._prefix) < self.pinned:
+            self._prefix.append(item)
+            return
+        if self._recent.maxlen is not None and len(self._recent) == self._recent.maxlen:
+            self.evicted += 1
+        self._recent.append(item)
+
+    def extend(self, items: Iterable[Any]):
+        for item in items:
+            self.append(item)
+
+    def pop(self, index: int = -1) -> Any:
+        if index == -1:
+            return self._recent.pop() if self._recent else self._prefix.pop()
+        item = self[index]
+        del self[index]
+        return item
+
+    def tail(self, n: int) -> list:
+        """
+        返回最后 n 个元素，只访问缓冲区末尾。
+        """
+        items = list(islice(reversed(self._recent), n))
+        if len(items) < n:
+            items.extend(islice(reversed(self._prefix), n - len(items)))
+        return items[::-1]
+
+    def clear(self):
+        self._prefix.clear()
+        self._recent.clear()
+
+    def _locate(self, index: int) -> tuple:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("MessageBuffer index out of range")
+        if index < len(self._prefix):
+            return self._prefix, index
+        return self._recent, index - len(self._prefix)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        container, position = self._locate(index)
+        return container[position]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            items = list(self)
+            items[index] = value
+            self._rebuild(items)
+            return
+        container, position = self._locate(index)
+        container[position] = value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            items = list(self)
+            del items[index]
+            self._rebuild(items)
+            return
+        container, position = self._locate(index)
+        del container[position]
+
+    def insert(self, index: int, value: Any):
+        if index >= len(self):
+            self.append(value)
+            return
+        items = list(self)
+        items.insert(index, value)
+        self._rebuild(items)
+
+    def _rebuild(self, items: list):
+        evicted = self.evicted
+        self._prefix, self._recent = [], deque(maxlen=self._recent.maxlen)
+        self.extend(items)
+        self.evicted = evicted + max(0, len(items) - len(self))
+
+    def __len__(self) -> int:
+        return len(self._prefix) + len(self._recent)
+
+    def __iter__(self):
+        return chain(self._prefix, self._recent)
+
+    def __reversed__(self):
+        return chain(reversed(self._recent), reversed(self._prefix))
+
+    def __eq__(self, other):
+        if isinstance(other, (MessageBuffer, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"MessageBuffer({list(self)!r}, maxlen={self.maxlen}, pinned={self.pinned})"
@@ -0,0 +1,5 @@
+from cache.service import LLMCache
+
+__all__=[
+    'LLMCache'
+]
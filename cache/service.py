@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, Sequence
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from langchain_core.language_models.chat_models import BaseChatModel
+
+class LLMCache:
+    """
+    LLM 响应缓存，以消息列表和模型配置的哈希为键，将响应存储在本地 SQLite 数据库中。
+
+    相同的消息前缀（temperature=0.0 时）直接返回缓存的响应；超过 max_entries 时按最近访问时间淘汰。
+    设置 replay_only=True 时未命中缓存会直接报错而不调用 LLM，可作为离线回放测试工具。
+
+    Args:
+        path (str): SQLite 数据库路径，默认为 '.data_use_cache/llm_cache.sqlite'。
+        max_entries (int): 最大缓存条目数，默认1000。
+        replay_only (bool): 是否只回放缓存，默认 False。
+        deterministic_only (bool): 是否只缓存显式设置 temperature 为 0 的模型调用，默认 True。
+    """
+    def __init__(self, path: str = '.data_use_cache/llm_cache.sqlite', max_entries: int = 1000, replay_only: bool = False, deterministic_only: bool = True):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        self.path = path
+        self.max_entries = max_entries
+        self.replay_only = replay_only
+        self.deterministic_only = deterministic_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, message TEXT NOT NULL, last_access REAL NOT NULL)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+        self._conn.commit()
+
+    @staticmethod
+    def model_config(llm: BaseChatModel) -> dict:
+        """
+        获取影响模型输出的配置（模型名、温度等），不包含密钥。模型后端（如 model.ChatModel）按其包装的 LangChain 模型计算。
+        """
+        llm = getattr(llm, 'chat_model', llm)
+        params = getattr(llm, '_identifying_params', None) or {}
+        return {'type': type(llm).__name__, **params}
+
+    def key(self, messages: Sequence[BaseMessage], llm: BaseChatModel) -> str:
+        """
+        计算缓存键：消息列表和模型配置的 SHA-256。
+        """
+        payload = json.dumps({'messages': messages_to_dict(list(messages)), 'model': self.model_config(llm)},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def cacheable(self, llm: BaseChatModel) -> bool:
+        """
+        deterministic_only 时只缓存显式设置 temperature=0 的模型；未设置 temperature 表示使用服务端默认值（通常为 1.0），输出是采样的，不缓存。
+        """
+        if not self.deterministic_only:
+            return True
+        temperature = self.model_config(llm).get('temperature')
+        return temperature is not None and temperature == 0
+
+    def get(self, key: str) -> Optional[BaseMessage]:
+        with self._lock:
+            row = self._conn.execute('SELECT message FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+        return messages_from_dict([json.loads(row[0])])[0]
+
+    def put(self, key: str, message: BaseMessage):
+        record = json.dumps(messages_to_dict([message])[0], ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO responses (key, message, last_access) VALUES (?, ?, ?)', (key, record, time.time()))
+            self._conn.execute('DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+            self._conn.commit()
+
+    def invoke(self, llm: BaseChatModel, messages: Sequence[BaseMessage]) -> BaseMessage:
+        """
+        调用 LLM，命中缓存时直接返回缓存的响应。
+
+        Args:
+            llm (BaseChatModel): 语言模型或模型后端。
+            messages (Sequence[BaseMessage]): 消息列表。
+
+        Returns:
+            BaseMessage: 模型响应。
+        """
+        if not self.cacheable(llm):
+            return llm.invoke(messages)
+        key = self.key(messages, llm)
+        message = self.get(key)
+        if message is not None:
+            self.hits += 1
+            return message
+        self.misses += 1
+        if self.replay_only:
+            raise LookupError(f"No cached LLM response for key {key[:12]} (replay_only mode)")
+        message = llm.invoke(messages)
+        self.put(key, message)
+        return message
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def __repr__(self):
+        return f"<LLMCache: {len(self)} entries, {self.hits} hits, {self.misses} misses>"
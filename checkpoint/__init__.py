@@ -0,0 +1,5 @@
+from checkpoint.service import Checkpoint
+
+__all__=[
+    'Checkpoint'
+]
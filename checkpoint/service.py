@@ -0,0 +1,257 @@
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import pandas as pd
+from datetime import datetime
+from typing import Optional
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+from agent.views import AgentState, AgentStep, AgentData
+from buffer import MessageBuffer
+from agent.utils import AgentContext
+from checkpoint.views import CheckpointMeta, CheckpointData, FrameMeta
+from tools.utils import ChunkedDataFrame
+
+class Checkpoint:
+    """
+    代理运行检查点，将 AgentState、AgentStep、AgentContext 变量和 DataFrame 注册表保存到本地目录。
+
+    目录结构：
+        LATEST                 最新检查点的目录名，原子替换写入
+        step_0003/checkpoint.json
+        step_0003/variables.pkl
+        frames/<df_name>-<hash>.parquet
+
+    DataFrame 按内容哈希存储在 frames 目录中，内容未变化的 DataFrame 在后续检查点中直接复用，不会重复写入；
+    注册表版本号未变化的 DataFrame 直接复用上次的文件，不重新计算哈希。优先使用 Parquet，无法转换的（如混合类型列）回退到 pickle。
+
+    Args:
+        directory (str): 检查点目录。
+        keep (int): 保留的检查点数量，默认2。
+    """
+    def __init__(self, directory: str, keep: int = 2):
+        if keep < 1:
+            raise ValueError(f"keep must be positive, got {keep}")
+        self.directory = directory
+        self.keep = keep
+        self.frames_dir = os.path.join(directory, 'frames')
+        self._saved_frames: dict = {} # df_name -> ((version, id(df)), 文件名, 格式)，版本未变化时跳过哈希
+
+    def latest(self) -> Optional[str]:
+        """
+        返回最新检查点的路径，没有检查点时返回 None。
+        """
+        pointer = os.path.join(self.directory, 'LATEST')
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer, 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+        path = os.path.join(self.directory, name)
+        return path if os.path.isdir(path) else None
+
+    def _save_frame(self, df_name: str, df: pd.DataFrame) -> FrameMeta:
+        digest = hashlib.sha1(df_name.encode('utf-8'))
+        digest.update(repr((list(df.columns), list(df.dtypes.astype(str)), df.shape)).encode('utf-8'))
+        try:
+            digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        except TypeError:
+            digest.update(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)) # 含不可哈希的单元格（如列表）
+        stem = f"{''.join(c if c.isalnum() else '_' for c in df_name)}-{digest.hexdigest()[:16]}"
+
+        for file_format, ext in (('parquet', '.parquet'), ('pickle', '.pkl')):
+            if os.path.exists(os.path.join(self.frames_dir, stem + ext)):
+                return FrameMeta(file=stem + ext, format=file_format)
+        path = os.path.join(self.frames_dir, stem + '.parquet')
+        try:
+            df.to_parquet(path + '.tmp', engine='pyarrow')
+            os.replace(path + '.tmp', path)
+            return FrameMeta(file=stem + '.parquet', format='parquet')
+        except Exception:
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+        path = os.path.join(self.frames_dir, stem + '.pkl')
+        df.to_pickle(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        return FrameMeta(file=stem + '.pkl', format='pickle')
+
+    def save(self, agent_state: AgentState, agent_step: AgentStep, context: AgentContext, registry: dict, chunked_registry: dict = None, extra: dict = None) -> str:
+        """
+        保存一个检查点。
+
+        Args:
+            agent_state (AgentState): 代理状态。
+            agent_step (AgentStep): 代理步骤。
+            context (AgentContext): 表达式解析上下文。
+            registry (dict): DataFrame 注册表。
+            chunked_registry (dict): 分块句柄注册表。
+            extra (dict): 恢复运行所需的其他参数。
+
+        Returns:
+            str: 检查点路径。
+        """
+        os.makedirs(self.frames_dir, exist_ok=True)
+        name = f"step_{agent_step.step_number:04d}"
+        path = os.path.join(self.directory, name)
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        frames, views = {}, {}
+        for df_name, df_info in registry.items():
+            if df_info.get('view') is not None:
+                views[df_name] = {k: v for k, v in df_info.items() if k != 'dataframe'} # 视图只保存定义，恢复后重新解析
+                continue
+            df = df_info.get('dataframe')
+            if df is None:
+                continue
+            key = (df_info.get('version'), id(df))
+            saved = self._saved_frames.get(df_name)
+            if key[0] is not None and saved is not None and saved[0] == key and os.path.exists(os.path.join(self.frames_dir, saved[1])):
+                frame = FrameMeta(file=saved[1], format=saved[2])
+            else:
+                frame = self._save_frame(df_name, df)
+                self._saved_frames[df_name] = (key, frame.file, frame.format)
+            frame.info = {k: v for k, v in df_info.items() if k != 'dataframe'}
+            frames[df_name] = frame
+
+        chunked = {}
+        for df_name, df_info in (chunked_registry or {}).items():
+            handle = df_info['handle']
+            chunked[df_name] = {
+                **{k: v for k, v in df_info.items() if k != 'handle'},
+                'chunk_size': handle.chunk_size,
+                'parquet_path': handle.parquet_path,
+            }
+
+        variables, pickled = {}, {}
+        frame_ids = {id(df_info['dataframe']): df_name for df_name, df_info in registry.items() if df_info.get('dataframe') is not None}
+        for var_name, value in context.variables.items():
+            if var_name in registry or id(value) in frame_ids: # 注册表中的 DataFrame 和视图只保存名称，恢复后按名称重新解析
+                variables[var_name] = {'ref': var_name if var_name in registry else frame_ids[id(value)]}
+                continue
+            try:
+                json.dumps(value)
+                variables[var_name] = {'value': value}
+            except (TypeError, ValueError):
+                variables[var_name] = {'pickle': True}
+                pickled[var_name] = value
+        if pickled:
+            with open(os.path.join(tmp_path, 'variables.pkl'), 'wb') as f:
+                pickle.dump(pickled, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        meta = CheckpointMeta(
+            step_number=agent_step.step_number,
+            max_steps=agent_step.max_steps,
+            created_at=datetime.now().isoformat(),
+            state=agent_state.model_dump(mode='json', exclude={'messages'}),
+            messages=messages_to_dict(list(agent_state.messages)),
+            evicted=agent_state.messages.evicted,
+            frames=frames,
+            views=views,
+            chunked=chunked,
+            variables=variables,
+            extra=extra or {},
+        )
+        with open(os.path.join(tmp_path, 'checkpoint.json'), 'w', encoding='utf-8') as f:
+            f.write(meta.model_dump_json())
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        pointer = os.path.join(self.directory, 'LATEST')
+        with open(pointer + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(name)
+        os.replace(pointer + '.tmp', pointer)
+        self._prune()
+        return path
+
+    def _prune(self):
+        """
+        删除多余的旧检查点和不再被引用的 DataFrame 文件。
+        """
+        steps = sorted(n for n in os.listdir(self.directory) if n.startswith('step_') and not n.endswith('.tmp'))
+        for name in steps[:-self.keep]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        referenced = set()
+        for name in steps[-self.keep:]:
+            with open(os.path.join(self.directory, name, 'checkpoint.json'), 'r', encoding='utf-8') as f:
+                meta = CheckpointMeta.model_validate_json(f.read())
+            referenced.update(frame.file for frame in meta.frames.values())
+        for file in os.listdir(self.frames_dir):
+            if file not in referenced:
+                os.remove(os.path.join(self.frames_dir, file))
+
+    def load(self, path: Optional[str] = None) -> CheckpointData:
+        """
+        加载检查点。
+
+        Args:
+            path (Optional[str]): 检查点路径，None 表示最新的检查点。
+
+        Returns:
+            CheckpointData: 检查点内容。
+        """
+        path = path or self.latest()
+        if path is None:
+            raise FileNotFoundError(f"No checkpoint found in '{self.directory}'")
+        with open(os.path.join(path, 'checkpoint.json'), 'r', encoding='utf-8') as f:
+            meta = CheckpointMeta.model_validate_json(f.read())
+
+        registry = {}
+        for df_name, frame in meta.frames.items():
+            frame_path = os.path.join(self.frames_dir, frame.file)
+            df = pd.read_parquet(frame_path, engine='pyarrow') if frame.format == 'parquet' else pd.read_pickle(frame_path)
+            registry[df_name] = {'dataframe': df, **frame.info}
+        for df_name, info in meta.views.items():
+            registry[df_name] = {'dataframe': None, **info}
+
+        chunked_registry = {}
+        for df_name, info in meta.chunked.items():
+            info = dict(info)
+            handle = ChunkedDataFrame(info['file_path'], sheet_name=info['sheet_name'], origin_header_row=info['origin_header_row'], chunk_size=info.pop('chunk_size'))
+            parquet_path = info.pop('parquet_path')
+            if parquet_path and os.path.exists(parquet_path):
+                handle.parquet_path = parquet_path
+            chunked_registry[df_name] = {'handle': handle, **info}
+
+        pickled = {}
+        if os.path.exists(os.path.join(path, 'variables.pkl')):
+            with open(os.path.join(path, 'variables.pkl'), 'rb') as f:
+                pickled = pickle.load(f)
+        variables = {}
+        for var_name, ref in meta.variables.items():
+            if 'ref' in ref:
+                continue # 引用在 restore 中按名称解析
+            elif 'value' in ref:
+                variables[var_name] = ref['value']
+            else:
+                variables[var_name] = pickled[var_name]
+        return CheckpointData(meta=meta, registry=registry, chunked_registry=chunked_registry, variables=variables, path=path)
+
+    def restore(self, data: CheckpointData, agent_state: AgentState, agent_step: AgentStep, context: AgentContext, registry: dict, chunked_registry: dict = None):
+        """
+        将检查点内容恢复到代理状态、上下文和注册表中（原地修改）。
+        """
+        meta = data.meta
+        state = dict(meta.state)
+        agent_data = state.pop('agent_data', None)
+        for key, value in state.items():
+            setattr(agent_state, key, value)
+        agent_state.agent_data = AgentData.model_validate(agent_data) if agent_data else None
+        agent_state.messages = MessageBuffer(messages_from_dict(meta.messages), maxlen=agent_state.max_memory, pinned=2)
+        agent_state.messages.evicted = meta.evicted
+        agent_step.step_number = meta.step_number
+        agent_step.max_steps = meta.max_steps
+
+        context.variables.clear()
+        context.variables.update(data.variables)
+        registry.clear()
+        registry.update(data.registry)
+        for var_name, ref in meta.variables.items():
+            # 与注册表同名的引用由上下文在求值时解析；其他名称的引用按当前注册表重新解析（视图由父表重建）
+            if 'ref' in ref and ref['ref'] != var_name:
+                context.set(var_name, context.lookup(ref['ref']) if context.resolver is not None else registry[ref['ref']]['dataframe'])
+        if chunked_registry is not None:
+            chunked_registry.clear()
+            chunked_registry.update(data.chunked_registry)
@@ -0,0 +1,57 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Optional
+
+class FrameMeta(BaseModel):
+    """
+    DataFrame 注册项的元数据，DataFrame 本身以二进制文件单独存储。
+
+    Args:
+        file (str): DataFrame 文件名（相对于 frames 目录）。
+        format (str): 文件格式，'parquet' 或 'pickle'。
+        info (dict): 注册表中除 dataframe 之外的元数据（file_path、sheet_name、origin_header_row 等）。
+    """
+    file: str
+    format: str
+    info: dict = Field(default_factory=dict)
+
+class CheckpointMeta(BaseModel):
+    """
+    检查点元数据，对应检查点目录中的 checkpoint.json。
+
+    Args:
+        step_number (int): 已完成的步骤数。
+        max_steps (int): 最大步骤数。
+        created_at (str): 创建时间。
+        state (dict): AgentState 中除消息之外的字段。
+        messages (list[dict]): 消息列表，由 messages_to_dict 序列化。
+        evicted (int): 消息缓冲区已淘汰的消息数量。
+        frames (dict[str, FrameMeta]): DATAFRAME_REGISTRY 中各 DataFrame 的存储信息。
+        views (dict[str, dict]): 视图的注册信息（含视图定义），恢复后按父表重新解析。
+        chunked (dict[str, dict]): 分块句柄的重建参数。
+        variables (dict[str, dict]): AgentContext 变量，{'ref': df_name} 引用注册表中的 DataFrame 或视图（恢复后按名称重新解析），
+            {'value': ...} 为可 JSON 序列化的值，{'pickle': True} 表示存储在 variables.pkl 中。
+        extra (dict): 代理的运行参数，如 query、file_path、instructions。
+    """
+    step_number: int
+    max_steps: int
+    created_at: str
+    state: dict
+    messages: list[dict]
+    evicted: int = 0
+    frames: dict[str, FrameMeta] = Field(default_factory=dict)
+    views: dict[str, dict] = Field(default_factory=dict)
+    chunked: dict[str, dict] = Field(default_factory=dict)
+    variables: dict[str, dict] = Field(default_factory=dict)
+    extra: dict = Field(default_factory=dict)
+
+class CheckpointData(BaseModel):
+    """
+    加载后的检查点内容。
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    meta: CheckpointMeta
+    registry: dict[str, dict]
+    chunked_registry: dict[str, dict]
+    variables: dict[str, Any]
+    path: Optional[str] = None
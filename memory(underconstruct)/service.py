@@ -1,23 +1,54 @@
 import os
 import json
+import time
 from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field, field_validator
-from memory.views import Dialog, convert_json_to_markdown
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator, model_validator
+from memory.views import Dialog, convert_json_to_markdown, replay_log
+from buffer import MessageBuffer
 
 class Memory(BaseModel):
     """
     记忆管理器，储存对话历史
 
+    对话持久化为仅追加的 JSONL 日志：每条消息只追加一行记录，每 fsync_every 条记录或每 fsync_interval 秒
+    批量 fsync 一次；日志记录数超过 compact_threshold 时，将当前对话压缩为一条快照记录并原子替换日志文件。
+
     Args：
         max_memory (int): 最大记忆数量, 默认10, 最小值为1
-        messages (List[Dialog]): 对话列表, 默认空列表
+        messages (MessageBuffer): 对话列表, 超出 max_memory 时自动淘汰最早的对话, 默认空
         file_dir (Optional[str]): 文件目录, 用于存储对话记录, 默认None
+        fsync_every (int): 每写入多少条记录执行一次 fsync, 默认16
+        fsync_interval (float): 距上次 fsync 超过多少秒时执行 fsync, 默认1.0
+        compact_threshold (int): 日志记录数超过该值时进行压缩, 默认1000
     """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     max_memory: int = Field(default=10, ge=1, description="最大记忆数量")
-    messages: List[Dialog] = []
+    messages: MessageBuffer = Field(default_factory=MessageBuffer)
     file_dir: Optional[str] = None
-        
+    fsync_every: int = Field(default=16, ge=1, description="批量 fsync 的记录数")
+    fsync_interval: float = Field(default=1.0, ge=0, description="批量 fsync 的时间间隔（秒）")
+    compact_threshold: int = Field(default=1000, ge=1, description="触发日志压缩的记录数")
+
+    _log = PrivateAttr(default=None)
+    _log_records: int = PrivateAttr(default=0)
+    _unsynced: int = PrivateAttr(default=0)
+    _last_sync: float = PrivateAttr(default_factory=time.monotonic)
+
+    @field_validator('messages', mode='before')
+    @classmethod
+    def _to_buffer(cls, value):
+        if isinstance(value, MessageBuffer):
+            return value
+        return MessageBuffer(Dialog(**msg) if isinstance(msg, dict) else msg for msg in value)
+
+    @model_validator(mode='after')
+    def _bound_buffer(self):
+        if self.messages.maxlen != self.max_memory:
+            self.messages = MessageBuffer(self.messages, maxlen=self.max_memory)
+        return self
+
     def add_message(self, role:str, content: str):
         """
         添加消息到记忆中
@@ -29,32 +60,71 @@ class Memory(BaseModel):
         role = role.lower()
         if role not in ['user', 'planner', 'agent', 'evaluator']:
             raise ValueError("角色类型必须是 'user', 'planner', 'agent' 或 'evaluator'。")
-        
+
         if not self.messages or role == 'user':
-            # 如果是用户消息或第一次添加消息，则创建新的对话
-            if len(self.messages) >= self.max_memory:
-                removed = self.messages.pop(0)
-                if self.file_dir:
-                    self._clean_old_files()
+            # 如果是用户消息或第一次添加消息，则创建新的对话（缓冲区已满时自动淘汰最早的对话）
             self.messages.append(Dialog(**{role: content}))
+            op = 'new'
         else:
             # 否则，更新现有对话
             last_dialog = self.messages[-1] # 获取最后一个对话
             setattr(last_dialog, role, content) # 设置对应角色的消息内容
             self.messages[-1] = last_dialog # 更新对话
-        
+            op = 'update'
+
         if self.file_dir:
-            self.save_file()
+            self._append({'op': op, 'role': role, 'content': content})
 
-    def save_file(self):
+    def _open_log(self):
+        if self._log is None:
+            self._log = open(self.file_dir, 'a', encoding='utf-8')
+        return self._log
+
+    def _append(self, record: dict):
+        """
+        追加一条日志记录，按批次 fsync，记录数过多时压缩日志
+        """
+        log = self._open_log()
+        log.write(json.dumps(record, ensure_ascii=False) + '\n')
+        log.flush()
+        self._log_records += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+        if self._log_records > self.compact_threshold:
+            self.compact()
+
+    def sync(self):
+        """
+        将已写入的日志记录 fsync 到磁盘
+        """
+        if self._log is not None and self._unsynced:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self):
         """
-        保存对话到文件
+        将当前对话压缩为一条快照记录，写入临时文件后原子替换日志文件
         """
         if not self.file_dir:
             raise ValueError("file_dir 未设置，无法保存文件。")
-        data = [msg.model_dump() for msg in self.messages]
-        with open(self.file_dir, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self.close()
+        tmp_path = f"{self.file_dir}.tmp"
+        snapshot = {'op': 'snapshot', 'messages': [msg.model_dump() for msg in self.messages]}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_dir)
+        self._log_records = 1
+
+    def save_file(self):
+        """
+        保存对话到文件（完整压缩写入一次）
+        """
+        self.compact()
 
     def load_file(self):
         """
@@ -62,9 +132,23 @@ class Memory(BaseModel):
         """
         if not self.file_dir or not os.path.exists(self.file_dir):
             raise ValueError("file_dir 未设置或文件不存在，无法加载文件。")
+        self.close()
+        data = replay_log(self.file_dir, max_memory=self.max_memory)
+        self.messages = MessageBuffer((Dialog(**msg) for msg in data), maxlen=self.max_memory)
         with open(self.file_dir, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        self.messages = [Dialog(**msg) for msg in data]
+            legacy = f.read(1) == '['
+            self._log_records = 0 if legacy else sum(1 for _ in f)
+        if legacy:
+            self.compact() # 旧版 JSON 数组文件转换为日志格式
+
+    def close(self):
+        """
+        fsync 并关闭日志文件
+        """
+        if self._log is not None:
+            self.sync()
+            self._log.close()
+            self._log = None
 
     def get_recent(self, n: int = 1) -> List[Dialog]:
         """
@@ -76,8 +160,8 @@ class Memory(BaseModel):
         Returns:
             List[Dialog]: 最近的 n 条对话
         """
-        return self.messages[-n:] if n <= len(self.messages) else self.messages
-    
+        return self.messages.tail(n)
+
     def get_all(self) -> List[Dialog]:
         """
         获取所有对话
@@ -85,21 +169,23 @@ class Memory(BaseModel):
         Returns:
             List[Dialog]: 所有对话
         """
-        return self.messages
-    
+        return list(self.messages)
+
     def clear(self):
         """
         清除所有对话
         """
-        self.messages = []
+        self.close()
+        self.messages.clear()
+        self._log_records = 0
         if self.file_dir and os.path.exists(self.file_dir):
             os.remove(self.file_dir)
 
     def __repr__(self):
         return f"<Memory: {len(self.messages)} round stored>"
-    
+
 if __name__ == "__main__":
-    mem = Memory(max_memory=3, file_dir='memory.json')
+    mem = Memory(max_memory=3, file_dir='memory.jsonl')
 
     mem.add_message('user', '请读取A1单元格的内容')
     mem.add_message('planner', '使用Excel Tool读取A1单元格')
@@ -112,11 +198,12 @@ if __name__ == "__main__":
     mem.add_message('evaluator', '确认读取结果正确')
 
     mem.add_message('user', '请读取C1单元格的内容')
+    mem.close()
 
     print(mem)
     print(mem.get_recent(1))
     print(mem.get_all())
 
-    convert_json_to_markdown('memory.json', 'memory_export.md')
+    convert_json_to_markdown('memory.jsonl', 'memory_export.md')
+
 
-    
\ No newline at end of file
@@ -1,22 +1,63 @@
 import json
 import os
+from collections import deque
 from datetime import datetime
 from pydantic import BaseModel
 from typing import List, Optional
 
+def replay_log(file_path: str, max_memory: Optional[int] = None) -> List[dict]:
+    """
+    回放对话日志，得到当前的对话列表。
+
+    日志为 JSONL 格式，每行一条记录：
+        - {"op": "snapshot", "messages": [...]}：压缩后的完整快照，覆盖之前的所有记录。
+        - {"op": "new", "role": ..., "content": ...}：新建一轮对话。
+        - {"op": "update", "role": ..., "content": ...}：更新最后一轮对话中某个角色的消息。
+    同时兼容旧版整体写入的 JSON 数组文件。
+
+    Args:
+        file_path (str): 日志文件路径。
+        max_memory (Optional[int]): 最大记忆数量，超出时按写入顺序淘汰最早的对话，None 表示不限制。
+
+    Returns:
+        List[dict]: 对话列表，每个元素为一轮对话的字典。
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        head = f.read(1)
+        f.seek(0)
+        if head == '[':
+            data = json.load(f)
+            return data[-max_memory:] if max_memory else data
+
+        dialogs = deque(maxlen=max_memory)
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break  # 崩溃时写了一半的最后一行，之前的记录仍然有效
+            if record['op'] == 'snapshot':
+                dialogs = deque(record['messages'], maxlen=max_memory)
+            elif record['op'] == 'new':
+                dialogs.append({record['role']: record['content']})
+            elif record['op'] == 'update' and dialogs:
+                dialogs[-1][record['role']] = record['content']
+    return list(dialogs)
+
 def convert_json_to_markdown(json_path: str, output_md_path: str = None):
     """
-    将 JSON 文件转换为 Markdown 格式的文件。
+    将 JSON 文件（或对话日志）转换为 Markdown 格式的文件。
 
     Args:
-        json_path (str): 输入的 JSON 文件路径。
+        json_path (str): 输入的 JSON 文件或 JSONL 对话日志路径。
         output_md_path (Optional[str]): 输出的 Markdown 文件路径。如果未提供，则使用输入文件名加上 .md 后缀。
     """
     if not os.path.exists(json_path):
         raise FileNotFoundError(f"未找到JSON文件: {json_path}")
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = replay_log(json_path)
     
     lines = ["# 对话记录\n"]
 
@@ -0,0 +1,13 @@
+from model.base import BaseModel
+from model.model import ChatModel, GPTModel, DeepSeekModel
+from model.client import get_http_client, get_async_http_client, close_http_clients
+
+__all__=[
+    'BaseModel',
+    'ChatModel',
+    'GPTModel',
+    'DeepSeekModel',
+    'get_http_client',
+    'get_async_http_client',
+    'close_http_clients'
+]
@@ -0,0 +1,57 @@
+from abc import ABC, abstractmethod
+from typing import Optional, List, Dict, Any, Iterator, Sequence
+from langchain_core.messages import BaseMessage
+
+
+class BaseModel(ABC):
+    """
+    代理使用的模型后端接口。
+
+    chat/achat/stream/batch 接收提示和以字典表示的对话历史（{'role': 'user'|'assistant'|'system', 'content': ...}），
+    返回的字典包含 role、content、tool_calls，以及 usage（token 数量）和 latency（耗时，秒）。
+    invoke/ainvoke 接收 LangChain 消息列表，供 Agent 调用，耗时写入响应的 response_metadata['latency']。
+    """
+    @abstractmethod
+    def chat(
+        self,
+        prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def achat(
+        self,
+        prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def stream(
+        self,
+        prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def batch(
+        self,
+        prompts: Sequence[str],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def invoke(self, messages: Sequence[BaseMessage]) -> BaseMessage:
+        pass
+
+    @abstractmethod
+    async def ainvoke(self, messages: Sequence[BaseMessage]) -> BaseMessage:
+        pass
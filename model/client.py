@@ -0,0 +1,83 @@
+import atexit
+import asyncio
+import threading
+import importlib.util
+from typing import Optional, Union
+import httpx
+
+DEFAULT_MAX_CONNECTIONS = 20 # 每个连接池的最大连接数
+DEFAULT_MAX_KEEPALIVE = 10 # 空闲时保留的长连接数
+DEFAULT_KEEPALIVE_EXPIRY = 60.0 # 空闲长连接的保留时间（秒）
+DEFAULT_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+# 共享的 HTTP 客户端：(客户端类型, 配置, 事件循环) -> 客户端，相同配置的模型复用同一个连接池
+_CLIENTS: dict = {}
+_LOCK = threading.Lock()
+
+def http2_available() -> bool:
+    """
+    是否安装了 HTTP/2 所需的 h2 包（pip install 'httpx[http2]'）。
+    """
+    return importlib.util.find_spec('h2') is not None
+
+def _shared_client(client_type: type, max_connections: int, max_keepalive: int, keepalive_expiry: float, http2: Optional[bool], timeout: Union[float, httpx.Timeout], loop: Optional[asyncio.AbstractEventLoop] = None):
+    if http2 is None:
+        http2 = http2_available()
+    elif http2 and not http2_available():
+        raise ImportError("HTTP/2 requires the h2 package, install it with pip install 'httpx[http2]'")
+    timeout = timeout if isinstance(timeout, httpx.Timeout) else httpx.Timeout(timeout)
+    key = (client_type, max_connections, max_keepalive, keepalive_expiry, http2, tuple(sorted(timeout.as_dict().items())), id(loop) if loop else None)
+    with _LOCK:
+        for stale in [k for k, (_, owner) in _CLIENTS.items() if owner is not None and owner.is_closed()]:
+            del _CLIENTS[stale] # 事件循环已关闭，其连接不能再使用
+        client = _CLIENTS.get(key, (None, None))[0]
+        if client is None or client.is_closed:
+            limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive, keepalive_expiry=keepalive_expiry)
+            client = client_type(limits=limits, http2=http2, timeout=timeout)
+            _CLIENTS[key] = (client, loop)
+    return client
+
+def get_http_client(max_connections: int = DEFAULT_MAX_CONNECTIONS, max_keepalive: int = DEFAULT_MAX_KEEPALIVE, keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY, http2: Optional[bool] = None, timeout: Union[float, httpx.Timeout] = DEFAULT_TIMEOUT) -> httpx.Client:
+    """
+    获取共享的同步 HTTP 客户端，相同配置返回同一个实例，所有模型和 Agent 复用其中的长连接。
+
+    Args:
+        max_connections (int): 最大连接数，默认20。
+        max_keepalive (int): 空闲时保留的长连接数，默认10。
+        keepalive_expiry (float): 空闲长连接的保留时间（秒），默认60。
+        http2 (Optional[bool]): 是否启用 HTTP/2，None 表示安装了 h2 时启用。
+        timeout (Union[float, httpx.Timeout]): 请求超时，默认读取120秒、连接10秒。
+
+    Returns:
+        httpx.Client: 共享的客户端，可以传给 ChatOpenAI/ChatDeepSeek 的 http_client 参数。
+    """
+    return _shared_client(httpx.Client, max_connections, max_keepalive, keepalive_expiry, http2, timeout)
+
+def get_async_http_client(max_connections: int = DEFAULT_MAX_CONNECTIONS, max_keepalive: int = DEFAULT_MAX_KEEPALIVE, keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY, http2: Optional[bool] = None, timeout: Union[float, httpx.Timeout] = DEFAULT_TIMEOUT) -> httpx.AsyncClient:
+    """
+    获取当前事件循环共享的异步 HTTP 客户端，参数同 get_http_client。异步连接属于使用它的事件循环，
+    每个事件循环各有一个客户端，应在使用它的事件循环中（如 async 函数内）调用；在事件循环外调用时返回的客户端只能在一个事件循环中使用。
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    return _shared_client(httpx.AsyncClient, max_connections, max_keepalive, keepalive_expiry, http2, timeout, loop=loop)
+
+def close_http_clients():
+    """
+    关闭所有共享的 HTTP 客户端，进程退出时自动调用。
+    """
+    with _LOCK:
+        clients = [client for client, _ in _CLIENTS.values()]
+        _CLIENTS.clear()
+    for client in clients:
+        if isinstance(client, httpx.AsyncClient):
+            try:
+                asyncio.run(client.aclose())
+            except Exception:
+                pass # 事件循环已关闭或仍在运行，连接随进程退出释放
+        else:
+            client.close()
+
+atexit.register(close_http_clients)
@@ -0,0 +1,185 @@
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator, Sequence
+
+import httpx
+from langchain_openai import ChatOpenAI
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain.schema.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
+
+from model.base import BaseModel
+from model.client import get_http_client
+from profiler.service import Profiler
+
+ROLE_MESSAGES = {
+    'user': HumanMessage,
+    'assistant': AIMessage,
+    'system': SystemMessage,
+}
+
+class ChatModel(BaseModel):
+    """
+    将 LangChain 聊天模型包装为模型后端。
+
+    对话历史按前缀增量转换：与上一次调用相同的前缀直接复用已创建的消息对象，只转换新增的消息。
+
+    Args:
+        llm (BaseChatModel): 被包装的 LangChain 聊天模型。
+        max_concurrency (int): batch 默认的最大并发数，默认8。
+    """
+    def __init__(self, llm: BaseChatModel, max_concurrency: int = 8):
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self._history_items: List[tuple] = []
+        self._history_messages: List[BaseMessage] = []
+        self._bound: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def chat_model(self) -> BaseChatModel:
+        return self.llm
+
+    def convert_history(self, history: Optional[List[Dict[str, str]]]) -> List[BaseMessage]:
+        """
+        将字典表示的对话历史转换为 LangChain 消息列表，未知角色的消息被忽略。
+        """
+        if not history:
+            return []
+        items = [(item["role"], item["content"]) for item in history if item["role"] in ROLE_MESSAGES]
+        with self._lock:
+            cached = self._history_items
+            common = 0
+            limit = min(len(cached), len(items))
+            while common < limit and cached[common] == items[common]:
+                common += 1
+            messages = self._history_messages[:common] + [ROLE_MESSAGES[role](content=content) for role, content in items[common:]]
+            self._history_items, self._history_messages = items, messages
+        return list(messages)
+
+    def _runnable(self, tools: Optional[List[Dict[str, Any]]]):
+        if not tools:
+            return self.llm
+        key = json.dumps(tools, sort_keys=True, default=str)
+        with self._lock:
+            bound = self._bound.get(key)
+            if bound is None:
+                bound = self._bound[key] = self.llm.bind_tools(tools)
+        return bound
+
+    def _messages(self, prompt: str, history: Optional[List[Dict[str, str]]]) -> List[BaseMessage]:
+        return self.convert_history(history) + [HumanMessage(content=prompt)]
+
+    @staticmethod
+    def _result(message: BaseMessage, latency: float) -> Dict[str, Any]:
+        return {
+            "role": "assistant",
+            "content": message.content,
+            "tool_calls": getattr(message, "tool_calls", None),
+            "usage": Profiler.usage(message),
+            "latency": latency,
+        }
+
+    def chat(
+        self,
+        prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> Dict[str, Any]:
+        messages = self._messages(prompt, history)
+        start = time.perf_counter()
+        response = self._runnable(tools).invoke(messages)
+        return self._result(response, time.perf_counter() - start)
+
+    async def achat(
+        self,
+        prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> Dict[str, Any]:
+        messages = self._messages(prompt, history)
+        start = time.perf_counter()
+        response = await self._runnable(tools).ainvoke(messages)
+        return self._result(response, time.perf_counter() - start)
+
+    def stream(
+        self,
+        prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式生成：每个非空片段产生 {'role', 'content', 'done': False}，结束时产生一次完整结果，
+        额外包含 done=True 和 first_token_latency（首个片段的耗时，秒）。
+        """
+        messages = self._messages(prompt, history)
+        start = time.perf_counter()
+        first_token_latency = None
+        response = None
+        for chunk in self._runnable(tools).stream(messages):
+            if first_token_latency is None:
+                first_token_latency = time.perf_counter() - start
+            response = chunk if response is None else response + chunk
+            if chunk.content:
+                yield {"role": "assistant", "content": chunk.content, "done": False}
+        result = self._result(response if response is not None else AIMessage(content=""), time.perf_counter() - start)
+        result.update(done=True, first_token_latency=first_token_latency)
+        yield result
+
+    def batch(
+        self,
+        prompts: Sequence[str],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        以相同的对话历史并发发送多个提示，结果顺序与 prompts 一致，历史只转换一次。
+        """
+        if not prompts:
+            return []
+        base = self.convert_history(history)
+        runnable = self._runnable(tools)
+
+        def run(prompt: str) -> Dict[str, Any]:
+            start = time.perf_counter()
+            response = runnable.invoke(base + [HumanMessage(content=prompt)])
+            return self._result(response, time.perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency or self.max_concurrency, len(prompts))) as executor:
+            return list(executor.map(run, prompts))
+
+    def invoke(self, messages: Sequence[BaseMessage]) -> BaseMessage:
+        start = time.perf_counter()
+        response = self.llm.invoke(list(messages))
+        response.response_metadata = {**response.response_metadata, "latency": time.perf_counter() - start}
+        return response
+
+    async def ainvoke(self, messages: Sequence[BaseMessage]) -> BaseMessage:
+        start = time.perf_counter()
+        response = await self.llm.ainvoke(list(messages))
+        response.response_metadata = {**response.response_metadata, "latency": time.perf_counter() - start}
+        return response
+
+    def __repr__(self):
+        return f"<ChatModel: {type(self.llm).__name__}>"
+
+
+class GPTModel(ChatModel):
+    def __init__(self, api_key: str, base_url: Optional[str] = None, model_name: str = "gpt-4", http_client: Optional[httpx.Client] = None, http_async_client: Optional[httpx.AsyncClient] = None):
+        # 默认使用共享的同步 HTTP 客户端，不同实例复用同一个连接池中的长连接。
+        # 异步客户端的连接属于第一次使用它的事件循环，不能跨 asyncio.run 共享，未传入时由 ChatOpenAI 自行创建
+        super().__init__(ChatOpenAI(
+            model=model_name,
+            api_key=api_key,
+            base_url=base_url,
+            temperature=0.0,
+            http_client=http_client or get_http_client(),
+            http_async_client=http_async_client,
+        ))
+
+
+class DeepSeekModel(GPTModel):
+    def __init__(self, api_key: str, base_url: str, model_name: str = "deepseek-chat", http_client: Optional[httpx.Client] = None, http_async_client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key=api_key, base_url=base_url, model_name=model_name, http_client=http_client, http_async_client=http_async_client)
@@ -0,0 +1,5 @@
+from prefetch.service import Prefetcher
+
+__all__=[
+    'Prefetcher'
+]
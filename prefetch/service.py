@@ -0,0 +1,202 @@
+import os
+import re
+import logging
+import threading
+import contextvars
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import List, Optional
+
+from tools.reader import EXTENSION_FORMATS, detect_file_format, file_signature, cached_inspect_workbook, read_preview, invalidate_parsed
+from profiler.service import profiler
+
+logger = logging.getLogger(__name__)
+
+IGNORED_PATTERN = re.compile(r'^(~\$|\.tmp_)|\.(bak|backup)_\d{8}_\d{6}') # Excel 锁文件、原子保存的临时文件和备份文件
+
+class Prefetcher:
+    """
+    工作目录预取器：在后台线程中预先解析查询中提到的文件的工作表元数据和前几行预览，
+    并监视目录变化，文件修改后清除其解析缓存并重新预取，代理的第一次工具调用可以直接使用已解析的结果。
+
+    安装了 watchdog 时使用系统文件通知（Linux 上为 inotify），否则每 poll_interval 秒轮询一次已预取文件的签名。
+    解析缓存以文件签名为键（见 tools.reader.cached_parse），监视只用于及时释放和重新预取，不影响结果的正确性。
+
+    Args:
+        path (str): 工作目录；传入文件路径时监视其所在目录，并且每次都预取该文件。
+        recursive (bool): 是否扫描和监视子目录，默认 False。
+        max_sheets (int): 每个工作簿最多预取的工作表数量，默认10。
+        poll_interval (float): 未安装 watchdog 时的轮询间隔（秒），默认1.0。
+        watch (bool): 是否监视目录变化，默认 True。
+    """
+    def __init__(self, path: str, recursive: bool = False, max_sheets: int = 10, poll_interval: float = 1.0, watch: bool = True):
+        path = os.path.abspath(path)
+        self.directory = path if os.path.isdir(path) else os.path.dirname(path)
+        self.pinned = [] if os.path.isdir(path) else [path]
+        self.recursive = recursive
+        self.max_sheets = max_sheets
+        self.poll_interval = poll_interval
+        self.watch = watch
+        self.tracked = {} # 已安排预取的文件 -> 最近一次预取时的文件签名，这些文件变化后会重新预取
+        self._executor: Optional[ThreadPoolExecutor] = None # 第一次预取时创建，stop() 时关闭
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        self._observer = None
+        self._stop = threading.Event()
+
+    def files(self) -> List[str]:
+        """
+        列出目录中支持读取的数据文件。
+        """
+        found = []
+        for root, dirs, names in os.walk(self.directory):
+            found.extend(os.path.join(root, name) for name in sorted(names)
+                         if os.path.splitext(name)[1].lower() in EXTENSION_FORMATS and not IGNORED_PATTERN.search(name))
+            if not self.recursive:
+                break
+        return found
+
+    def mentioned(self, query: str) -> List[str]:
+        """
+        返回查询中提到的文件：文件名或去掉扩展名的文件名出现在查询中（不区分大小写）。
+        """
+        text = query.lower()
+        matched = []
+        for file_path in self.files():
+            name = os.path.basename(file_path).lower()
+            stem = os.path.splitext(name)[0]
+            if name in text or (len(stem) >= 3 and stem in text):
+                matched.append(file_path)
+        return list(dict.fromkeys(self.pinned + matched))
+
+    def start(self, query: Optional[str] = None) -> List[str]:
+        """
+        开始预取查询中提到的文件，并启动目录监视，立即返回。
+
+        Args:
+            query (Optional[str]): 用户查询，None 时只预取固定的文件。
+
+        Returns:
+            List[str]: 安排预取的文件路径。
+        """
+        if self.watch:
+            self.start_watcher()
+        paths = self.mentioned(query) if query else list(self.pinned)
+        for file_path in paths:
+            self.submit(file_path)
+        if paths:
+            logger.debug(f"Prefetching {len(paths)} files from '{self.directory}'")
+        return paths
+
+    def submit(self, file_path: str) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+            future = self._executor.submit(contextvars.copy_context().run, self.warm, file_path) # 预取 Span 记入提交时的计时会话
+            self._futures = [f for f in self._futures if not f.done()] + [future]
+        return future
+
+    def warm(self, file_path: str) -> bool:
+        """
+        解析文件的工作表元数据和各工作表的预览，结果写入解析缓存；解析失败只记录日志。
+
+        Returns:
+            bool: 是否预取成功。
+        """
+        signature = file_signature(file_path)
+        with self._lock:
+            self.tracked[file_path] = signature
+        if signature is None:
+            return False
+        with profiler.span('prefetch.warm', file=os.path.basename(file_path)):
+            try:
+                file_format = detect_file_format(file_path)
+                if file_format == 'excel':
+                    sheets = [sheet for sheet in cached_inspect_workbook(file_path) if sheet['state'] == 'visible']
+                    for sheet in sheets[:self.max_sheets]:
+                        read_preview(file_path, sheet_name=sheet['name'], file_format=file_format)
+                elif file_format == 'csv':
+                    read_preview(file_path, file_format=file_format)
+            except Exception as error:
+                logger.debug(f"Prefetch of '{file_path}' failed: {error}")
+                return False
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已安排的预取完成。
+
+        Returns:
+            bool: 是否在超时前全部完成。
+        """
+        with self._lock:
+            futures = list(self._futures)
+        return not wait(futures, timeout=timeout).not_done
+
+    def changed(self, file_path: str):
+        """
+        文件发生变化：清除其解析缓存，已安排预取的文件在后台重新预取。
+        """
+        file_path = os.path.abspath(file_path)
+        invalidate_parsed(file_path)
+        with self._lock:
+            tracked = file_path in self.tracked
+        if tracked and not self._stop.is_set():
+            self.submit(file_path)
+
+    def start_watcher(self):
+        """
+        启动目录监视：优先使用 watchdog，未安装时使用轮询线程。重复调用不会重复启动。
+        """
+        if self._observer is not None:
+            return
+        self._stop.clear()
+        if importlib.util.find_spec('watchdog') is not None:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+
+            prefetcher = self
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if event.is_directory or event.event_type in ('opened', 'closed_no_write'):
+                        return
+                    for path in (event.src_path, getattr(event, 'dest_path', '')):
+                        if path and not IGNORED_PATTERN.search(os.path.basename(path)):
+                            prefetcher.changed(os.fsdecode(path))
+
+            observer = Observer()
+            observer.schedule(Handler(), self.directory, recursive=self.recursive)
+            observer.daemon = True
+            observer.start()
+        else:
+            observer = threading.Thread(target=self._poll, name='prefetch-poll', daemon=True)
+            observer.start()
+        self._observer = observer
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            with self._lock:
+                tracked = dict(self.tracked)
+            for file_path, signature in tracked.items():
+                if file_signature(file_path) != signature:
+                    self.changed(file_path)
+
+    def stop(self):
+        """
+        停止目录监视，取消尚未开始的预取并关闭预取线程，不等待预取完成（正在进行的解析在后台结束后写入缓存）。
+        之后再次调用 start() 会重新启动。
+        """
+        self._stop.set()
+        observer, self._observer = self._observer, None
+        if observer is not None and hasattr(observer, 'stop'):
+            observer.stop()
+        if observer is not None:
+            observer.join(timeout=5)
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._futures = [f for f in self._futures if not f.done()]
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __repr__(self):
+        return f"<Prefetcher: '{self.directory}', {len(self.tracked)} files tracked>"
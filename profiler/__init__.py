@@ -0,0 +1,8 @@
+from profiler.service import Profiler, ActiveProfiler, profiler, profiled
+
+__all__=[
+    'Profiler',
+    'ActiveProfiler',
+    'profiler',
+    'profiled'
+]
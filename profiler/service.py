@@ -0,0 +1,267 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional
+from rich.console import Console
+from rich.table import Table
+
+from profiler.views import Span
+
+TOKEN_KEYS = ('input_tokens', 'output_tokens', 'total_tokens')
+
+class Profiler:
+    """
+    步骤级计时工具，记录 LLM 调用、解析、表达式解析、工具执行和提示渲染等各阶段的耗时。
+
+    未启用时 span 不做任何记录，开销可以忽略。结果可导出为 JSON Lines 或 Chrome Trace 格式
+    （在 chrome://tracing 或 Perfetto 中打开），也可以打印按名称汇总的表格。
+
+    Args:
+        enabled (bool): 是否启用，默认 False。
+    """
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: list[Span] = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Optional[Span]]:
+        """
+        计时一段代码，返回的 Span 可以在代码块中继续补充属性。
+
+        Args:
+            name (str): Span 名称。
+            **attrs: 附加属性。
+        """
+        if not self.enabled:
+            yield None
+            return
+        stack = self._stack()
+        start = time.perf_counter()
+        current = Span(name=name, start=start - self._origin, thread_id=threading.get_ident(),
+                       parent=stack[-1].name if stack else None, attrs=attrs)
+        stack.append(current)
+        try:
+            yield current
+        finally:
+            current.duration = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self.spans.append(current)
+
+    def _stack(self) -> list[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self) -> Optional[Span]:
+        """
+        返回当前线程最内层的 Span，没有时返回 None。
+        """
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def attach(self, parent: Optional[Span]) -> Iterator[None]:
+        """
+        在工作线程中以 parent 作为外层 Span，使线程池中打开的 Span 归属于提交任务时的 Span。
+
+        Args:
+            parent (Optional[Span]): 提交任务的线程中由 current() 取得的 Span。
+        """
+        if not self.enabled or parent is None:
+            yield
+            return
+        stack = self._stack()
+        stack.append(parent)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    @staticmethod
+    def usage(message: Any) -> dict:
+        """
+        从 LLM 响应的 usage_metadata 或 response_metadata 中提取 token 数量，缺失的项不包含在结果中。
+        """
+        usage = getattr(message, 'usage_metadata', None)
+        if not usage:
+            metadata = getattr(message, 'response_metadata', None) or {}
+            token_usage = metadata.get('token_usage') or metadata.get('usage') or {}
+            usage = {
+                'input_tokens': token_usage.get('prompt_tokens', token_usage.get('input_tokens')),
+                'output_tokens': token_usage.get('completion_tokens', token_usage.get('output_tokens')),
+                'total_tokens': token_usage.get('total_tokens'),
+            }
+        return {key: usage[key] for key in TOKEN_KEYS if usage.get(key) is not None}
+
+    @staticmethod
+    def record_usage(span: Optional[Span], message: Any):
+        """
+        将 LLM 响应中的 token 数量写入 Span。
+        """
+        if span is None:
+            return
+        span.attrs.update(Profiler.usage(message))
+
+    def export_jsonl(self, path: str):
+        """
+        每个 Span 一行 JSON。
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            for span in sorted(self.spans, key=lambda s: s.start):
+                f.write(span.model_dump_json() + '\n')
+
+    def export_chrome_trace(self, path: str):
+        """
+        导出 Chrome Trace Event 格式（完整事件 'X'，时间单位为微秒）。
+        """
+        events = [{
+            'name': span.name,
+            'cat': span.name.split(':')[0].split('.')[0],
+            'ph': 'X',
+            'ts': span.start * 1e6,
+            'dur': span.duration * 1e6,
+            'pid': os.getpid(),
+            'tid': span.thread_id,
+            'args': span.attrs,
+        } for span in sorted(self.spans, key=lambda s: s.start)]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False, default=str)
+
+    def export(self, path: str):
+        """
+        按扩展名导出：.jsonl 为 JSON Lines，其余为 Chrome Trace。
+        """
+        if path.endswith('.jsonl'):
+            self.export_jsonl(path)
+        else:
+            self.export_chrome_trace(path)
+
+    def wall_time(self) -> float:
+        """
+        最外层 Span 覆盖的总时间，不同线程中相互重叠的部分（如后台预取）只计算一次。
+        """
+        total, end = 0.0, None
+        for span in sorted((s for s in self.spans if s.parent is None), key=lambda s: s.start):
+            span_end = span.start + span.duration
+            if end is None or span.start >= end:
+                total += span.duration
+                end = span_end
+            elif span_end > end:
+                total += span_end - end
+                end = span_end
+        return total
+
+    def summary(self) -> Table:
+        """
+        按 Span 名称汇总次数、总耗时、平均耗时、最大耗时和 token 数量，"% of run" 相对于最外层 Span 覆盖的总时间。
+        """
+        groups: dict[str, list[Span]] = {}
+        for span in self.spans:
+            groups.setdefault(span.name, []).append(span)
+        top_level = self.wall_time() or 1.0
+
+        table = Table(title="Profile summary")
+        for column in ("Span", "Calls", "Total (s)", "Mean (ms)", "Max (ms)", "% of run", "Input tokens", "Output tokens"):
+            if column == "Span":
+                table.add_column(column, no_wrap=True, min_width=24)
+            else:
+                table.add_column(column, justify="right")
+        for name, spans in sorted(groups.items(), key=lambda item: -sum(s.duration for s in item[1])):
+            total = sum(s.duration for s in spans)
+            input_tokens = sum(s.attrs.get('input_tokens') or 0 for s in spans)
+            output_tokens = sum(s.attrs.get('output_tokens') or 0 for s in spans)
+            table.add_row(name, str(len(spans)), f"{total:.3f}", f"{total / len(spans) * 1000:.1f}",
+                          f"{max(s.duration for s in spans) * 1000:.1f}", f"{total / top_level * 100:.1f}",
+                          str(input_tokens) if input_tokens else "", str(output_tokens) if output_tokens else "")
+        return table
+
+    def print_summary(self):
+        Console().print(self.summary())
+
+_ACTIVE: ContextVar[Optional[Profiler]] = ContextVar('profiler_session', default=None)
+
+class ActiveProfiler:
+    """
+    当前上下文的计时会话的代理。各模块通过全局的 profiler 记录 Span，Span 写入当前上下文（contextvars）中激活的 Profiler；
+    没有激活的会话时不做任何记录。每个 Agent(profile=True) 的运行激活自己的 Profiler，
+    不同线程或嵌套运行的代理互不清空、互不关闭对方的记录。线程池中的任务需要用 contextvars.copy_context() 继承会话。
+    """
+    usage = staticmethod(Profiler.usage)
+    record_usage = staticmethod(Profiler.record_usage)
+
+    def get(self) -> Optional[Profiler]:
+        """
+        返回当前上下文中激活的 Profiler，没有时返回 None。
+        """
+        return _ACTIVE.get()
+
+    def activate(self, session: Optional[Profiler]) -> Token:
+        """
+        在当前上下文中激活 session（None 表示不记录），返回用于 deactivate 的令牌。
+        """
+        return _ACTIVE.set(session)
+
+    def deactivate(self, token: Token):
+        _ACTIVE.reset(token)
+
+    @contextmanager
+    def session(self, session: Optional[Profiler] = None) -> Iterator[Profiler]:
+        """
+        在代码块中激活一个计时会话，默认新建一个启用的 Profiler。
+        """
+        session = session or Profiler(enabled=True)
+        token = self.activate(session)
+        try:
+            yield session
+        finally:
+            self.deactivate(token)
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Optional[Span]]:
+        session = _ACTIVE.get()
+        if session is None:
+            yield None
+            return
+        with session.span(name, **attrs) as current:
+            yield current
+
+    def current(self) -> Optional[Span]:
+        session = _ACTIVE.get()
+        return session.current() if session is not None else None
+
+    @contextmanager
+    def attach(self, parent: Optional[Span]) -> Iterator[None]:
+        session = _ACTIVE.get()
+        if session is None:
+            yield
+            return
+        with session.attach(parent):
+            yield
+
+profiler = ActiveProfiler() # 全局入口，记录到当前上下文激活的会话，由 Agent(profile=True) 在每次运行时激活
+
+def profiled(name: str) -> Callable:
+    """
+    装饰器：使用当前上下文的计时会话为函数调用计时。
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiler.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class Span(BaseModel):
+    """
+    一段被计时的执行过程。
+
+    Args:
+        name (str): 名称，如 'agent.reason'、'tool:Load DataFrame Tool'、'prompt.system'。
+        start (float): 开始时间（秒，相对于 Profiler 创建或重置的时间）。
+        duration (float): 耗时（秒）。
+        thread_id (int): 执行线程的标识。
+        parent (Optional[str]): 外层 Span 的名称。
+        attrs (dict): 附加属性，如 step、input_tokens、output_tokens。
+    """
+    name: str
+    start: float
+    duration: float = 0.0
+    thread_id: int = 0
+    parent: Optional[str] = None
+    attrs: dict = Field(default_factory=dict)
@@ -3,6 +3,7 @@ from agent.views import AgentStep, AgentData, AgentState
 from langchain.prompts import PromptTemplate
 from importlib.resources import files
 from textwrap import dedent
+from profiler.service import profiled
 
 
 
@@ -13,6 +14,7 @@ class Prompt:
     
     """
     @staticmethod
+    @profiled('prompt.system')
     def system_prompt(tools_prompt: str,
                       max_steps: int,
                       file_path: str = None,
@@ -32,9 +34,28 @@ class Prompt:
         })
 
     @staticmethod
+    @profiled('prompt.speculative')
+    def speculative_prompt(k: int) -> str:
+        """
+        生成推测执行模式的附加指令，说明如何用 <action_candidates> 一次提出多个只读动作。
+
+        Args:
+            k (int): 每一步最多并发执行的动作数（含首选动作）。
+
+        Returns:
+            str: 附加指令。
+        """
+        template = PromptTemplate.from_file(files('prompt').joinpath('speculative.md'))
+        return template.format(**{
+            'k': k,
+            'alternatives': k - 1
+        })
+
+    @staticmethod
+    @profiled('prompt.action')
     def action_prompt(agent_data: AgentData) -> str:
         """
-        生成动作提示信息。
+        生成动作提示信息，推测执行模式下包含模型提出的备选动作，与下一次观察中的结果编号对应。
         
         Args:
             agent_data (AgentData): 代理数据。
@@ -48,10 +69,12 @@ class Prompt:
             'memory': agent_data.memory,
             'thought': agent_data.thought,
             'action_name': agent_data.action.name,
-            'action_input': agent_data.action.params
+            'action_input': agent_data.action.params,
+            'action_candidates': "\n    <action_candidates>{}</action_candidates>".format([candidate.model_dump() for candidate in agent_data.candidates]) if agent_data.candidates else ""
         })
     
     @staticmethod
+    @profiled('prompt.previous_observation')
     def previous_observation_prompt(observation: str)-> str:
         template=PromptTemplate.from_template(dedent('''
         ```xml
@@ -61,6 +84,7 @@ class Prompt:
         return template.format(**{'observation': observation})
     
     @staticmethod
+    @profiled('prompt.observation')
     def observation_prompt(agent_step: AgentStep, agent_state: AgentState, tool_result:ToolResult) -> str:
         """
         生成观察提示信息。
@@ -81,6 +105,7 @@ class Prompt:
         })
     
     @staticmethod
+    @profiled('prompt.answer')
     def answer_prompt(agent_data: AgentData, tool_result: ToolResult) -> str:
         """
         生成答案提示信息。
@@ -1,14 +1,39 @@
+import json
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Optional
 from langchain.tools import Tool
 from registry.views import Tool as ToolData, ToolResult
+from registry.utils import resolve_resources
 from textwrap import dedent
+from profiler.service import profiler
 
 class Registry:
     """
     该类用于管理和注册工具。
+
+    提供 resource_version 时，本次调用不写入任何资源的工具的成功结果按工具名称、规范化参数和所读资源的版本缓存（LRU），
+    写入资源的工具执行后清除读取这些资源的缓存；未声明读写资源的工具执行后清空缓存。
+
+    参数:
+        tools (list[Tool]): 工具列表。
+        resource_version (Optional[Callable[[str], Any]]): 返回资源当前版本的函数，如 DataFrame 的版本号或文件的修改时间，None 表示不缓存。
+        cache_size (int): 最多缓存的结果数，0 表示不缓存。
+        resource_dependencies (Optional[Callable[[str], list[str]]]): 返回读取某资源时同时读取的资源的函数，如视图依赖其父表。
     """
-    def __init__(self, tools: list[Tool] = []):
+    def __init__(self, tools: list[Tool] = [], resource_version: Optional[Callable[[str], Any]] = None, cache_size: int = 128,
+                 resource_dependencies: Optional[Callable[[str], list[str]]] = None):
         self.tools = tools
         self.tool_registry = self.registry()
+        self.resource_version = resource_version
+        self.resource_dependencies = resource_dependencies
+        self.cache_size = cache_size
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_lock = threading.Lock()
 
     def tool_prompt(self, tool_name: str) -> str:
         """
@@ -41,7 +66,9 @@ class Registry:
                 name=tool.name,
                 description=tool.description,
                 params=tool.args,
-                function=tool.run
+                function=tool.run,
+                reads=(tool.metadata or {}).get('reads'),
+                writes=(tool.metadata or {}).get('writes')
             ) for tool in self.tools
         }
     def get_tools_prompt(self) -> str:
@@ -74,9 +101,174 @@ class Registry:
                 is_success=False,
                 error=f"工具 '{tool_name}' 未注册"
             )
-        try:
-            content = tool.function(tool_input=kwargs)
-            return ToolResult(is_success=True, content=content)
-        except Exception as error:
-            return ToolResult(is_success=False, error=str(error))
+        effects = self.effects(tool_name, kwargs)
+        cacheable = self.resource_version is not None and self.cache_size > 0 and effects is not None and not effects[1]
+        with profiler.span(f'tool:{tool_name}') as span:
+            if cacheable:
+                key = self.cache_key(tool_name, kwargs, effects[0])
+                with self._cache_lock:
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        self.cache.move_to_end(key)
+                        self.cache_hits += 1
+                    else:
+                        self.cache_misses += 1
+                if span is not None:
+                    span.attrs['cached'] = cached is not None
+                if cached is not None:
+                    return cached[0]
+            try:
+                content = tool.function(tool_input=kwargs)
+                result = ToolResult(is_success=True, content=content)
+            except Exception as error:
+                if span is not None:
+                    span.attrs['error'] = str(error)
+                result = ToolResult(is_success=False, error=str(error))
+        if cacheable and result.is_success:
+            with self._cache_lock:
+                self.cache[key] = (result, effects[0])
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        elif effects is None or effects[1]:
+            self.invalidate(None if effects is None else effects[1])
+        return result
+
+    def cache_key(self, tool_name: str, kwargs: dict, reads: set[str]) -> tuple:
+        """
+        生成缓存键：工具名称、规范化的参数和所读资源的当前版本。
+        """
+        args = json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+        versions = tuple((resource, self.resource_version(resource)) for resource in sorted(reads))
+        return tool_name, args, versions
+
+    def invalidate(self, resources: Optional[set[str]] = None):
+        """
+        清除读取指定资源的缓存结果。
+
+        参数:
+            resources (Optional[set[str]]): 被写入的资源，None 表示清空全部缓存。
+        """
+        with self._cache_lock:
+            if resources is None:
+                self.cache.clear()
+                return
+            for key in [key for key, (_, reads) in self.cache.items() if reads & resources]:
+                del self.cache[key]
+
+
+    def effects(self, tool_name: str, kwargs: dict) -> Optional[tuple[set[str], set[str]]]:
+        """
+        解析一次工具调用读写的资源。
+
+        参数:
+            tool_name (str): 工具名称。
+            kwargs (dict): 工具参数。
+
+        返回:
+            Optional[tuple[set[str], set[str]]]: (读取的资源（含依赖的资源）, 写入的资源)，工具未注册或未声明读写资源时返回 None。
+        """
+        tool = self.tool_registry.get(tool_name)
+        if tool is None or tool.reads is None or tool.writes is None:
+            return None
+        reads = resolve_resources(tool.reads, kwargs)
+        if self.resource_dependencies is not None:
+            pending = list(reads)
+            while pending:
+                for dependency in self.resource_dependencies(pending.pop()):
+                    if dependency not in reads:
+                        reads.add(dependency)
+                        pending.append(dependency)
+        return reads, resolve_resources(tool.writes, kwargs)
+
+    def is_read_only(self, tool_name: str, kwargs: dict) -> bool:
+        """
+        判断一次工具调用是否只读：工具声明了读写资源，且按参数解析后不写入任何资源。
+
+        参数:
+            tool_name (str): 工具名称。
+            kwargs (dict): 工具参数。
+
+        返回:
+            bool: 是否只读。
+        """
+        effects = self.effects(tool_name, kwargs)
+        return effects is not None and not effects[1]
+
+    def dependency_graph(self, calls: list[tuple[str, dict]]) -> list[set[int]]:
+        """
+        根据各调用读写的 DataFrame 对象和文件构建依赖图。后一个调用与前一个调用存在写-读、读-写或写-写冲突，
+        或任一方未声明读写资源时，后者依赖前者。
+
+        参数:
+            calls (list[tuple[str, dict]]): (工具名称, 参数) 列表。
+
+        返回:
+            list[set[int]]: 每个调用所依赖的前序调用下标。
+        """
+        effects = [self.effects(name, kwargs) for name, kwargs in calls]
+        graph = []
+        for j, current in enumerate(effects):
+            depends = set()
+            for i in range(j):
+                previous = effects[i]
+                if current is None or previous is None:
+                    depends.add(i)
+                    continue
+                (reads_i, writes_i), (reads_j, writes_j) = previous, current
+                if writes_i & (reads_j | writes_j) or writes_j & reads_i:
+                    depends.add(i)
+            graph.append(depends)
+        return graph
+
+    def _execute_in(self, parent: Any, tool_name: str, kwargs: dict) -> ToolResult:
+        with profiler.attach(parent):
+            return self.execute(tool_name=tool_name, **kwargs)
+
+    def execute_many(self, calls: list[tuple[str, dict]], max_workers: int = 4, stop_on_error: bool = False) -> list[ToolResult]:
+        """
+        批量执行工具调用：按依赖图在线程池中并发执行互不依赖的调用，结果按输入顺序返回。
+
+        参数:
+            calls (list[tuple[str, dict]]): (工具名称, 参数) 列表。
+            max_workers (int): 最大并发线程数。
+            stop_on_error (bool): 为 True 时某个调用失败后不再启动尚未开始的调用，这些调用返回失败结果。
+
+        返回:
+            list[ToolResult]: 与 calls 一一对应的执行结果。
+        """
+        if len(calls) <= 1 or max_workers <= 1:
+            results = []
+            for name, kwargs in calls:
+                if stop_on_error and results and not results[-1].is_success:
+                    results.append(ToolResult(is_success=False, error="Skipped after an earlier call failed"))
+                    continue
+                results.append(self.execute(tool_name=name, **kwargs))
+            return results
 
+        graph = self.dependency_graph(calls)
+        parent = profiler.current() # 工作线程中的工具 Span 归属于调用方的 Span
+        results: list[Optional[ToolResult]] = [None] * len(calls)
+        pending = set(range(len(calls)))
+        running = {}
+        failed = False
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                if not failed:
+                    ready = [i for i in sorted(pending) if all(results[d] is not None for d in graph[i])]
+                    for i in ready:
+                        pending.discard(i)
+                        name, kwargs = calls[i]
+                        running[executor.submit(contextvars.copy_context().run, self._execute_in, parent, name, kwargs)] = i # 工作线程沿用调用方的计时会话
+                else:
+                    for i in pending:
+                        results[i] = ToolResult(is_success=False, error="Skipped after an earlier call failed")
+                    pending.clear()
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    results[i] = future.result()
+                    if stop_on_error and not results[i].is_success:
+                        failed = True
+        return results
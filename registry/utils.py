@@ -0,0 +1,52 @@
+import os
+from typing import Any, Callable, Iterable, Optional
+from langchain_core.tools import BaseTool
+
+def tool_effects(reads: Iterable[str] = (), writes: Iterable[str] = ()) -> Callable[[BaseTool], BaseTool]:
+    """
+    装饰器：声明工具读写的资源，写入 tool.metadata，供 Registry 构建依赖图、判断能否并发执行。
+
+    资源写作 '类型:参数名'，如 'df:df_name' 表示名为 kwargs['df_name'] 的 DataFrame 对象，'file:file_path' 表示
+    kwargs['file_path'] 指向的文件；'df:result_df_name|df_name' 表示取第一个不为 None 的参数。未声明的工具视为屏障，
+    不与任何调用并发。
+
+    Args:
+        reads (Iterable[str]): 读取的资源。
+        writes (Iterable[str]): 写入的资源，为空时工具是只读的。
+
+    Example:
+        @tool_effects(reads=['df:df_name'])
+        @tool('Excel Info Tool', args_schema=ExcelInfo)
+        def excel_info_tool(df_name: str): ...
+    """
+    def decorator(tool: BaseTool) -> BaseTool:
+        tool.metadata = {**(tool.metadata or {}), 'reads': list(reads), 'writes': list(writes)}
+        return tool
+    return decorator
+
+def resolve_resources(specs: Optional[Iterable[str]], kwargs: dict) -> set[str]:
+    """
+    将资源声明解析为具体的资源键，如 'df:sales'、'file:/abs/path/a.xlsx'。
+
+    Args:
+        specs (Optional[Iterable[str]]): 资源声明。
+        kwargs (dict): 工具调用参数。
+
+    Returns:
+        set[str]: 资源键集合。
+    """
+    resources = set()
+    for spec in specs or ():
+        kind, _, names = spec.partition(':')
+        value: Any = None
+        for name in names.split('|'):
+            value = kwargs.get(name)
+            if value is not None:
+                break
+        if value is None:
+            continue
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            if kind == 'file' and isinstance(item, str):
+                item = os.path.abspath(item)
+            resources.add(f"{kind}:{item}")
+    return resources
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Callable
+from typing import Callable, Optional
 
 class Tool(BaseModel):
     """
@@ -10,11 +10,22 @@ class Tool(BaseModel):
         description (str): 工具的详细描述，说明其用途和功能。
         function (Callable): 实现该工具功能的可调用对象（函数）。
         params (dict): 包含该函数所需参数的字典，键为参数名，值为参数的描述或默认值。
+        reads (Optional[list[str]]): 工具读取的资源声明，None 表示未声明（视为屏障，不与其他调用并发）。
+        writes (Optional[list[str]]): 工具写入的资源声明，None 表示未声明。
     """
     name: str
     description: str
     function: Callable
     params: dict
+    reads: Optional[list[str]] = None
+    writes: Optional[list[str]] = None
+
+    @property
+    def read_only(self) -> bool:
+        """
+        是否声明为只读（声明了读写资源且不写入任何资源）。
+        """
+        return self.writes is not None and not self.writes
 
 class ToolResult(BaseModel):
     """
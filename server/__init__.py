@@ -0,0 +1,6 @@
+from server.service import AgentServer, serve
+
+__all__=[
+    'AgentServer',
+    'serve'
+]
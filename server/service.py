@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import multiprocessing
+from http import HTTPStatus
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+from pydantic import ValidationError
+from langchain_core.language_models.chat_models import BaseChatModel
+from termcolor import colored
+
+from agent.service import Agent, reset_session
+from server.views import QueryRequest, QueryResponse
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(message)s')
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+MAX_BODY_SIZE = 1 << 20 # 请求体的最大字节数
+HEADER_TIMEOUT = 30 # 读取请求头的超时时间（秒）
+
+# 工作进程内的全局状态：在进程启动时创建一次，之后的查询复用
+_worker_llm: Optional[BaseChatModel] = None
+_worker_kwargs: dict = {}
+
+def init_worker(llm_factory: Callable[[], BaseChatModel], agent_kwargs: dict):
+    """
+    工作进程初始化：创建 LLM 客户端（及其连接池），之后该进程处理的所有查询都复用它。
+    """
+    global _worker_llm, _worker_kwargs
+    _worker_llm = llm_factory()
+    _worker_kwargs = dict(agent_kwargs)
+
+def run_query(request: dict) -> dict:
+    """
+    在工作进程中执行一次查询。DataFrame 注册表等是进程内的全局状态，执行前后都会清空，查询之间互不可见。
+
+    Args:
+        request (dict): QueryRequest 的字段。
+
+    Returns:
+        dict: QueryResponse 的字段。
+    """
+    kwargs = dict(_worker_kwargs)
+    if request.get('file_path'):
+        kwargs['file_path'] = request['file_path']
+    if request.get('max_steps'):
+        kwargs['max_steps'] = request['max_steps']
+    kwargs['instructions'] = list(kwargs.get('instructions', [])) + list(request.get('instructions') or [])
+    reset_session()
+    start = time.perf_counter()
+    try:
+        agent = Agent(llm=_worker_llm, **kwargs)
+        result = agent.invoke(request['query'])
+        steps = agent.agent_step.step_number
+    finally:
+        reset_session()
+    return QueryResponse(**result.model_dump(), steps=steps, elapsed=time.perf_counter() - start, worker=os.getpid()).model_dump()
+
+class AgentServer:
+    """
+    常驻的代理服务，通过 HTTP（TCP 或 Unix socket）接收查询，分配到固定数量的工作进程中执行。
+
+    每个工作进程启动时创建一次 LLM 客户端，导入的模块、工具和解析缓存在查询之间保留；DataFrame 注册表等进程内全局状态
+    在每次查询前后清空，同一时间一个进程只执行一个查询。所有进程都忙时请求排队等待，排队数达到 max_queue 时直接返回 429。
+
+    接口：
+        POST /query   请求体为 QueryRequest 的 JSON，返回 QueryResponse 的 JSON。
+        GET  /health  返回工作进程、执行中和排队中的查询数量。
+
+    Args:
+        llm_factory (Callable[[], BaseChatModel]): 在工作进程中创建 LLM 的函数，必须是可以 pickle 的模块级函数。
+        workers (int): 工作进程数，即同时执行的查询数，默认2。
+        max_queue (int): 最多排队等待的查询数，默认8。
+        agent_kwargs (Optional[dict]): 传给 Agent 的其他参数，如 max_steps、max_memory、file_path。
+        max_body_size (int): 请求体的最大字节数，默认 1 MiB。
+    """
+    def __init__(self, llm_factory: Callable[[], BaseChatModel], workers: int = 2, max_queue: int = 8, agent_kwargs: Optional[dict] = None, max_body_size: int = MAX_BODY_SIZE):
+        if workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
+        if max_queue < 0:
+            raise ValueError(f"max_queue must not be negative, got {max_queue}")
+        self.llm_factory = llm_factory
+        self.workers = workers
+        self.max_queue = max_queue
+        self.agent_kwargs = dict(agent_kwargs or {})
+        self.max_body_size = max_body_size
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self._closing = False
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # 使用 spawn 启动工作进程：服务进程中已有事件循环和执行器线程，fork 会复制这些线程持有的锁，导致新进程死锁
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=init_worker, initargs=(self.llm_factory, self.agent_kwargs))
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765, path: Optional[str] = None) -> asyncio.AbstractServer:
+        """
+        启动工作进程并开始监听，path 不为 None 时监听 Unix socket。
+        """
+        self._executor = self._create_executor()
+        self._slots = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, os.getpid) for _ in range(self.workers))) # 预先启动工作进程
+        if path:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        停止接收新请求，等待执行中的查询结束后关闭工作进程。
+        """
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, lambda: self._executor.shutdown(wait=True, cancel_futures=True))
+
+    def status(self) -> dict:
+        return {
+            'workers': self.workers,
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_queue': self.max_queue,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'closing': self._closing,
+        }
+
+    async def submit(self, request: QueryRequest) -> tuple[int, dict]:
+        """
+        将查询分配给空闲的工作进程执行，没有空闲进程时排队；队列已满返回 429，服务关闭或工作进程异常退出返回 503。
+
+        Returns:
+            tuple[int, dict]: HTTP 状态码和响应体。
+        """
+        if self._closing:
+            return 503, {'error': "Server is shutting down"}
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            return 429, {'error': f"All {self.workers} workers are busy and {self.waiting} queries are waiting"}
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        queued = time.perf_counter() - queued_at
+        self.active += 1
+        executor = self._executor
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, run_query, request.model_dump())
+        except BrokenProcessPool:
+            if self._executor is executor and not self._closing:
+                logger.warning(colored("⚠️: A worker process died, restarting the worker pool", color='yellow', attrs=['bold']))
+                self._executor = self._create_executor()
+                executor.shutdown(wait=False)
+            return 503, {'error': "Worker process exited unexpectedly"}
+        except Exception as error:
+            return 500, {'error': f"{type(error).__name__}: {error}"}
+        finally:
+            self.active -= 1
+            self._slots.release()
+        self.completed += 1
+        result['queued'] = queued
+        return 200, result
+
+    async def _dispatch(self, reader: asyncio.StreamReader) -> tuple[int, dict]:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), HEADER_TIMEOUT)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            return 400, {'error': "Malformed request"}
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        method, _, target = request_line.partition(' ')
+        path = target.split(' ', 1)[0].split('?', 1)[0]
+        headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(':') for line in header_lines if line)}
+
+        if path == '/health':
+            return (200, self.status()) if method == 'GET' else (405, {'error': "Use GET /health"})
+        if path != '/query':
+            return 404, {'error': f"Unknown path '{path}'"}
+        if method != 'POST':
+            return 405, {'error': "Use POST /query"}
+        try:
+            length = int(headers.get('content-length', '0'))
+        except ValueError:
+            return 400, {'error': "Invalid Content-Length"}
+        if length > self.max_body_size:
+            return 413, {'error': f"Request body exceeds {self.max_body_size} bytes"}
+        try:
+            body = await reader.readexactly(length)
+            request = QueryRequest.model_validate_json(body)
+        except asyncio.IncompleteReadError:
+            return 400, {'error': "Incomplete request body"}
+        except ValidationError as error:
+            return 400, {'error': str(error)}
+        return await self.submit(request)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            status, body = await self._dispatch(reader)
+        except Exception as error:
+            status, body = 500, {'error': f"{type(error).__name__}: {error}"}
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        headers = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(payload)}",
+            "Connection: close",
+        ]
+        if status in (429, 503):
+            headers.append("Retry-After: 1")
+        try:
+            writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass # 客户端已断开
+        finally:
+            writer.close()
+
+def serve(llm_factory: Callable[[], BaseChatModel], host: str = '127.0.0.1', port: int = 8765, path: Optional[str] = None, workers: int = 2, max_queue: int = 8, **agent_kwargs):
+    """
+    启动 AgentServer 并一直运行，Ctrl+C 时等待执行中的查询结束后退出。
+
+    Args:
+        llm_factory (Callable[[], BaseChatModel]): 在工作进程中创建 LLM 的模块级函数。
+        host (str): 监听地址，默认 '127.0.0.1'。
+        port (int): 监听端口，默认8765。
+        path (Optional[str]): Unix socket 路径，设置后忽略 host 和 port。
+        workers (int): 工作进程数，默认2。
+        max_queue (int): 最多排队等待的查询数，默认8。
+        **agent_kwargs: 传给 Agent 的其他参数。
+    """
+    async def main():
+        server = AgentServer(llm_factory, workers=workers, max_queue=max_queue, agent_kwargs=agent_kwargs)
+        await server.start(host=host, port=port, path=path)
+        address = path or f"http://{host}:{port}"
+        logger.info(colored(f"🚀: Serving {workers} agent workers on {address} (queue {max_queue})", color='blue', attrs=['bold']))
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+            logger.info(colored("🛑: Server stopped.", color='blue', attrs=['bold']))
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class QueryRequest(BaseModel):
+    """
+    POST /query 的请求体。
+
+    Args:
+        query (str): 用户查询。
+        file_path (Optional[str]): 代理的工作目录或文件，None 时使用服务的默认值。
+        max_steps (Optional[int]): 最大步骤数，None 时使用服务的默认值。
+        instructions (List[str]): 附加指令。
+    """
+    query: str = Field(min_length=1)
+    file_path: Optional[str] = None
+    max_steps: Optional[int] = Field(default=None, ge=1)
+    instructions: List[str] = Field(default_factory=list)
+
+class QueryResponse(BaseModel):
+    """
+    POST /query 的响应体。
+
+    Args:
+        is_done (bool): 代理是否完成任务。
+        content (Optional[str]): 代理的最终回答。
+        error (Optional[str]): 失败原因。
+        steps (int): 执行的步骤数。
+        queued (float): 排队等待的时间（秒）。
+        elapsed (float): 在工作进程中执行的时间（秒）。
+        worker (int): 执行查询的工作进程 PID。
+    """
+    is_done: bool = False
+    content: Optional[str] = None
+    error: Optional[str] = None
+    steps: int = 0
+    queued: float = 0.0
+    elapsed: float = 0.0
+    worker: int = 0
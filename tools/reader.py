@@ -0,0 +1,439 @@
+import os
+import re
+import csv
+import json
+import itertools
+import zipfile
+import posixpath
+import threading
+import importlib.util
+import xml.etree.ElementTree as ET
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Literal, Optional, Union
+
+FileFormat = Literal['excel', 'csv', 'parquet', 'json', 'ndjson']
+
+EXTENSION_FORMATS = {
+    '.xlsx': 'excel',
+    '.xlsm': 'excel',
+    '.xls': 'excel',
+    '.csv': 'csv',
+    '.tsv': 'csv',
+    '.txt': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.json': 'json',
+    '.jsonl': 'ndjson',
+    '.ndjson': 'ndjson',
+}
+
+CSV_ENCODINGS = ('utf-8-sig', 'gb18030')
+
+# Excel 读取引擎注册表：引擎名 -> (依赖模块, 读取函数, 支持的扩展名)
+# 读取函数签名为 (file_path, sheet_name, header, nrows) -> pd.DataFrame
+EXCEL_ENGINES: Dict[str, tuple] = {}
+
+# 引擎优先级，靠前且已安装的引擎优先使用；可通过环境变量 DATA_USE_EXCEL_ENGINE 指定首选引擎
+EXCEL_ENGINE_PRIORITY: List[str] = ['calamine', 'openpyxl']
+
+def register_excel_engine(name: str, module: str, reader: Optional[Callable[..., pd.DataFrame]] = None, priority: Optional[int] = None, extensions: tuple = ('.xlsx', '.xlsm', '.xls')):
+    """
+    注册一个 Excel 读取引擎。
+
+    Args:
+        name (str): 引擎名称。
+        module (str): 引擎依赖的模块名，未安装时该引擎不可用。
+        reader (Optional[Callable]): 读取函数，None 表示使用 pd.read_excel(engine=name)。
+        priority (Optional[int]): 在优先级列表中的位置，None 表示追加到末尾。
+        extensions (tuple): 引擎支持的文件扩展名。
+    """
+    if reader is None:
+        def reader(file_path, sheet_name=0, header=0, nrows=None):
+            return pd.read_excel(file_path, sheet_name=sheet_name, header=header, nrows=nrows, engine=name)
+    EXCEL_ENGINES[name] = (module, reader, extensions)
+    if name in EXCEL_ENGINE_PRIORITY:
+        EXCEL_ENGINE_PRIORITY.remove(name)
+    if priority is None:
+        EXCEL_ENGINE_PRIORITY.append(name)
+    else:
+        EXCEL_ENGINE_PRIORITY.insert(priority, name)
+
+register_excel_engine('calamine', 'python_calamine', priority=0)  # Rust 实现，pip install python-calamine
+register_excel_engine('openpyxl', 'openpyxl', extensions=('.xlsx', '.xlsm'))
+register_excel_engine('xlrd', 'xlrd', extensions=('.xls',))  # 旧版 .xls 文件
+
+def available_excel_engines(file_path: Optional[str] = None) -> List[str]:
+    """
+    按优先级返回当前环境中已安装的 Excel 读取引擎，指定 file_path 时只返回支持该扩展名的引擎。
+    """
+    preferred = os.environ.get('DATA_USE_EXCEL_ENGINE')
+    names = ([preferred] if preferred in EXCEL_ENGINES else []) + [n for n in EXCEL_ENGINE_PRIORITY if n != preferred]
+    ext = os.path.splitext(file_path)[1].lower() if file_path else None
+    return [name for name in names
+            if importlib.util.find_spec(EXCEL_ENGINES[name][0]) is not None
+            and (ext not in EXTENSION_FORMATS or ext in EXCEL_ENGINES[name][2])]
+
+# pandas 在工作表不存在时抛出的 ValueError，例如 "Worksheet named 'x' not found"、"Worksheet index 3 is invalid, 2 worksheets found"
+MISSING_SHEET_PATTERN = re.compile(r"Worksheet (named '.*' not found|index -?\d+ is invalid)")
+
+def read_excel(file_path: str, sheet_name: Optional[Union[str, int]] = 0, header: Optional[int] = 0, nrows: Optional[int] = None, engine: Optional[str] = None) -> pd.DataFrame:
+    """
+    读取 Excel 文件，依次尝试已安装的引擎，前一个引擎失败时自动回退到下一个。
+
+    Args:
+        file_path (str): 文件路径。
+        sheet_name (Optional[Union[str, int]]): 工作表名或索引。
+        header (Optional[int]): 表头所在行，None 表示没有表头。
+        nrows (Optional[int]): 只读取表头之后的前 nrows 行，None 表示全部。
+        engine (Optional[str]): 指定引擎，None 表示按优先级自动选择。
+
+    Returns:
+        pd.DataFrame: 读取得到的 DataFrame。
+    """
+    engines = [engine] if engine else available_excel_engines(file_path)
+    if not engines:
+        raise ImportError(f"No Excel engine installed, install one of {list(EXCEL_ENGINES)}")
+    errors = []
+    for name in engines:
+        if name not in EXCEL_ENGINES:
+            raise ValueError(f"Unknown Excel engine '{name}', should be one of {list(EXCEL_ENGINES)}")
+        try:
+            return EXCEL_ENGINES[name][1](file_path, sheet_name=sheet_name, header=header, nrows=nrows)
+        except (KeyError, IndexError, FileNotFoundError):
+            raise  # 工作表或文件不存在，换引擎也无济于事
+        except ValueError as error:
+            if MISSING_SHEET_PATTERN.match(str(error)):
+                raise
+            errors.append(f"{name}: {error}")
+        except Exception as error:
+            errors.append(f"{name}: {error}")
+    raise ValueError(f"Failed to read Excel file '{file_path}': " + "; ".join(errors))
+
+def detect_file_format(file_path: str) -> FileFormat:
+    """
+    根据扩展名和文件头判断文件格式。
+
+    Args:
+        file_path (str): 文件路径。
+
+    Returns:
+        FileFormat: 'excel'、'csv'、'parquet'、'json' 或 'ndjson'。
+    """
+    file_format = EXTENSION_FORMATS.get(os.path.splitext(file_path)[1].lower())
+    if file_format == 'json':
+        # .json 文件也可能是每行一个对象的 NDJSON
+        return _sniff_json(file_path)
+    if file_format is not None:
+        return file_format
+
+    with open(file_path, 'rb') as f:
+        magic = f.read(8)
+    if magic.startswith(b'PK\x03\x04') or magic.startswith(b'\xd0\xcf\x11\xe0'):
+        return 'excel'
+    if magic.startswith(b'PAR1'):
+        return 'parquet'
+    if magic.lstrip()[:1] in (b'{', b'['):
+        return _sniff_json(file_path)
+    return 'csv'
+
+def _sniff_json(file_path: str) -> FileFormat:
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        first_line = f.readline().strip()
+    if not first_line.startswith('{'):
+        return 'json'
+    try:
+        json.loads(first_line)
+    except ValueError:
+        return 'json'  # 第一行不是完整的对象，说明是跨行的普通 JSON
+    return 'ndjson'
+
+def read_csv(file_path: str, header: Optional[int] = 0, nrows: Optional[int] = None) -> pd.DataFrame:
+    """
+    读取 CSV 文件，优先使用 pyarrow 多线程解析引擎，不可用时回退到默认 C 引擎。
+    编码依次尝试 UTF-8 和 GB18030。只读取前 nrows 行时直接使用 C 引擎（pyarrow 引擎不支持 nrows）。
+    """
+    sep = '\t' if file_path.lower().endswith('.tsv') else ','
+    for encoding in CSV_ENCODINGS:
+        if header is None:
+            # 无表头读取通常用于预览，标题行与数据行的字段数可能不同，按原始行读取并补齐
+            try:
+                return _read_csv_rows(file_path, sep=sep, encoding=encoding, nrows=nrows)
+            except UnicodeDecodeError:
+                continue
+        if nrows is None:
+            try:
+                return pd.read_csv(file_path, sep=sep, header=header, encoding=encoding, engine='pyarrow')
+            except (ImportError, ValueError):
+                pass  # pyarrow 未安装、不支持的参数或解码失败时交给 C 引擎处理
+        try:
+            # header 是原始行号（与预览和 pyarrow 引擎一致），C 引擎会跳过空行，需要减去表头之前的空行数
+            c_header = header - _count_blank_lines(file_path, sep=sep, encoding=encoding, nrows=header)
+            return pd.read_csv(file_path, sep=sep, header=c_header, encoding=encoding, nrows=nrows)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Unable to decode CSV file '{file_path}' with encodings {CSV_ENCODINGS}")
+
+def _read_csv_rows(file_path: str, sep: str, encoding: str, nrows: Optional[int] = None) -> pd.DataFrame:
+    with open(file_path, 'r', encoding=encoding, newline='') as f:
+        rows = list(itertools.islice(csv.reader(f, delimiter=sep), nrows))
+    width = max((len(row) for row in rows), default=0)
+    return pd.DataFrame([[value if value != '' else None for value in row] + [None] * (width - len(row)) for row in rows])
+
+def _count_blank_lines(file_path: str, sep: str, encoding: str, nrows: int) -> int:
+    """
+    统计前 nrows 个原始行中会被 C 引擎当作空行跳过的行数（空行或只含空白字符的行）。
+    """
+    if not nrows:
+        return 0
+    with open(file_path, 'r', encoding=encoding, newline='') as f:
+        rows = itertools.islice(csv.reader(f, delimiter=sep), nrows)
+        return sum(1 for row in rows if len(row) <= 1 and not ''.join(row).strip())
+
+def read_parquet(file_path: str) -> pd.DataFrame:
+    """
+    以内存映射方式读取 Parquet 文件。
+    """
+    return pd.read_parquet(file_path, engine='pyarrow', memory_map=True)
+
+def read_json(file_path: str, lines: bool = False, chunk_size: int = 100000) -> pd.DataFrame:
+    """
+    读取 JSON 文件；NDJSON 按 chunk_size 行分块流式解析后合并，避免一次性构造完整的 Python 对象列表。
+    """
+    if not lines:
+        return pd.read_json(file_path)
+    with pd.read_json(file_path, lines=True, chunksize=chunk_size) as reader:
+        chunks = list(reader)
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+def read_table(file_path: str, sheet_name: Optional[Union[str, int]] = 0, header: Optional[int] = 0, file_format: Optional[FileFormat] = None, nrows: Optional[int] = None) -> pd.DataFrame:
+    """
+    按文件格式选择对应的读取器，将文件读取为 DataFrame。
+
+    Args:
+        file_path (str): 文件路径。
+        sheet_name (Optional[Union[str, int]]): Excel 工作表名或索引，其他格式忽略。
+        header (Optional[int]): 表头所在行，Excel 和 CSV 有效，None 表示没有表头。
+        file_format (Optional[FileFormat]): 文件格式，None 表示自动检测。
+        nrows (Optional[int]): 只读取表头之后的前 nrows 行，Excel 和 CSV 有效，None 表示全部。
+
+    Returns:
+        pd.DataFrame: 读取得到的 DataFrame。
+    """
+    file_format = file_format or detect_file_format(file_path)
+    if file_format == 'excel':
+        return read_excel(file_path, sheet_name=sheet_name, header=header, nrows=nrows)
+    if file_format == 'csv':
+        return read_csv(file_path, header=header, nrows=nrows)
+    if file_format == 'parquet':
+        return read_parquet(file_path)
+    if file_format in ('json', 'ndjson'):
+        return read_json(file_path, lines=file_format == 'ndjson')
+    raise ValueError(f"Unsupported file format: {file_format}")
+
+XLSX_NS = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'pkg': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+DIMENSION_PATTERN = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]+)"')
+MERGE_CELL_PATTERN = re.compile(rb'<(?:\w+:)?mergeCell\s+ref="([^"]+)"')
+ROW_PATTERN = re.compile(rb'<(?:\w+:)?row\s[^>]*?\br="(\d+)"')
+SHEET_DATA_END = re.compile(rb'</(?:\w+:)?sheetData>|<(?:\w+:)?sheetData\s*/>')
+CELL_REF_PATTERN = re.compile(r'^\$?([A-Z]+)\$?(\d+)$')
+
+def _range_end(ref: str) -> tuple:
+    """
+    根据 'A1:AC120' 形式的区域计算右下角单元格的 (行号, 列号)，均从1开始。
+    """
+    from openpyxl.utils import column_index_from_string
+    end = ref.partition(':')[2] or ref
+    match = CELL_REF_PATTERN.match(end.upper())
+    if not match:
+        return None, None
+    return int(match.group(2)), column_index_from_string(match.group(1))
+
+def _scan_sheet_xml(stream, include_merged: bool, chunk_size: int = 1 << 20) -> tuple:
+    """
+    扫描工作表 XML 的原始字节：dimension 位于 sheetData 之前，只读文件头即可；
+    mergeCells 位于 sheetData 之后，需要流式跳过单元格数据，但不做任何 XML 解析。
+    部分写入器不生成 dimension，此时改为记录最后一个 <row r="N"> 的行号。
+    """
+    head = stream.read(64 * 1024)
+    match = DIMENSION_PATTERN.search(head)
+    dimension = match.group(1).decode() if match else None
+    if dimension is not None and not include_merged:
+        return dimension, None, None
+
+    buffer, tail, last_row = head, b'', None
+    while True:
+        rows = ROW_PATTERN.findall(buffer[max(buffer.rfind(b'row '), 8) - 8:])  # 只匹配块内最后一个行标签
+        if rows:
+            last_row = int(rows[-1])
+        end = SHEET_DATA_END.search(buffer)
+        if end:
+            tail = buffer[end.end():] + stream.read()
+            break
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            tail = buffer
+            break
+        buffer = buffer[-64:] + chunk  # 保留少量重叠，防止标签跨块
+    merged = [ref.decode() for ref in MERGE_CELL_PATTERN.findall(tail)] if include_merged else None
+    return dimension, merged, last_row
+
+def inspect_workbook(file_path: str, include_merged: bool = False) -> List[dict]:
+    """
+    只读取工作簿 XML 和工作表的 dimension、mergeCells 记录，获取各工作表的元数据，不解析单元格数据。
+
+    Args:
+        file_path (str): Excel 文件路径（.xlsx/.xlsm）；其他 Excel 格式只返回工作表名。
+        include_merged (bool): 是否扫描合并单元格区域。mergeCells 位于单元格数据之后，需要解压整个工作表，默认False。
+
+    Returns:
+        List[dict]: 每个工作表一个字典，包含 index、name、state、used_range、rows（最后一行的行号）、cols（最后一列的列号）、merged。
+    """
+    if not zipfile.is_zipfile(file_path):
+        sheet_names = pd.ExcelFile(file_path).sheet_names
+        return [{'index': i, 'name': name, 'state': 'visible', 'used_range': None, 'rows': None, 'cols': None, 'merged': None}
+                for i, name in enumerate(sheet_names)]
+
+    sheets = []
+    with zipfile.ZipFile(file_path) as zf:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+        targets = {}
+        for rel in rels.findall('pkg:Relationship', XLSX_NS):
+            target = rel.get('Target')
+            targets[rel.get('Id')] = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+
+        for index, sheet in enumerate(workbook.findall('main:sheets/main:sheet', XLSX_NS)):
+            info = {
+                'index': index,
+                'name': sheet.get('name'),
+                'state': sheet.get('state', 'visible'),
+                'used_range': None,
+                'rows': None,
+                'cols': None,
+                'merged': None,
+            }
+            member = targets.get(sheet.get(f"{{{XLSX_NS['rel']}}}id"))
+            if member and member in zf.NameToInfo and '/worksheets/' in f"/{member}":
+                with zf.open(member) as stream:
+                    dimension, merged, last_row = _scan_sheet_xml(stream, include_merged)
+                info['used_range'] = dimension
+                info['rows'], info['cols'] = _range_end(dimension) if dimension else (last_row, None)
+                info['merged'] = merged
+            sheets.append(info)
+    return sheets
+
+PREVIEW_ROWS = 50 # 预览缓存读取的行数，Excel Head 和表头检测只要不超过该行数都直接使用缓存
+
+PARSE_CACHE_SIZE = 128 # 解析缓存的最大条目数，超出时淘汰最久未使用的条目
+
+# 解析缓存：(绝对路径, 解析类型...) -> (文件签名, Future)，文件签名为 (mtime_ns, size)，文件变化后旧条目自动失效。
+# 同一条目正在解析时（如后台预取），其他线程等待同一个 Future，不会重复解析。
+_PARSE_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+_PARSE_LOCK = threading.Lock()
+
+def file_signature(file_path: str) -> Optional[tuple]:
+    """
+    返回文件的 (mtime_ns, size) 签名，文件不存在时为 None。
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def cached_parse(file_path: str, key: tuple, loader: Callable[[], Any]) -> Any:
+    """
+    以 (文件路径, key) 和文件签名缓存 loader 的解析结果，返回的对象由缓存共享，调用方不能修改。
+
+    Args:
+        file_path (str): 被解析的文件路径。
+        key (tuple): 区分同一文件不同解析结果的键，如 ('preview', 'Sheet1', 50)。
+        loader (Callable[[], Any]): 缓存未命中时执行的解析函数。
+
+    Returns:
+        Any: 解析结果。
+    """
+    path = os.path.abspath(file_path)
+    signature = file_signature(path)
+    if signature is None:
+        return loader() # 文件不存在，由 loader 抛出对应的错误
+    cache_key = (path, *key)
+    with _PARSE_LOCK:
+        cached = _PARSE_CACHE.get(cache_key)
+        owner = cached is None or cached[0] != signature
+        if owner:
+            future = Future()
+            _PARSE_CACHE[cache_key] = (signature, future)
+            while len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+                _PARSE_CACHE.popitem(last=False)
+        else:
+            future = cached[1]
+        _PARSE_CACHE.move_to_end(cache_key)
+    if owner:
+        try:
+            future.set_result(loader())
+        except BaseException as error:
+            future.set_exception(error)
+            with _PARSE_LOCK:
+                if _PARSE_CACHE.get(cache_key, (None, None))[1] is future:
+                    del _PARSE_CACHE[cache_key] # 解析失败不缓存
+    return future.result()
+
+def invalidate_parsed(file_path: Optional[str] = None) -> int:
+    """
+    删除文件的解析缓存，file_path 为 None 时清空全部缓存。
+
+    Returns:
+        int: 删除的条目数。
+    """
+    path = os.path.abspath(file_path) if file_path else None
+    with _PARSE_LOCK:
+        keys = [key for key in _PARSE_CACHE if path is None or key[0] == path]
+        for key in keys:
+            del _PARSE_CACHE[key]
+    return len(keys)
+
+def parsed_files() -> List[str]:
+    """
+    返回解析缓存中的文件路径。
+    """
+    with _PARSE_LOCK:
+        return list(dict.fromkeys(key[0] for key in _PARSE_CACHE))
+
+def cached_inspect_workbook(file_path: str, include_merged: bool = False) -> List[dict]:
+    """
+    带解析缓存的 inspect_workbook。
+    """
+    return cached_parse(file_path, ('inspect', include_merged), lambda: inspect_workbook(file_path, include_merged=include_merged))
+
+def read_preview(file_path: str, sheet_name: Optional[Union[str, int]] = 0, nrows: int = PREVIEW_ROWS, file_format: Optional[FileFormat] = None) -> pd.DataFrame:
+    """
+    不带表头读取文件的前 nrows 行，Excel 和 CSV 文件的前 PREVIEW_ROWS 行会被缓存，返回的 DataFrame 不能修改。
+
+    Args:
+        file_path (str): 文件路径。
+        sheet_name (Optional[Union[str, int]]): Excel 工作表名或索引，索引会转换为工作表名，与按名称读取共用缓存。
+        nrows (int): 读取的行数。
+        file_format (Optional[FileFormat]): 文件格式，None 表示自动检测。
+
+    Returns:
+        pd.DataFrame: 前 nrows 行原始数据。
+    """
+    file_format = file_format or detect_file_format(file_path)
+    if file_format not in ('excel', 'csv') or nrows > PREVIEW_ROWS:
+        return read_table(file_path, sheet_name=sheet_name, header=None, file_format=file_format, nrows=nrows).head(nrows)
+    if file_format == 'csv':
+        sheet_name = None
+    elif isinstance(sheet_name, int):
+        sheets = cached_inspect_workbook(file_path)
+        if 0 <= sheet_name < len(sheets):
+            sheet_name = sheets[sheet_name]['name']
+    preview = cached_parse(file_path, ('preview', sheet_name),
+                           lambda: read_table(file_path, sheet_name=sheet_name, header=None, file_format=file_format, nrows=PREVIEW_ROWS))
+    return preview.head(nrows)
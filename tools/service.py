@@ -1,17 +1,18 @@
 import io
 import os
 import json
-import shutil
 import pandas as pd
-from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.cell.cell import MergedCell
-from typing import Literal, Optional, Union, List
+from itertools import count
+from typing import Literal, Optional, Union, List, Any, Dict
 
 
 from tools.views import *
 from langchain.tools import tool
-from tools.utils import col_to_colidx
+from langchain_core.tools import ToolException
+from registry.utils import tool_effects
+from tools.utils import col_to_colidx, select_view, ChunkedDataFrame, detect_header_row, detect_footer_rows, query_dataframe, merge_dataframes
+from tools.reader import detect_file_format, read_table, read_preview, cached_inspect_workbook
+from tools.writer import EXCEL_EXTENSIONS, default_output_path, open_workbook, write_frame, save_workbook
 
 
 
@@ -25,6 +26,182 @@ from tools.utils import col_to_colidx
 # }
 DATAFRAME_REGISTRY = {}
 
+HEADER_PREVIEW_ROWS = 30 # 自动检测表头时读取的预览行数
+
+# 分块句柄注册表，结构与 DATAFRAME_REGISTRY 相同，'handle' 为 ChunkedDataFrame 对象
+CHUNKED_REGISTRY = {}
+
+VERSIONS = count(1) # 注册表条目的版本号，每次注册或写入时递增，用于工具结果缓存失效
+
+def resource_version(resource: str) -> Any:
+    """
+    返回资源的当前版本，供 Registry 缓存只读工具的结果。
+
+    Args:
+        resource (str): 资源键，如 'df:sales'、'chunked:ledger'、'file:/abs/path/a.xlsx'。
+
+    Returns:
+        Any: 可比较的版本标识，资源不存在时为 None。
+    """
+    kind, _, name = resource.partition(':')
+    if kind == 'df':
+        entry = DATAFRAME_REGISTRY.get(name)
+        if entry is None:
+            return None
+        if entry.get('view') is not None:
+            return entry.get('version'), resource_version(f"df:{entry['view']['parent']}")
+        return entry.get('version'), id(entry.get('dataframe'))
+    if kind == 'chunked':
+        entry = CHUNKED_REGISTRY.get(name)
+        return None if entry is None else (entry.get('version'), id(entry.get('handle')), resource_version(f"file:{entry.get('file_path')}"))
+    if kind == 'file':
+        try:
+            stat = os.stat(name)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    return None
+
+def resource_dependencies(resource: str) -> list[str]:
+    """
+    返回读取该资源时同时读取的资源：视图依赖其父表。
+    """
+    kind, _, name = resource.partition(':')
+    entry = DATAFRAME_REGISTRY.get(name) if kind == 'df' else None
+    if entry is not None and entry.get('view') is not None:
+        return [f"df:{entry['view']['parent']}"]
+    return []
+
+VIEW_CACHE = {} # 视图名称到 (版本, DataFrame) 的映射，父表或视图更新后重新解析
+
+def get_dataframe(df_name: str) -> Optional[pd.DataFrame]:
+    """
+    获取注册表中的 DataFrame，视图在首次访问时按父表解析，父表未变化时复用解析结果。
+
+    Args:
+        df_name (str): DataFrame 对象名称。
+
+    Returns:
+        Optional[pd.DataFrame]: DataFrame，未注册时为 None。
+    """
+    entry = DATAFRAME_REGISTRY.get(df_name)
+    if entry is None:
+        return None
+    view = entry.get('view')
+    if view is None:
+        return entry['dataframe']
+    version = resource_version(f"df:{df_name}")
+    cached = VIEW_CACHE.get(df_name)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    parent = get_dataframe(view['parent'])
+    if parent is None:
+        raise ValueError(f"parent DataFrame Object '{view['parent']}' of view '{df_name}' not found")
+    df = select_view(parent, rows=view.get('rows'), columns=view.get('columns'), filters=view.get('filters'))
+    VIEW_CACHE[df_name] = (version, df)
+    return df
+
+def register_view(view_name: str, parent: str, rows: Optional[List[Optional[int]]] = None, columns: Optional[List[Union[int, str]]] = None, filters: Optional[List[List[Any]]] = None, **info) -> pd.DataFrame:
+    """
+    将父表的行区间、列或过滤结果注册为视图，不复制数据；视图被写入时才复制（写时复制）。
+
+    从第0行开始、不过滤、不选列的视图与父表逐行对应，沿用父表的文件信息，否则 file_path 为 None。
+
+    Returns:
+        pd.DataFrame: 解析后的视图。
+    """
+    if view_name == parent:
+        raise ValueError("view_name should differ from the parent DataFrame name")
+    parent_info = DATAFRAME_REGISTRY[parent]
+    aligned = not filters and columns is None and (rows is None or not rows[0])
+    metadata = {k: parent_info.get(k) for k in ('file_path', 'sheet_name', 'origin_header_row', 'footer_rows') if k in parent_info} if aligned else {'file_path': None, 'sheet_name': None, 'origin_header_row': 0}
+    DATAFRAME_REGISTRY[view_name] = {
+        **metadata,
+        **info,
+        'dataframe': None,
+        'view': {'parent': parent, 'rows': rows, 'columns': columns, 'filters': filters},
+        'version': next(VERSIONS)
+    }
+    VIEW_CACHE.pop(view_name, None)
+    try:
+        return get_dataframe(view_name)
+    except Exception:
+        del DATAFRAME_REGISTRY[view_name]
+        raise
+
+def materialize_view(df_name: str) -> pd.DataFrame:
+    """
+    写时复制：将视图复制为独立的 DataFrame，之后与父表不再关联。
+    """
+    entry = DATAFRAME_REGISTRY[df_name]
+    if entry.get('view') is not None:
+        entry['dataframe'] = get_dataframe(df_name).copy()
+        entry.pop('view')
+        VIEW_CACHE.pop(df_name, None)
+    return entry['dataframe']
+
+def save_dataframes(names: List[str], output_path: Optional[str] = None, keep_backups: int = 1) -> str:
+    """
+    按目标文件分组保存 DataFrame，每个工作簿只加载、原子保存一次，保存成功后清除修改标记。
+    写入前检查所有分组，无法保存时不写入任何文件；某个工作簿写入失败时抛出 ToolException，错误信息包含已保存的工作簿。
+
+    Args:
+        names (List[str]): DataFrame 对象名称列表。
+        output_path (Optional[str]): 输出文件路径，None 表示在各自的源文件旁生成带时间戳的新文件。
+        keep_backups (int): 输出文件已存在时保留的备份数量。
+
+    Returns:
+        str: 保存结果说明。
+    """
+    groups, default_targets = {}, {}
+    for name in names:
+        file_path = DATAFRAME_REGISTRY[name]['file_path']
+        source = file_path if file_path and os.path.splitext(file_path)[1].lower() in EXCEL_EXTENSIONS else None # CSV 等非 Excel 源文件写入新的工作表
+        if output_path:
+            target = output_path
+        elif file_path:
+            target = default_targets.setdefault(file_path, default_output_path(file_path))
+        else:
+            raise ToolException(f"DataFrame '{name}' has no source file, provide output_path to save it.")
+        group = groups.setdefault(target, {'sources': set(), 'names': []})
+        if source:
+            group['sources'].add(source)
+        group['names'].append(name)
+
+    for target, group in groups.items(): # 写入任何文件之前检查所有分组
+        if len(group['sources']) > 1:
+            raise ToolException(f"DataFrames {group['names']} come from different workbooks {sorted(group['sources'])} and cannot be saved into one file '{target}'.")
+
+    lines = []
+    for target, group in groups.items():
+        source = next(iter(group['sources']), None)
+        try:
+            wb = open_workbook(source, target)
+            sheets = []
+            for name in group['names']:
+                df_info = DATAFRAME_REGISTRY[name]
+                df = get_dataframe(name)
+                if source and df_info['file_path'] == source:
+                    sheet_name = df_info['sheet_name']
+                    ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+                    header_row = df_info['origin_header_row']
+                else:
+                    if name in wb.sheetnames:
+                        wb.remove(wb[name])
+                    ws = wb.create_sheet(name)
+                    sheet_name, header_row = name, 0
+                write_frame(ws, df, header_row)
+                sheets.append(f"'{name}' -> sheet '{sheet_name}' (header row {header_row})")
+            backup = save_workbook(wb, target, keep_backups=keep_backups)
+        except Exception as e:
+            # 之前的分组已经写入磁盘，错误信息中保留它们的保存结果
+            raise ToolException("\n".join(lines + [f"Failed to write DataFrame to Excel file '{target}': {e}"])) from e
+        for name in group['names']:
+            DATAFRAME_REGISTRY[name]['dirty'] = False
+        backup_note = f", previous version backed up to '{backup}'" if backup else ""
+        lines.append(f"DataFrame {', '.join(sheets)} written to Excel file '{target}'{backup_note}.")
+    return "\n".join(lines)
+
 @tool('Done Tool', args_schema=Done)
 def done_tool(answer: str):
     """
@@ -38,33 +215,102 @@ def human_tool(question: str):
     A tool for human input.
     """
     if not question:
-        return "No question provided for human input."
+        raise ToolException("No question provided for human input.")
     answer = input(f"Human Input Required: {question}\nYour answer: ")
 
     return f"Human answer: {answer}"
 
+@tool_effects(reads=['file:file_path'], writes=['df:df_name'])
 @tool('Load DataFrame Tool', args_schema=LoadDataFrame)
-def load_dataframe_tool(df_name: str, file_path: str, sheet_name: Optional[Union[str, int]] = 0, origin_header_row: int = 0):
-    df = pd.read_excel(file_path, sheet_name=sheet_name, header=origin_header_row)
+def load_dataframe_tool(df_name: str, file_path: str, sheet_name: Optional[Union[str, int]] = 0, origin_header_row: Union[int, Literal['auto']] = 0, file_format: Optional[str] = None, trim_footer: bool = False):
+    file_format = file_format or detect_file_format(file_path)
+    if file_format != 'excel':
+        sheet_name = None
+    detected = ""
+    if file_format in ('parquet', 'json', 'ndjson'):
+        origin_header_row = 0
+    elif origin_header_row == 'auto':
+        preview = read_preview(file_path, sheet_name=sheet_name, nrows=HEADER_PREVIEW_ROWS, file_format=file_format)
+        origin_header_row = detect_header_row(preview)
+        detected = " (auto-detected)"
+    df = read_table(file_path, sheet_name=sheet_name, header=origin_header_row, file_format=file_format)
+    footer_rows = detect_footer_rows(df) if trim_footer else 0
+    if footer_rows:
+        df = df.iloc[:len(df) - footer_rows]
     DATAFRAME_REGISTRY[df_name] = {
         'dataframe': df, # DataFrame object
         'file_path': file_path, 
         'sheet_name': sheet_name,
-        'origin_header_row': origin_header_row
+        'origin_header_row': origin_header_row,
+        'footer_rows': footer_rows,
+        'version': next(VERSIONS)
     }
-    return f"DataFrame Object '{df_name}' Registered from file '{file_path}' with sheet '{sheet_name}', file path '{file_path}' and header row {origin_header_row}."
+    trimmed = f", {footer_rows} footer rows trimmed" if trim_footer else ""
+    return f"DataFrame Object '{df_name}' Registered from {file_format} file '{file_path}' with sheet '{sheet_name}', file path '{file_path}' and header row {origin_header_row}{detected}{trimmed}. {len(df)} rows, columns: {list(df.columns)}"
 
+@tool_effects(reads=['df:df_name'], writes=['df:result_df_name|df_name'])
+@tool('Trim Footer Tool', args_schema=TrimFooter)
+def trim_footer_tool(df_name: str, result_df_name: Optional[str] = None, max_footer_rows: int = 10):
+    """
+    A tool to find trailing total, footer and blank rows of a DataFrame and register the trimmed data.
+    """
+    if df_name not in DATAFRAME_REGISTRY:
+        raise ToolException(f"DataFrame Object '{df_name}' not found.")
+    df_info = DATAFRAME_REGISTRY[df_name]
+    df = get_dataframe(df_name)
+    footer_rows = detect_footer_rows(df, max_footer_rows=max_footer_rows)
+    if footer_rows == 0:
+        return f"No footer rows found in DataFrame '{df_name}' ({len(df)} rows)."
+    footer = df.tail(footer_rows).fillna("").values.tolist()
+    footer_total = df_info.get('footer_rows', 0) + footer_rows
+    if result_df_name and result_df_name != df_name:
+        register_view(result_df_name, df_name, rows=[0, len(df) - footer_rows], footer_rows=footer_total)
+    else:
+        result_df_name = df_name
+        trimmed = df.iloc[:len(df) - footer_rows]
+        DATAFRAME_REGISTRY[df_name] = {
+            **{k: v for k, v in df_info.items() if k != 'view'},
+            'dataframe': trimmed.copy() if df_info.get('view') is not None else trimmed, # 视图原地截取时复制为独立的 DataFrame
+            'footer_rows': footer_total,
+            'version': next(VERSIONS)
+        }
+        VIEW_CACHE.pop(df_name, None)
+    return f"Trimmed {footer_rows} footer rows (row {len(df) - footer_rows} to {len(df) - 1}) from DataFrame '{df_name}', registered as '{result_df_name}' with {len(df) - footer_rows} rows. Trimmed rows:\n{footer}"
+
+@tool_effects(reads=['file:file_path'])
 @tool('Excel Head Tool', args_schema=ExcelHead)
-def excel_head_tool(file_path: str, head: int):
+def excel_head_tool(file_path: str, head: int, sheet_name: Optional[Union[str, int]] = 0):
     """
     A tool to get the first few rows of an Excel file.
     Returns the first few rows as a  Matrix format string
     """
-    df = pd.read_excel(file_path, header=None)
+    df = read_preview(file_path, sheet_name=sheet_name, nrows=head, file_format='excel')
     df_head = df.head(head).fillna("")
     result = [f"Row {idx+1}: {list(row)}" for idx, row in zip(df_head.index, df_head.values)]
-    return f"The first {head} rows (including empty rows) from file '{file_path}':\n" + "\n".join(result)
+    return f"The first {head} rows (including empty rows) from file '{file_path}' sheet '{sheet_name}':\n" + "\n".join(result)
 
+@tool_effects(reads=['file:file_path'])
+@tool('Inspect Workbook Tool', args_schema=InspectWorkbook)
+def inspect_workbook_tool(file_path: str, include_merged: bool = False):
+    """
+    A tool to list the sheets of an Excel workbook with their used ranges and merged cells, without reading cell data.
+    """
+    sheets = cached_inspect_workbook(file_path, include_merged=include_merged)
+    lines = []
+    for sheet in sheets:
+        line = f"Sheet {sheet['index']}: '{sheet['name']}' ({sheet['state']})"
+        if sheet['used_range']:
+            line += f", used range {sheet['used_range']}"
+        if sheet['rows'] is not None:
+            line += f", last row {sheet['rows']}" + (f", last column {sheet['cols']}" if sheet['cols'] is not None else "")
+        if sheet['merged']:
+            shown = sheet['merged'][:20]
+            more = f" and {len(sheet['merged']) - len(shown)} more" if len(sheet['merged']) > len(shown) else ""
+            line += f", merged cells {shown}{more}"
+        lines.append(line)
+    return f"Workbook '{file_path}' has {len(sheets)} sheets:\n" + "\n".join(lines)
+
+@tool_effects(reads=['df:df_name'])
 @tool('Excel Info Tool', args_schema=ExcelInfo)
 def excel_info_tool(df_name: str):
     """
@@ -72,14 +318,14 @@ def excel_info_tool(df_name: str):
     """
     df_info = DATAFRAME_REGISTRY.get(df_name)
     if not df_info:
-        return f"DataFrame Object '{df_name}' not found."
+        raise ToolException(f"DataFrame Object '{df_name}' not found.")
 
     file_path = df_info['file_path']
     sheet_name = df_info['sheet_name']
     origin_header_row = df_info['origin_header_row']
 
     buffer = io.StringIO()
-    info = df_info['dataframe'].info(buf=buffer)
+    info = get_dataframe(df_name).info(buf=buffer)
     info_output = buffer.getvalue()
     buffer.close()
     info_str = f"DataFrame Object '{df_name}' Info:\n"
@@ -89,25 +335,26 @@ def excel_info_tool(df_name: str):
     info_str += f"Info of DataFrame:\n{info_output}\n"
     return info_str
 
+@tool_effects(reads=['df:df_name'])
 @tool('Read DataFrame Tool', args_schema=ReadDataFrame)
 def read_dataframe_tool(df_name: str, row: Optional[Union[int, List[int]]] = None, col: Optional[Union[int, str, List[Union[int, str]]]] = None):
     if df_name not in DATAFRAME_REGISTRY:
-        return f"DataFrame Object '{df_name}' not found."
-    df = DATAFRAME_REGISTRY[df_name]['dataframe']
+        raise ToolException(f"DataFrame Object '{df_name}' not found.")
+    df = get_dataframe(df_name)
     
     # 处理行参数
     rows = None
     if row is not None:
         if isinstance(row, int):
             if row < 0 or row >= len(df):
-                return f"Row index {row} out of range for DataFrame '{df_name}'."
+                raise ToolException(f"Row index {row} out of range for DataFrame '{df_name}'.")
             rows = [row]
         elif isinstance(row, list):
             if any(r < 0 or r >= len(df) for r in row):
-                return f"Row indices {row} out of range for DataFrame '{df_name}'."
+                raise ToolException(f"Row indices {row} out of range for DataFrame '{df_name}'.")
             rows = row
         else:
-            return "Invalid 'row' parameter type; must be int or list of ints."
+            raise ToolException("Invalid 'row' parameter type; must be int or list of ints.")
         
     # 处理列参数
     cols = None
@@ -115,17 +362,17 @@ def read_dataframe_tool(df_name: str, row: Optional[Union[int, List[int]]] = Non
         if isinstance(col, (int, str)):
             idx = col_to_colidx(df, col)
             if idx == -1:
-                return f"Column '{col}' not found in DataFrame '{df_name}'."
+                raise ToolException(f"Column '{col}' not found in DataFrame '{df_name}'.")
             cols = [idx]
         elif isinstance(col, list):
             cols = []
             for c in col:
                 idx = col_to_colidx(df, c)
                 if idx == -1:
-                    return f"Column '{c}' not found in DataFrame '{df_name}'."
+                    raise ToolException(f"Column '{c}' not found in DataFrame '{df_name}'.")
                 cols.append(idx)
         else:
-            return "Invalid 'col' parameter type; must be int, str or list of these."
+            raise ToolException("Invalid 'col' parameter type; must be int, str or list of these.")
 
 
     try:
@@ -137,14 +384,111 @@ def read_dataframe_tool(df_name: str, row: Optional[Union[int, List[int]]] = Non
         if rows is not None:
             df_selected = df_selected.iloc[rows, :]
 
-        matrix = df_selected.fillna("").values.tolist() # 将DataFrame转换为二维列表
+        matrix = df_selected.to_numpy(dtype=object, na_value="").tolist() # 将DataFrame转换为二维列表，空值替换为空字符串（只复制一次）
 
         return f"Reading DataFrame '{df_name}':\n{matrix}"
     except Exception as e:
-        return f"Error reading DataFrame '{df_name}': {str(e)}"
+        raise ToolException(f"Error reading DataFrame '{df_name}': {str(e)}") from e
     
     
     
+@tool_effects(reads=['df:df_name'], writes=['df:result_df_name'])
+@tool('Query DataFrame Tool', args_schema=QueryDataFrame)
+def query_dataframe_tool(df_name: str,
+                         filters: Optional[List[List[Any]]] = None,
+                         group_by: Optional[List[Union[int, str]]] = None,
+                         aggregations: Optional[Dict[str, Union[str, List[str]]]] = None,
+                         sort_by: Optional[str] = None,
+                         ascending: bool = False,
+                         max_rows: int = 50,
+                         result_df_name: Optional[str] = None):
+    """
+    A tool to filter, group and aggregate a DataFrame, returning only the aggregated result.
+    """
+    if df_name not in DATAFRAME_REGISTRY:
+        raise ToolException(f"DataFrame Object '{df_name}' not found.")
+    df = get_dataframe(df_name)
+    try:
+        result = query_dataframe(df, filters=filters, group_by=group_by, aggregations=aggregations, sort_by=sort_by, ascending=ascending)
+    except Exception as e:
+        raise ToolException(f"Error querying DataFrame '{df_name}': {str(e)}") from e
+
+    registered = ""
+    if result_df_name:
+        DATAFRAME_REGISTRY[result_df_name] = {
+            'dataframe': result,
+            'file_path': None,
+            'sheet_name': None,
+            'origin_header_row': 0,
+            'version': next(VERSIONS)
+        }
+        registered = f", registered as DataFrame Object '{result_df_name}'"
+    shown = result.head(max_rows)
+    matrix = [list(shown.columns)] + shown.astype(object).where(shown.notna(), "").values.tolist()
+    more = f" (first {max_rows} shown)" if len(result) > max_rows else ""
+    return f"Query on DataFrame '{df_name}' returned {len(result)} rows{registered}{more}:\n{matrix}"
+
+@tool_effects(reads=['df:left_df_name', 'df:right_df_name'], writes=['df:result_df_name'])
+@tool('Merge DataFrame Tool', args_schema=MergeDataFrame)
+def merge_dataframe_tool(left_df_name: str,
+                         right_df_name: str,
+                         left_on: List[Union[int, str]],
+                         result_df_name: str,
+                         right_on: Optional[List[Union[int, str]]] = None,
+                         how: Literal['left', 'inner', 'right', 'outer'] = 'left',
+                         columns: Optional[List[Union[int, str]]] = None,
+                         normalize_keys: bool = True):
+    """
+    A tool to join two DataFrames on key columns and register the result, reporting unmatched keys.
+    """
+    for name in (left_df_name, right_df_name):
+        if name not in DATAFRAME_REGISTRY:
+            raise ToolException(f"DataFrame Object '{name}' not found.")
+    left_info = DATAFRAME_REGISTRY[left_df_name]
+    try:
+        result, report = merge_dataframes(get_dataframe(left_df_name), get_dataframe(right_df_name),
+                                          left_on=left_on, right_on=right_on, how=how, columns=columns, normalize_keys=normalize_keys)
+    except Exception as e:
+        raise ToolException(f"Error merging DataFrame '{left_df_name}' with '{right_df_name}': {str(e)}") from e
+
+    # 左连接且没有行被复制时结果与左表逐行对应，沿用左表的文件信息以便写回
+    aligned = how == 'left' and report['result_rows'] == report['left_rows']
+    DATAFRAME_REGISTRY[result_df_name] = {
+        **({k: v for k, v in left_info.items() if k != 'view'} if aligned else {'file_path': None, 'sheet_name': None, 'origin_header_row': 0}),
+        'dataframe': result,
+        'dirty': aligned, # 与左表对应的查找结果带有新列，需要写回
+        'version': next(VERSIONS)
+    }
+    lines = [
+        f"Merged DataFrame '{left_df_name}' ({report['left_rows']} rows) with '{right_df_name}' ({report['right_rows']} rows) using {how} join on {left_on} = {right_on or left_on}.",
+        f"Registered as DataFrame Object '{result_df_name}' with {report['result_rows']} rows, columns: {list(result.columns)}" + (f", aligned with '{left_df_name}' (file path '{left_info['file_path']}')." if aligned else "."),
+        f"Matched left rows: {report['matched_left_rows']}.",
+        f"Unmatched left keys: {report['unmatched_left_keys']}" + (f", e.g. {report['unmatched_left_sample']}" if report['unmatched_left_keys'] else ""),
+        f"Unmatched right keys: {report['unmatched_right_keys']}" + (f", e.g. {report['unmatched_right_sample']}" if report['unmatched_right_keys'] else ""),
+    ]
+    if report['duplicate_right_keys']:
+        lines.append(f"Warning: {report['duplicate_right_keys']} duplicate keys in '{right_df_name}', matching left rows were repeated.")
+    return "\n".join(lines)
+
+@tool_effects(reads=['df:df_name'], writes=['df:view_name'])
+@tool('Create View Tool', args_schema=CreateView)
+def create_view_tool(df_name: str,
+                     view_name: str,
+                     rows: Optional[List[Optional[int]]] = None,
+                     columns: Optional[List[Union[int, str]]] = None,
+                     filters: Optional[List[List[Any]]] = None):
+    """
+    A tool to name a subset of a DataFrame as a view that shares memory with it, copying only when the view is written.
+    """
+    if df_name not in DATAFRAME_REGISTRY:
+        raise ToolException(f"DataFrame Object '{df_name}' not found.")
+    try:
+        view = register_view(view_name, df_name, rows=rows, columns=columns, filters=filters)
+    except Exception as e:
+        raise ToolException(f"Error creating view '{view_name}' on DataFrame '{df_name}': {str(e)}") from e
+    return f"View '{view_name}' on DataFrame '{df_name}' registered with {len(view)} rows, columns: {list(view.columns)}, file path '{DATAFRAME_REGISTRY[view_name]['file_path']}'."
+
+@tool_effects(reads=['df:df_name'], writes=['df:df_name'])
 @tool('Write DataFrame Tool', args_schema=WriteDataFrame)
 def write_dataframe_tool(df_name: str,
                          start_row: int = 0,
@@ -154,15 +498,15 @@ def write_dataframe_tool(df_name: str,
                          axis: Literal['row', 'column', 'matrix'] = None):
     
     if values is None:
-        return "No value provided for writing."
+        raise ToolException("No value provided for writing.")
 
     if axis not in ['row', 'column', 'matrix']:
-        return f"Invalid axis '{axis}'. Must be one of 'row', 'column', or 'matrix'."
+        raise ToolException(f"Invalid axis '{axis}'. Must be one of 'row', 'column', or 'matrix'.")
     
 
     if df_name not in DATAFRAME_REGISTRY:
-        return f"DataFrame Object '{df_name}' not found."
-    df = DATAFRAME_REGISTRY[df_name]['dataframe']
+        raise ToolException(f"DataFrame Object '{df_name}' not found.")
+    df = materialize_view(df_name) # 视图在写入前复制为独立的 DataFrame
     max_row, max_col = df.shape
 
     if start_col is None:
@@ -170,10 +514,10 @@ def write_dataframe_tool(df_name: str,
     else:
         col_idx = col_to_colidx(df, start_col) if isinstance(start_col, str) else start_col
     if not isinstance(col_idx, int) or col_idx < 0 or col_idx >= max_col:
-        return f"Invalid start_col: '{start_col}' resolved to index {col_idx}, which is out of range."
+        raise ToolException(f"Invalid start_col: '{start_col}' resolved to index {col_idx}, which is out of range.")
     
     if start_row < 0 or start_row >= max_row:
-        return f"Start row {start_row} is out of range."
+        raise ToolException(f"Start row {start_row} is out of range.")
     
     # 统一 values 为二维列表
     if not isinstance(values, list):
@@ -184,6 +528,8 @@ def write_dataframe_tool(df_name: str,
         elif axis == 'column':
             values = [[v] for v in values]
 
+    DATAFRAME_REGISTRY[df_name]['version'] = next(VERSIONS) # 写入（包括中途失败的部分写入）使缓存的读取结果失效
+    DATAFRAME_REGISTRY[df_name]['dirty'] = True # 有未保存的修改，由 Save Changes Tool 批量保存
     try:
         for i, row_vals in enumerate(values):
             for j, val in enumerate(row_vals):
@@ -197,67 +543,110 @@ def write_dataframe_tool(df_name: str,
                     r = start_row + i * step
                     c = col_idx + j * step
                 if r >= max_row or c >= max_col:
-                    return f"Writing out of bounds: row {r} or column {c} exceeds DataFrame dimensions ({max_row}, {max_col})."
+                    raise ToolException(f"Writing out of bounds: row {r} or column {c} exceeds DataFrame dimensions ({max_row}, {max_col}).")
                 # 类型兼容处理，避免 FutureWarning
                 if df.dtypes.iloc[c] != 'object':
                     df[df.columns[c]] = df[df.columns[c]].astype('object')
                 df.iat[r, c] = val
+    except ToolException:
+        raise
     except Exception as e:
-        return f"Error writing to DataFrame '{df_name}': {str(e)}"
+        raise ToolException(f"Error writing to DataFrame '{df_name}': {str(e)}") from e
         
     DATAFRAME_REGISTRY[df_name]['dataframe'] = df
     return f"DataFrame '{df_name}' updated with {len(values)} values, rows starting at row {start_row}, cols starting at col {start_col}, step {step}, axis '{axis}'."
 
 @tool('DataFrame to Excel Tool', args_schema=DataFrame2Excel)
-def dataframe2excel_tool(df_name: str):
+def dataframe2excel_tool(df_name: Union[str, List[str]], output_path: Optional[str] = None, keep_backups: int = 1):
     """
-    A tool to convert a DataFrame to an Excel file.
+    A tool to save DataFrames into Excel files, one load and atomic save per workbook.
     """
-    if df_name not in DATAFRAME_REGISTRY:
-        return f"DataFrame Object '{df_name}' not found."
-    df_info = DATAFRAME_REGISTRY[df_name]
-    df = df_info['dataframe']
-    file_path = df_info['file_path']
-    sheet_name = df_info['sheet_name']
-    origin_header_row = df_info['origin_header_row']
-
-    # Backup the original file if required
-    base, ext = os.path.splitext(file_path)
-    backup_path = base + datetime.now().strftime(".backup_%Y%m%d_%H%M%S") + ext
-    try:
-        shutil.copyfile(file_path, backup_path)
-    except Exception as e:
-        return f"Failed to backup the original file: {e}"
-    
-    
-    try:
-        wb = load_workbook(backup_path)
-        if isinstance(sheet_name, int):
-            ws = wb.worksheets[sheet_name]
-        else:
-            ws = wb[sheet_name]
-            
-        # Write headers
-        for col_idx, col_name in enumerate(df.columns, start=1):
-            cell = ws.cell(row=origin_header_row + 1, column=col_idx)
-            if isinstance(cell, MergedCell):
-                continue
-            cell.value = col_name
-
-        # Write data
-        for row_idx, row in enumerate(df.itertuples(index=False), start=origin_header_row + 2):
-            for col_idx, value in enumerate(row, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx)
-                if isinstance(cell, MergedCell):
-                    continue
-                cell.value = value
-
-        wb.save(backup_path)
-
-    except Exception as e:
-        return f"Failed to write DataFrame to Excel file: {e}"
-
-    return f"DataFrame '{df_name}' written to Excel file '{backup_path}' in sheet '{sheet_name}' with header row {origin_header_row}."
-
-
+    names = [df_name] if isinstance(df_name, str) else list(df_name)
+    missing = [name for name in names if name not in DATAFRAME_REGISTRY]
+    if missing:
+        raise ToolException(f"DataFrame Object '{missing[0]}' not found.")
+    return save_dataframes(names, output_path=output_path, keep_backups=keep_backups)
+
+@tool('Save Changes Tool', args_schema=SaveChanges)
+def save_changes_tool(in_place: bool = False, keep_backups: int = 1, df_names: Optional[List[str]] = None):
+    """
+    A tool to save all modified DataFrames back to their workbooks, opening and saving each workbook once.
+    """
+    names = [name for name, info in DATAFRAME_REGISTRY.items() if info.get('dirty') and (df_names is None or name in df_names)]
+    if not names:
+        return "No modified DataFrames to save."
+    unsaved = [name for name in names if not DATAFRAME_REGISTRY[name].get('file_path')]
+    names = [name for name in names if name not in unsaved]
+    lines = []
+    if in_place:
+        sources = {}
+        for name in names:
+            sources.setdefault(DATAFRAME_REGISTRY[name]['file_path'], []).append(name)
+        for source, group in sources.items():
+            try:
+                lines.append(save_dataframes(group, output_path=source, keep_backups=keep_backups))
+            except ToolException as e:
+                raise ToolException("\n".join(lines + [str(e)])) from e # 保留已保存的工作簿
+    elif names:
+        lines.append(save_dataframes(names, keep_backups=keep_backups))
+    if unsaved:
+        lines.append(f"Skipped {unsaved}: no source file, save them with `DataFrame to Excel Tool` and an output_path.")
+    return "\n".join(lines)
+
+@tool_effects(reads=['file:file_path'], writes=['chunked:df_name'])
+@tool('Load Chunked DataFrame Tool', args_schema=LoadChunkedDataFrame)
+def load_chunked_dataframe_tool(df_name: str, file_path: str, sheet_name: Optional[Union[str, int]] = 0, origin_header_row: int = 0, chunk_size: int = 50000, to_parquet: bool = False):
+    """
+    A tool to open a sheet larger than memory as a chunked DataFrame handle.
+    """
+    handle = ChunkedDataFrame(file_path, sheet_name=sheet_name, origin_header_row=origin_header_row, chunk_size=chunk_size)
+    if to_parquet:
+        handle.to_parquet()
+    CHUNKED_REGISTRY[df_name] = {
+        'handle': handle, # ChunkedDataFrame object
+        'file_path': file_path,
+        'sheet_name': sheet_name,
+        'origin_header_row': origin_header_row,
+        'version': next(VERSIONS)
+    }
+    storage = f"parquet file '{handle.parquet_path}'" if handle.parquet_path else "streaming read"
+    return f"Chunked DataFrame '{df_name}' Registered from file '{file_path}' with sheet '{sheet_name}' and header row {origin_header_row} ({storage}, chunk size {chunk_size}). Columns: {handle.columns}"
 
+@tool_effects(reads=['chunked:df_name'])
+@tool('Chunked Aggregate Tool', args_schema=ChunkedAggregate)
+def chunked_aggregate_tool(df_name: str, column: Union[int, str], agg: str, group_by: Optional[List[Union[int, str]]] = None, filters: Optional[List[List[Any]]] = None):
+    """
+    A tool to aggregate a chunked DataFrame without loading it into memory.
+    """
+    if df_name not in CHUNKED_REGISTRY:
+        raise ToolException(f"Chunked DataFrame '{df_name}' not found.")
+    handle = CHUNKED_REGISTRY[df_name]['handle']
+    result = handle.aggregate(column, agg, group_by=group_by, filters=filters)
+    if isinstance(result, pd.Series):
+        rows = [f"{key}: {value}" for key, value in result.items()]
+        return f"{agg} of column '{column}' in '{df_name}' grouped by {group_by} ({len(rows)} groups):\n" + "\n".join(rows)
+    return f"{agg} of column '{column}' in '{df_name}': {result}"
+
+@tool_effects(reads=['chunked:df_name'], writes=['df:result_df_name'])
+@tool('Chunked Filter Tool', args_schema=ChunkedFilter)
+def chunked_filter_tool(df_name: str, filters: List[List[Any]], columns: Optional[List[Union[int, str]]] = None, result_df_name: Optional[str] = None, max_rows: int = 1000):
+    """
+    A tool to filter a chunked DataFrame, materializing the result only when it is small.
+    """
+    if df_name not in CHUNKED_REGISTRY:
+        raise ToolException(f"Chunked DataFrame '{df_name}' not found.")
+    handle = CHUNKED_REGISTRY[df_name]['handle']
+    df, total = handle.filter(filters, columns=columns, max_rows=max_rows)
+    if df is None:
+        raise ToolException(f"{total} rows in '{df_name}' matched the filters, which exceeds max_rows {max_rows}; narrow the filters or aggregate instead.")
+    if result_df_name:
+        DATAFRAME_REGISTRY[result_df_name] = {
+            'dataframe': df,
+            'file_path': None,
+            'sheet_name': None,
+            'origin_header_row': 0,
+            'version': next(VERSIONS)
+        }
+        return f"{total} rows in '{df_name}' matched the filters, registered as DataFrame Object '{result_df_name}' with columns {list(df.columns)}."
+    preview = df.head(20).fillna("").values.tolist()
+    return f"{total} rows in '{df_name}' matched the filters, columns {list(df.columns)}, first {len(preview)} rows:\n{preview}"
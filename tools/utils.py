@@ -1,6 +1,10 @@
-from typing import List, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import os
+import re
+import numpy as np
 import pandas as pd
 
+from openpyxl import load_workbook
 from openpyxl.utils import column_index_from_string
 # 处理列索引，统一转为列索引
 def col_to_colidx(df: pd.DataFrame, col_param: Union[int, str]) -> int:
@@ -24,3 +28,481 @@ def col_to_colidx(df: pd.DataFrame, col_param: Union[int, str]) -> int:
     else:
         raise ValueError(f"invalid column parameter type: {type(col_param)}")
 
+
+CHUNK_AGGREGATIONS = ('sum', 'count', 'min', 'max', 'mean')
+FILTER_OPERATORS = ('==', '!=', '>', '>=', '<', '<=', 'in', 'not in', 'contains', 'isnull', 'notnull')
+
+# 根据过滤条件生成布尔掩码，条件格式为 [列, 运算符, 值]，多个条件之间为 AND 关系
+def apply_filters(df: pd.DataFrame, filters: Optional[List[List[Any]]]) -> pd.Series:
+    mask = pd.Series(True, index=df.index)
+    for condition in filters or []:
+        if not isinstance(condition, (list, tuple)) or len(condition) not in (2, 3):
+            raise ValueError(f"invalid filter condition: {condition}, should be [column, operator, value]")
+        col, op = condition[0], condition[1]
+        value = condition[2] if len(condition) == 3 else None
+        series = df.iloc[:, col_to_colidx(df, col)]
+        if op == '==':
+            mask &= series == value
+        elif op == '!=':
+            mask &= series != value
+        elif op == '>':
+            mask &= series > value
+        elif op == '>=':
+            mask &= series >= value
+        elif op == '<':
+            mask &= series < value
+        elif op == '<=':
+            mask &= series <= value
+        elif op == 'in':
+            mask &= series.isin(value if isinstance(value, list) else [value])
+        elif op == 'not in':
+            mask &= ~series.isin(value if isinstance(value, list) else [value])
+        elif op == 'contains':
+            mask &= series.astype(str).str.contains(str(value), regex=False, na=False)
+        elif op == 'isnull':
+            mask &= series.isna()
+        elif op == 'notnull':
+            mask &= series.notna()
+        else:
+            raise ValueError(f"invalid filter operator: {op}, should be one of {FILTER_OPERATORS}")
+    return mask
+
+# 按视图定义从父表中选取数据：先按行区间切片，再过滤，最后选列。行区间切片与父表共享内存，过滤和选列只复制选中的部分
+def select_view(df: pd.DataFrame,
+                rows: Optional[List[Optional[int]]] = None,
+                columns: Optional[List[Union[int, str]]] = None,
+                filters: Optional[List[List[Any]]] = None) -> pd.DataFrame:
+    if rows is not None:
+        if len(rows) != 2:
+            raise ValueError(f"invalid rows: {rows}, should be [start, stop]")
+        df = df.iloc[rows[0]:rows[1]]
+    if filters:
+        df = df[apply_filters(df, filters)]
+    if columns is not None:
+        df = df.iloc[:, [col_to_colidx(df, col) for col in columns]]
+    return df
+
+QUERY_AGGREGATIONS = ('sum', 'count', 'min', 'max', 'mean', 'median', 'nunique', 'std', 'first', 'last')
+
+# 在内存中的 DataFrame 上执行过滤、分组和聚合，只返回聚合后的结果，聚合列命名为 "列名_聚合方式"
+def query_dataframe(df: pd.DataFrame,
+                    filters: Optional[List[List[Any]]] = None,
+                    group_by: Optional[List[Union[int, str]]] = None,
+                    aggregations: Optional[Dict[Union[int, str], Union[str, List[str]]]] = None,
+                    sort_by: Optional[str] = None,
+                    ascending: bool = False) -> pd.DataFrame:
+    if filters:
+        df = df[apply_filters(df, filters)]
+    keys = [df.columns[col_to_colidx(df, col)] for col in group_by or []]
+
+    spec = {}
+    for col, aggs in (aggregations or {}).items():
+        if isinstance(col, str) and col.isdigit():
+            col = int(col) # JSON 对象的键只能是字符串
+        name = df.columns[col_to_colidx(df, col)]
+        for agg in aggs if isinstance(aggs, list) else [aggs]:
+            if agg not in QUERY_AGGREGATIONS:
+                raise ValueError(f"invalid aggregation: {agg}, should be one of {QUERY_AGGREGATIONS}")
+            numeric = agg in ('sum', 'mean', 'median', 'std')
+            spec[f"{name}_{agg}"] = (name, agg, numeric)
+
+    def values(frame: pd.DataFrame, name: Any, numeric: bool) -> pd.Series:
+        series = frame[name]
+        return pd.to_numeric(series, errors='coerce') if numeric and series.dtype == object else series
+
+    if not spec:
+        result = df.groupby(keys, dropna=False).size().rename('count').reset_index() if keys else pd.DataFrame({'count': [len(df)]})
+    elif keys:
+        frame = df[keys].copy()
+        for label, (name, agg, numeric) in spec.items():
+            frame[label] = values(df, name, numeric)
+        result = frame.groupby(keys, dropna=False).agg(**{label: (label, agg) for label, (_, agg, _) in spec.items()}).reset_index()
+    else:
+        result = pd.DataFrame({label: [values(df, name, numeric).agg(agg)] for label, (name, agg, numeric) in spec.items()})
+
+    if sort_by is not None:
+        if sort_by not in result.columns:
+            raise ValueError(f"invalid sort_by: {sort_by}, should be one of {list(result.columns)}")
+        result = result.sort_values(sort_by, ascending=ascending, kind='stable').reset_index(drop=True)
+    return result
+
+# 统一连接键的类型：Excel 中同一编号可能读成 1000、1000.0 或 ' 1000'，转为去除空白的字符串后再比较
+def normalize_key(series: pd.Series) -> pd.Series:
+    def convert(value: Any) -> Any:
+        if pd.isna(value):
+            return None
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
+    codes, uniques = pd.factorize(series) # 只转换不重复的值，空值的编码为 -1，对应末尾的 None
+    converted = np.array([convert(value) for value in uniques] + [None], dtype=object)
+    return pd.Series(converted[codes], index=series.index)
+
+# 按键连接两个 DataFrame（哈希连接），返回连接结果和匹配情况报告
+def merge_dataframes(left: pd.DataFrame,
+                     right: pd.DataFrame,
+                     left_on: List[Union[int, str]],
+                     right_on: Optional[List[Union[int, str]]] = None,
+                     how: str = 'left',
+                     columns: Optional[List[Union[int, str]]] = None,
+                     normalize_keys: bool = True,
+                     sample_size: int = 10) -> Tuple[pd.DataFrame, dict]:
+    right_on = right_on or left_on
+    if len(left_on) != len(right_on):
+        raise ValueError(f"left_on {left_on} and right_on {right_on} should have the same length")
+    left_keys = [left.columns[col_to_colidx(left, col)] for col in left_on]
+    right_keys = [right.columns[col_to_colidx(right, col)] for col in right_on]
+    right_columns = list(right.columns) if columns is None else [right.columns[col_to_colidx(right, col)] for col in columns]
+    right_columns = [col for col in right_columns if col not in right_keys]
+
+    left_values, right_values = [], []
+    for lk, rk in zip(left_keys, right_keys):
+        same_type = left[lk].dtype == right[rk].dtype and left[lk].dtype != object
+        left_values.append(normalize_key(left[lk]) if normalize_keys and not same_type else left[lk])
+        right_values.append(normalize_key(right[rk]) if normalize_keys and not same_type else right[rk])
+    left_index = pd.MultiIndex.from_arrays(left_values)
+    right_index = pd.MultiIndex.from_arrays(right_values)
+
+    temp_keys = [f"__key_{i}" for i in range(len(left_keys))]
+    right_part = right[right_keys + right_columns] if how in ('right', 'outer') else right[right_columns]
+    result = pd.merge(
+        left.assign(**dict(zip(temp_keys, left_values))),
+        right_part.assign(**dict(zip(temp_keys, right_values))),
+        on=temp_keys, how=how, suffixes=('', '_right'), sort=False,
+    ).drop(columns=temp_keys)
+
+    unmatched_left = left_index[~left_index.isin(right_index)].unique()
+    unmatched_right = right_index[~right_index.isin(left_index)].unique()
+    sample = lambda index: [keys[0] if len(keys) == 1 else list(keys) for keys in index[:sample_size]]
+    report = {
+        'left_rows': len(left),
+        'right_rows': len(right),
+        'result_rows': len(result),
+        'matched_left_rows': int(left_index.isin(right_index).sum()),
+        'unmatched_left_keys': len(unmatched_left),
+        'unmatched_left_sample': sample(unmatched_left),
+        'unmatched_right_keys': len(unmatched_right),
+        'unmatched_right_sample': sample(unmatched_right),
+        'duplicate_right_keys': int(right_index.duplicated().sum()),
+    }
+    return result, report
+
+class ChunkedDataFrame:
+    """
+    分块 DataFrame 句柄，用于处理无法一次性载入内存的大表。
+
+    数据不会整体读入内存，而是按 chunk_size 行分块迭代：Excel 通过 openpyxl 的 read_only 模式逐行读取，
+    也可以先调用 to_parquet 转换为列式文件，之后的迭代直接读取 Parquet 批次。峰值内存只与 chunk_size 有关。
+
+    Args:
+        file_path (str): 源文件路径。
+        sheet_name (Union[str, int]): 工作表名或索引，默认0。
+        origin_header_row (int): 原始表格中表头所在的行（0 表示第一行），默认0。
+        chunk_size (int): 每个分块的行数，默认50000。
+    """
+    def __init__(self, file_path: str, sheet_name: Union[str, int] = 0, origin_header_row: int = 0, chunk_size: int = 50000):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self.origin_header_row = origin_header_row
+        self.chunk_size = chunk_size
+        self.parquet_path = None
+        self.columns = self._read_header()
+
+    def _open_sheet(self):
+        wb = load_workbook(self.file_path, read_only=True, data_only=True)
+        ws = wb.worksheets[self.sheet_name] if isinstance(self.sheet_name, int) else wb[self.sheet_name]
+        return wb, ws
+
+    def _read_header(self) -> List[str]:
+        wb, ws = self._open_sheet()
+        try:
+            header = next(ws.iter_rows(min_row=self.origin_header_row + 1, max_row=self.origin_header_row + 1, values_only=True), ())
+        finally:
+            wb.close()
+        # 与 pd.read_excel 保持一致：空表头命名为 Unnamed: i，重复表头追加 .n 后缀
+        columns, seen = [], {}
+        for idx, name in enumerate(header):
+            name = f"Unnamed: {idx}" if name is None else str(name)
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            columns.append(name)
+        return columns
+
+    def resolve_column(self, col: Union[int, str]) -> str:
+        """
+        将列索引、列名或 Excel 列字母统一转换为列名。
+        """
+        return self.columns[col_to_colidx(pd.DataFrame(columns=self.columns), col)]
+
+    def iter_chunks(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        按块迭代数据，每次只在内存中保留一个分块。
+
+        Args:
+            columns (Optional[List[str]]): 只读取指定的列，None 表示全部列。
+
+        Returns:
+            Iterator[pd.DataFrame]: DataFrame 分块迭代器。
+        """
+        if self.parquet_path:
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(self.parquet_path)
+            for batch in parquet_file.iter_batches(batch_size=self.chunk_size, columns=columns):
+                yield batch.to_pandas()
+            return
+
+        wb, ws = self._open_sheet()
+        try:
+            width = len(self.columns)
+            rows = []
+            for row in ws.iter_rows(min_row=self.origin_header_row + 2, values_only=True):
+                rows.append(row[:width] + (None,) * (width - len(row)))
+                if len(rows) >= self.chunk_size:
+                    yield self._to_frame(rows, columns)
+                    rows = []
+            if rows:
+                yield self._to_frame(rows, columns)
+        finally:
+            wb.close()
+
+    def _to_frame(self, rows: List[tuple], columns: Optional[List[str]]) -> pd.DataFrame:
+        df = pd.DataFrame.from_records(rows, columns=self.columns)
+        return df[columns] if columns is not None else df
+
+    def to_parquet(self, parquet_path: Optional[str] = None) -> str:
+        """
+        逐块将源表转换为 Parquet 列式文件，之后的迭代将直接读取该文件。
+
+        数值列统一存储为 float64，其余列存储为字符串；若某个数值列在后续分块中出现非数值内容，则转换失败，
+        此时应继续直接从源文件流式读取。
+
+        Args:
+            parquet_path (Optional[str]): 输出路径，默认与源文件同目录同名，扩展名为 .parquet。
+
+        Returns:
+            str: Parquet 文件路径。
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parquet_path = parquet_path or os.path.splitext(self.file_path)[0] + '.parquet'
+        writer, schema = None, None
+        try:
+            for chunk in self.iter_chunks():
+                if schema is None:
+                    fields = []
+                    for name in self.columns:
+                        numeric = pd.api.types.is_numeric_dtype(chunk[name]) and not pd.api.types.is_bool_dtype(chunk[name])
+                        fields.append(pa.field(name, pa.float64() if numeric else pa.string()))
+                    schema = pa.schema(fields)
+                    writer = pq.ParquetWriter(parquet_path, schema)
+                for field in schema:
+                    column = chunk[field.name]
+                    if pa.types.is_floating(field.type):
+                        converted = pd.to_numeric(column, errors='coerce')
+                        if (converted.isna() & column.notna()).any():
+                            raise ValueError(f"column '{field.name}' contains non-numeric values, cannot convert to parquet")
+                        chunk[field.name] = converted.astype('float64')
+                    else:
+                        chunk[field.name] = column.astype(object).where(column.isna(), column.astype(str))
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        except Exception:
+            if writer is not None:
+                writer.close()
+                writer = None
+            if os.path.exists(parquet_path):
+                os.remove(parquet_path)
+            raise
+        finally:
+            if writer is not None:
+                writer.close()
+        self.parquet_path = parquet_path
+        return parquet_path
+
+    def aggregate(self, column: Union[int, str], agg: str, group_by: Optional[List[Union[int, str]]] = None, filters: Optional[List[List[Any]]] = None) -> Union[Any, pd.Series]:
+        """
+        流式聚合，逐块计算部分结果后再合并，内存占用与分组数量相关而与行数无关。
+
+        Args:
+            column (Union[int, str]): 需要聚合的列。
+            agg (str): 聚合方式，可选 'sum', 'count', 'min', 'max', 'mean'。
+            group_by (Optional[List[Union[int, str]]]): 分组列，None 表示不分组。
+            filters (Optional[List[List[Any]]]): 过滤条件，格式同 apply_filters。
+
+        Returns:
+            Union[Any, pd.Series]: 不分组时返回标量，分组时返回以分组键为索引的 Series。
+        """
+        if agg not in CHUNK_AGGREGATIONS:
+            raise ValueError(f"invalid aggregation: {agg}, should be one of {CHUNK_AGGREGATIONS}")
+        target = self.resolve_column(column)
+        keys = [self.resolve_column(c) for c in group_by or []]
+        partials = []
+        for chunk in self.iter_chunks():
+            if filters:
+                chunk = chunk[apply_filters(chunk, filters)]
+            values = pd.to_numeric(chunk[target], errors='coerce') if agg in ('sum', 'mean') else chunk[target]
+            frame = pd.DataFrame({'value': values})
+            for key in keys:
+                frame[key] = chunk[key]
+            parts = ('sum', 'count') if agg == 'mean' else (agg,)
+            if keys:
+                partials.append(frame.groupby(keys, dropna=False)['value'].agg(list(parts)))
+            else:
+                partials.append(frame['value'].agg(list(parts)).to_frame().T)
+
+        if not partials:
+            return pd.Series(dtype='float64') if keys else None
+        combined = pd.concat(partials)
+        if keys:
+            combined = combined.groupby(level=list(range(len(keys))), dropna=False)
+        if agg == 'mean':
+            totals = combined.sum()
+            result = totals['sum'] / totals['count']
+        elif agg == 'count':
+            result = combined.sum()['count']
+        else:
+            result = getattr(combined, agg)()[agg]
+        return result
+
+    def filter(self, filters: List[List[Any]], columns: Optional[List[Union[int, str]]] = None, max_rows: int = 1000) -> Tuple[Optional[pd.DataFrame], int]:
+        """
+        流式过滤，只在匹配行数不超过 max_rows 时物化结果。
+
+        Args:
+            filters (List[List[Any]]): 过滤条件，格式同 apply_filters。
+            columns (Optional[List[Union[int, str]]]): 结果中保留的列，None 表示全部列。
+            max_rows (int): 允许物化的最大行数，默认1000。
+
+        Returns:
+            Tuple[Optional[pd.DataFrame], int]: 匹配结果（超过 max_rows 时为 None）和匹配总行数。
+        """
+        selected = [self.resolve_column(c) for c in columns] if columns else None
+        matched, total = [], 0
+        for chunk in self.iter_chunks():
+            chunk = chunk[apply_filters(chunk, filters)]
+            total += len(chunk)
+            if total <= max_rows:
+                matched.append(chunk[selected] if selected else chunk)
+            else:
+                matched = None
+        if matched is None:
+            return None, total
+        if not matched:
+            return pd.DataFrame(columns=selected or self.columns), 0
+        return pd.concat(matched, ignore_index=True), total
+
+
+def _is_text(value: Any) -> bool:
+    if not isinstance(value, str):
+        return False
+    try:
+        float(value.replace(',', ''))
+        return False  # '1,234.5' 这类数字字符串视为数值
+    except ValueError:
+        return True
+
+# 在表格前若干行的预览中推断表头所在行
+def detect_header_row(preview: pd.DataFrame, lookahead: int = 5) -> int:
+    """
+    基于启发式规则在预览数据（header=None 读取）中推断表头所在的行。
+
+    评分依据：
+        - 填充度：非空单元格数量占预览中最宽行的比例，标题行、说明行通常较稀疏。
+        - 文本密度：表头几乎全是文本，数据行常含数值和日期。
+        - 唯一性：表头各列名称互不相同。
+        - 类型转换：表头的文本列在下方若干行中变为数值或日期。
+    只有一个非空单元格的行（通常是合并的标题行）不会被选为表头。得分相同时取靠前的行。
+
+    Args:
+        preview (pd.DataFrame): 以 header=None 读取的前若干行。
+        lookahead (int): 计算类型转换时向下查看的行数，默认5。
+
+    Returns:
+        int: 表头所在的行（0 表示第一行）。
+    """
+    values = preview.to_numpy(dtype=object)
+    if values.size == 0:
+        return 0
+    filled = ~pd.isna(values) & np.vectorize(lambda v: not (isinstance(v, str) and not v.strip()), otypes=[bool])(values)
+    text = filled & np.vectorize(_is_text, otypes=[bool])(values)
+    counts = filled.sum(axis=1)
+    widest = counts.max()
+    if widest == 0:
+        return 0
+
+    best_row, best_score = 0, float('-inf')
+    for i, count in enumerate(counts):
+        if count == 0 or (count == 1 and widest > 2):
+            continue
+        row_values = [str(v).strip() for v in values[i][filled[i]]]
+        score = 2 * count / widest + 2 * text[i].sum() / count + len(set(row_values)) / count
+        below = [r for r in range(i + 1, min(i + 1 + lookahead, len(values))) if counts[r] > 0]
+        if below and text[i].any():
+            cells = filled[below][:, text[i]]
+            if cells.any():
+                score += (cells & ~text[below][:, text[i]]).sum() / cells.sum()
+        if score > best_score:
+            best_row, best_score = i, score
+    return best_row
+
+
+FOOTER_KEYWORDS = re.compile(
+    r'^\s*(?:合\s*计|总\s*计|小\s*计|汇\s*总|共\s*计|total|grand\s+total|sub-?total|sum\b|制表|审核|复核|签字|备注|prepared\s+by|approved\s+by)',
+    re.IGNORECASE,
+)
+
+# 识别表格末尾的合计行、签字行和空行
+def detect_footer_rows(df: pd.DataFrame, max_footer_rows: int = 10) -> int:
+    """
+    从表格末尾向上识别需要去除的尾部行，所有判断均为整列向量化计算。
+
+    尾部行包括：
+        - 全空行。
+        - 以合计、总计、小计、Total、制表、审核等关键字开头的行。
+        - 数值单元格等于其上方所有行之和的行（没有关键字的合计行）。
+
+    Args:
+        df (pd.DataFrame): 需要检查的 DataFrame。
+        max_footer_rows (int): 最多识别的非空尾部行数，默认10。
+
+    Returns:
+        int: 末尾需要去除的行数。
+    """
+    if df.empty:
+        return 0
+    blank = df.isna().all(axis=1).to_numpy()
+
+    tail = df.tail(max_footer_rows + int(blank.sum()))
+    text = tail.select_dtypes(exclude='number').astype(str)
+    keyword = np.zeros(len(df), dtype=bool)
+    if not text.empty:
+        keyword[len(df) - len(tail):] = text.apply(lambda col: col.str.match(FOOTER_KEYWORDS)).any(axis=1).to_numpy()
+
+    numeric = df.apply(pd.to_numeric, errors='coerce')
+    numeric = numeric.loc[:, numeric.notna().any()]
+    sums = np.zeros(len(df), dtype=bool)
+    if not numeric.empty:
+        above = numeric.fillna(0).cumsum().shift(1)
+        matched = np.isclose(numeric, above, rtol=1e-9, atol=1e-6) & numeric.notna().to_numpy() & (numeric.to_numpy() != 0)
+        present = numeric.notna().sum(axis=1).to_numpy()
+        filled = df.notna().sum(axis=1).to_numpy()
+        # 合计行通常只填写金额列，比一般数据行稀疏，以此排除恰好等于累计和的普通数据行
+        sparse = filled < np.median(filled[~blank]) if (~blank).any() else filled == 0
+        sums = (matched.sum(axis=1) > 0) & (matched.sum(axis=1) * 2 >= present) & sparse
+        sums[0] = False
+
+    footer, count = 0, 0
+    for i in range(len(df) - 1, 0, -1):
+        if blank[i]:
+            footer += 1
+        elif (keyword[i] or sums[i]) and count < max_footer_rows:
+            footer += 1
+            count += 1
+        else:
+            break
+    return footer
@@ -1,5 +1,5 @@
 from pydantic import BaseModel,Field
-from typing import Literal, Optional, Union, List, Any
+from typing import Literal, Optional, Union, List, Any, Dict
 import pandas as pd
 
 class SharedBaseModel(BaseModel):
@@ -52,23 +52,55 @@ class LoadDataFrame(SharedBaseModel):
             - 指定加载后 DataFrame 在全局注册表中的名称，后续操作可通过该名称引用此数据对象。
         file_path (str):
             - 要加载的数据文件的完整路径，支持绝对路径或相对路径。
-            - 支持 Excel（.xlsx）、CSV 等常见格式。
+            - 支持 Excel（.xlsx/.xls）、CSV、Parquet、JSON 和 NDJSON（每行一个 JSON 对象）格式。
         sheet_name (Optional[Union[str, int]]):
             - Excel 文件时指定工作表名（如 'Sheet1'）或索引（0 表示第一个 sheet）。
-        origin_header_row (int):
+        origin_header_row (Union[int, Literal['auto']]):
             - 指定原始表格中哪一行为表头（0 表示第一行，1 表示第二行，以此类推）。
             - 该行内容将作为 DataFrame 的列名，表头行本身不会出现在数据部分。
+            - 设为 'auto' 时根据前30行的文本密度、类型变化和标题行自动推断表头行，无需先调用 Excel Head Tool。
+        file_format (Optional[Literal['excel', 'csv', 'parquet', 'json', 'ndjson']]):
+            - 文件格式，None 表示根据扩展名和文件头自动检测。
+        trim_footer (bool):
+            - 是否自动去除表格末尾的合计行、签字行和空行（如“最后一个非空行是总计行”）。
 
     注意事项：
         - 如果 origin_header_row 设置不正确，可能导致数据错位或表头识别异常。
         - sheet_name 仅对 Excel 文件有效，CSV 文件请勿设置。
+        - origin_header_row 仅对 Excel 和 CSV 文件有效，Parquet 和 JSON 文件自带列名。
         - df_name 必须唯一，否则会覆盖已注册的同名 DataFrame。
     """
     df_name: str = Field(..., description="The name of the DataFrame object to be created", examples=["my_dataframe"])
     file_path: str = Field(..., description="The path to the file to be loaded", examples=["/path/to/file.csv"])
     sheet_name: Optional[Union[str, int]] = Field(0, description="Sheet name or index (0 means the first sheet)", examples=["Sheet1", 0])
-    origin_header_row: int = Field(0, description="The row numbers used as headers in the original table, 0 means the first row", examples=[10])
+    origin_header_row: Union[int, Literal['auto']] = Field(0, description="The row numbers used as headers in the original table, 0 means the first row, 'auto' means detected from the first rows", examples=[10, "auto"])
+    file_format: Optional[Literal['excel', 'csv', 'parquet', 'json', 'ndjson']] = Field(None, description="The file format, None means detected from the file extension and content", examples=[None, "csv"])
+    trim_footer: bool = Field(False, description="Whether to drop trailing total, footer and blank rows", examples=[True])
+
+
+class TrimFooter(SharedBaseModel):
+    """
+    TrimFooter 是用于去除 DataFrame 末尾合计行、签字行和空行的参数模型。
+
+    用途：
+        - 在已加载的 DataFrame 中识别末尾的合计/总计行、制表审核等签字行和空行，并注册去除这些行之后的数据。
+        - 无需把整列数据读入上下文来寻找数据的结束位置。
 
+    字段说明：
+        df_name (str):
+            - 需要处理的 DataFrame 对象名称，必须是已注册（已加载）的 DataFrame。
+        result_df_name (Optional[str]):
+            - 去除尾部行后的数据注册的名称，None 表示替换原对象。
+        max_footer_rows (int):
+            - 最多识别的非空尾部行数。
+
+    注意事项：
+        - 合计行通过关键字（合计、总计、小计、Total 等）或“数值等于上方各行之和”识别。
+        - 去除的行不会从原 Excel 文件中删除，写回时保持原样。
+    """
+    df_name: str = Field(..., description="The name of the DataFrame object to trim", examples=["my_dataframe"])
+    result_df_name: Optional[str] = Field(None, description="The name to register the trimmed DataFrame under, None means replacing the original", examples=["my_dataframe_data"])
+    max_footer_rows: int = Field(10, description="The maximum number of non-blank footer rows to detect", examples=[10])
 
 class ExcelHead(SharedBaseModel):
     """
@@ -83,6 +115,8 @@ class ExcelHead(SharedBaseModel):
             - 需要读取的 Excel 文件的完整路径，支持绝对路径或相对路径。
         head (int):
             - 指定要返回的前几行数据的行数（从表格第一行开始计数）。
+        sheet_name (Optional[Union[str, int]]):
+            - 工作表名或索引（0 表示第一个 sheet），可先用 Inspect Workbook Tool 查看所有工作表。
 
     注意事项：
         - 只支持 Excel 文件（如 .xlsx），不支持 CSV 等其它格式。
@@ -90,6 +124,7 @@ class ExcelHead(SharedBaseModel):
     """
     file_path: str = Field(..., description="The path to the Excel file", examples=["/path/to/file.xlsx"])
     head: int = Field(..., description="The number of rows to return from the top of the DataFrame", examples=[10])
+    sheet_name: Optional[Union[str, int]] = Field(0, description="Sheet name or index (0 means the first sheet)", examples=["Sheet1", 0])
 
 class ExcelInfo(SharedBaseModel):
     """
@@ -181,13 +216,264 @@ class DataFrame2Excel(SharedBaseModel):
         - 常用于数据处理、分析后，将结果输出为标准 Excel 文件，便于后续查看、汇报或进一步处理。
 
     字段说明：
-        df_name (str):
-            - 需要导出的 DataFrame 对象名称，必须是已注册（已加载）的 DataFrame。
-            - 工具会根据该名称在全局注册表中查找对应的 DataFrame，并将其内容写入 Excel 文件。
+        df_name (Union[str, List[str]]):
+            - 需要导出的 DataFrame 对象名称或名称列表，必须是已注册（已加载）的 DataFrame。
+            - 写入同一个工作簿的多个 DataFrame 只加载、保存一次。
+        output_path (Optional[str]):
+            - 输出文件路径，可以是源文件本身（覆盖保存）；None 表示在源文件旁生成带时间戳的新文件，源文件保持不变。
+        keep_backups (int):
+            - 输出文件已存在时保留的备份数量（最新的 N 个），0 表示不备份，默认1。
 
     注意事项：
         - df_name 必须对应已加载并注册的 DataFrame，否则无法导出。
-        - 导出时会自动备份原 DataFrame 的数据，确保不会覆盖原有数据。
+        - 先写入临时文件再原子替换输出文件，写入失败不会损坏已有文件。
+        - 没有源 Excel 文件的 DataFrame（如查询、连接结果或 CSV 数据）需要提供 output_path，写入以 DataFrame 名称命名的工作表。
+    """
+    df_name: Union[str, List[str]] = Field(..., description="The name(s) of the DataFrame object(s) to be saved", examples=["my_dataframe", ["sales", "costs"]])
+    output_path: Optional[str] = Field(None, description="The Excel file to write, may be the source file itself; None means a new timestamped file next to the source", examples=["/path/to/output.xlsx"])
+    keep_backups: int = Field(1, description="How many backups of an existing output file to keep, 0 means no backup", examples=[1, 0])
+
+
+class SaveChanges(SharedBaseModel):
+    """
+    SaveChanges 是用于批量保存所有已修改 DataFrame 的参数模型。
+
+    用途：
+        - 修改了同一模板的多个工作表后一次性写回，每个工作簿只打开、保存一次，所有修改保存在同一个文件中。
+
+    字段说明：
+        in_place (bool):
+            - True 表示覆盖保存到各自的源文件（按 keep_backups 保留备份），False 表示在源文件旁生成带时间戳的新文件，默认 False。
+        keep_backups (int):
+            - 覆盖保存时保留的备份数量（最新的 N 个），0 表示不备份，默认1。
+        df_names (Optional[List[str]]):
+            - 只保存这些 DataFrame，None 表示保存全部已修改的 DataFrame。
+
+    注意事项：
+        - 经 `Write DataFrame Tool` 写入、或由 `Merge DataFrame Tool` 按左表逐行对应生成的 DataFrame 视为已修改，保存后清除修改标记。
+        - 没有源文件的 DataFrame 会被跳过，需要用 `DataFrame to Excel Tool` 指定 output_path 保存。
+    """
+    in_place: bool = Field(False, description="Whether to overwrite the source workbooks instead of writing new timestamped files", examples=[False, True])
+    keep_backups: int = Field(1, description="How many backups of an overwritten workbook to keep, 0 means no backup", examples=[1, 0])
+    df_names: Optional[List[str]] = Field(None, description="Only save these DataFrame objects, None means all modified ones", examples=[["sales", "costs"]])
+
+class LoadChunkedDataFrame(SharedBaseModel):
+    """
+    LoadChunkedDataFrame 是用于以分块方式打开超大表格的参数模型。
+
+    用途：
+        - 用于处理无法一次性载入内存的大型 Excel 表格（如全年台账），只创建分块句柄，不读取全部数据。
+        - 句柄注册到分块对象池，之后通过 Chunked Aggregate Tool、Chunked Filter Tool 流式计算。
+
+    字段说明：
+        df_name (str):
+            - 分块句柄在注册表中的名称。
+        file_path (str):
+            - 要打开的 Excel 文件完整路径。
+        sheet_name (Optional[Union[str, int]]):
+            - 工作表名或索引（0 表示第一个 sheet）。
+        origin_header_row (int):
+            - 原始表格中表头所在的行（0 表示第一行）。
+        chunk_size (int):
+            - 每次读入内存的行数，决定峰值内存。
+        to_parquet (bool):
+            - 是否先转换为 Parquet 列式文件，之后的多次计算会更快。
+
+    注意事项：
+        - 分块句柄不能用于 Read DataFrame Tool、Write DataFrame Tool 等需要完整 DataFrame 的工具。
+        - 小结果可通过 Chunked Filter Tool 物化为普通 DataFrame 对象。
+    """
+    df_name: str = Field(..., description="The name of the chunked DataFrame handle to be created", examples=["ledger"])
+    file_path: str = Field(..., description="The path to the Excel file to be opened", examples=["/path/to/file.xlsx"])
+    sheet_name: Optional[Union[str, int]] = Field(0, description="Sheet name or index (0 means the first sheet)", examples=["Sheet1", 0])
+    origin_header_row: int = Field(0, description="The row numbers used as headers in the original table, 0 means the first row", examples=[0])
+    chunk_size: int = Field(50000, description="The number of rows kept in memory at a time", examples=[50000])
+    to_parquet: bool = Field(False, description="Whether to convert the sheet to a parquet file first for faster repeated scans", examples=[False])
+
+class ChunkedAggregate(SharedBaseModel):
+    """
+    ChunkedAggregate 是用于对分块句柄进行流式聚合的参数模型。
+
+    用途：
+        - 在不载入整表的情况下计算某列的合计、计数、最小值、最大值、平均值，可按列分组、可附加过滤条件。
+
+    字段说明：
+        df_name (str):
+            - 已注册的分块句柄名称。
+        column (Union[int, str]):
+            - 需要聚合的列，可以是列索引、列名或 Excel 列字母。
+        agg (Literal['sum', 'count', 'min', 'max', 'mean']):
+            - 聚合方式。
+        group_by (Optional[List[Union[int, str]]]):
+            - 分组列列表，None 表示不分组。
+        filters (Optional[List[List[Any]]]):
+            - 过滤条件列表，每个条件为 [列, 运算符, 值]，多个条件为 AND 关系。
+            - 运算符支持 '==', '!=', '>', '>=', '<', '<=', 'in', 'not in', 'contains', 'isnull', 'notnull'。
+
+    注意事项：
+        - sum、mean 会将非数值内容视为空值。
     """
-    df_name: str = Field(..., description="The name of the DataFrame object to be converted", examples=["my_dataframe"])
+    df_name: str = Field(..., description="The name of the chunked DataFrame handle", examples=["ledger"])
+    column: Union[int, str] = Field(..., description="The column index, name or Excel letter to aggregate", examples=["AC", "Amount", 3])
+    agg: Literal['sum', 'count', 'min', 'max', 'mean'] = Field(..., description="The aggregation to compute", examples=["sum"])
+    group_by: Optional[List[Union[int, str]]] = Field(None, description="The columns to group by, None means no grouping", examples=[["Cost Center"]])
+    filters: Optional[List[List[Any]]] = Field(None, description="Filter conditions as [column, operator, value], combined with AND", examples=[[["Amount", ">", 0], ["Type", "in", ["DR", "CR"]]]])
 
+class ChunkedFilter(SharedBaseModel):
+    """
+    ChunkedFilter 是用于对分块句柄进行流式过滤的参数模型。
+
+    用途：
+        - 在不载入整表的情况下筛选出满足条件的行；匹配行数较少时物化为普通 DataFrame 对象并注册，供其他工具使用。
+
+    字段说明：
+        df_name (str):
+            - 已注册的分块句柄名称。
+        filters (List[List[Any]]):
+            - 过滤条件列表，格式同 ChunkedAggregate。
+        columns (Optional[List[Union[int, str]]]):
+            - 结果中保留的列，None 表示全部列。
+        result_df_name (Optional[str]):
+            - 物化结果注册的 DataFrame 名称，None 表示只返回预览不注册。
+        max_rows (int):
+            - 允许物化的最大行数，超过时只返回匹配行数。
+
+    注意事项：
+        - 物化得到的 DataFrame 没有对应的源文件位置，不能直接用 DataFrame to Excel Tool 写回原表。
+    """
+    df_name: str = Field(..., description="The name of the chunked DataFrame handle", examples=["ledger"])
+    filters: List[List[Any]] = Field(..., description="Filter conditions as [column, operator, value], combined with AND", examples=[[["Amount", ">", 10000]]])
+    columns: Optional[List[Union[int, str]]] = Field(None, description="The columns to keep in the result, None means all columns", examples=[["A", "Amount"]])
+    result_df_name: Optional[str] = Field(None, description="The name to register the materialized result under, None means preview only", examples=["large_items"])
+    max_rows: int = Field(1000, description="The maximum number of matched rows to materialize", examples=[1000])
+
+class InspectWorkbook(SharedBaseModel):
+    """
+    InspectWorkbook 是用于快速查看 Excel 工作簿结构的参数模型。
+
+    用途：
+        - 在加载数据前列出工作簿中的所有工作表及其状态（可见/隐藏）、已用区域、最后一行和最后一列的位置和合并单元格区域。
+        - 只读取工作簿元数据，不解析单元格数据，即使是超大文件也能很快返回。
+
+    字段说明：
+        file_path (str):
+            - 需要查看的 Excel 文件的完整路径。
+        include_merged (bool):
+            - 是否列出合并单元格区域（如标题行），默认不列出。合并单元格记录位于单元格数据之后，开启后需要扫描整个工作表，超大文件会明显变慢。
+
+    注意事项：
+        - 已用区域来自文件中记录的 dimension 信息，部分工具生成的文件可能缺失，此时只返回最后一行的行号。
+        - 旧版 .xls 文件只返回工作表名。
+    """
+    file_path: str = Field(..., description="The path to the Excel file", examples=["/path/to/file.xlsx"])
+    include_merged: bool = Field(False, description="Whether to list merged cell ranges (scans the whole sheet, slower on large files)", examples=[False])
+
+class QueryDataFrame(SharedBaseModel):
+    """
+    QueryDataFrame 是用于在已注册的 DataFrame 上执行过滤、分组和聚合的参数模型。
+
+    用途：
+        - 在进程内完成筛选、求和、计数等计算，只返回聚合结果，不需要把原始行读入上下文。
+
+    字段说明：
+        df_name (str):
+            - 已注册的 DataFrame 对象名称。
+        filters (Optional[List[List[Any]]]):
+            - 过滤条件列表，每个条件为 [列, 运算符, 值]，多个条件为 AND 关系。
+            - 运算符支持 '==', '!=', '>', '>=', '<', '<=', 'in', 'not in', 'contains', 'isnull', 'notnull'。
+        group_by (Optional[List[Union[int, str]]]):
+            - 分组列列表，None 表示不分组。
+        aggregations (Optional[Dict[str, Union[str, List[str]]]]):
+            - 聚合列到聚合方式的映射，列可以是列名或 Excel 列字母，如 {"Amount": ["sum", "mean"], "Document": "count"}。
+            - 聚合方式支持 'sum', 'count', 'min', 'max', 'mean', 'median', 'nunique', 'std', 'first', 'last'。
+            - None 表示只统计（分组后的）行数。
+        sort_by (Optional[str]):
+            - 结果的排序列，如 "Amount_sum"，None 表示不排序。
+        ascending (bool):
+            - 是否升序，默认 False（降序）。
+        max_rows (int):
+            - 返回的最大结果行数。
+        result_df_name (Optional[str]):
+            - 将完整聚合结果注册为新的 DataFrame 对象的名称，None 表示不注册。
+
+    注意事项：
+        - 聚合结果列命名为 "列名_聚合方式"，如 "Amount_sum"；不聚合时为 "count"。
+        - sum、mean、median、std 会将非数值内容视为空值。
+    """
+    df_name: str = Field(..., description="The name of the DataFrame object to query", examples=["my_dataframe"])
+    filters: Optional[List[List[Any]]] = Field(None, description="Filter conditions as [column, operator, value], combined with AND", examples=[[["Amount", ">", 0], ["Type", "in", ["DR", "CR"]]]])
+    group_by: Optional[List[Union[int, str]]] = Field(None, description="The columns to group by, None means no grouping", examples=[["Cost Center"]])
+    aggregations: Optional[Dict[str, Union[str, List[str]]]] = Field(None, description="Mapping of column name or Excel letter to aggregation(s), None means counting rows", examples=[{"Amount": ["sum", "mean"], "Document": "count"}])
+    sort_by: Optional[str] = Field(None, description="The result column to sort by, e.g. 'Amount_sum'", examples=["Amount_sum"])
+    ascending: bool = Field(False, description="Whether to sort ascending", examples=[False])
+    max_rows: int = Field(50, description="The maximum number of result rows to return", examples=[50])
+    result_df_name: Optional[str] = Field(None, description="The name to register the full result under, None means not registering", examples=["amount_by_center"])
+
+class MergeDataFrame(SharedBaseModel):
+    """
+    MergeDataFrame 是用于按键连接两个已注册 DataFrame 的参数模型。
+
+    用途：
+        - 对账、核对两张表的对应行，或按主数据表查找补充信息（如成本中心对应的利润中心，类似 VLOOKUP）。
+
+    字段说明：
+        left_df_name (str):
+            - 左表（主表）的 DataFrame 对象名称。
+        right_df_name (str):
+            - 右表（查找表）的 DataFrame 对象名称。
+        left_on (List[Union[int, str]]):
+            - 左表的连接键列，可以是列索引、列名或 Excel 列字母。
+        right_on (Optional[List[Union[int, str]]]):
+            - 右表的连接键列，与 left_on 一一对应，None 表示与 left_on 相同。
+        how (Literal['left', 'inner', 'right', 'outer']):
+            - 连接方式，默认 'left'（保留左表所有行）。
+        columns (Optional[List[Union[int, str]]]):
+            - 需要从右表带入的列，None 表示全部列。
+        result_df_name (str):
+            - 连接结果注册的 DataFrame 对象名称。
+        normalize_keys (bool):
+            - 是否将类型不同的键统一为去除空白的字符串后再匹配（如 1000 与 '1000'），默认 True。
+
+    注意事项：
+        - 返回行数和两侧未匹配键的数量及示例；右表键重复时左表的行会被复制，结果中会提示重复键数量。
+        - 与左表列名重复的右表列会加上 '_right' 后缀。
+        - 'left' 连接且右表键不重复时，结果与左表逐行对应，沿用左表的文件信息，可以用 `DataFrame to Excel Tool` 写回左表所在的文件。
+    """
+    left_df_name: str = Field(..., description="The name of the left (main) DataFrame object", examples=["ledger"])
+    right_df_name: str = Field(..., description="The name of the right (lookup) DataFrame object", examples=["cost_centers"])
+    left_on: List[Union[int, str]] = Field(..., description="The key columns of the left DataFrame", examples=[["Cost Center"]])
+    right_on: Optional[List[Union[int, str]]] = Field(None, description="The key columns of the right DataFrame, None means the same as left_on", examples=[["CC"]])
+    how: Literal['left', 'inner', 'right', 'outer'] = Field('left', description="The type of join", examples=["left"])
+    columns: Optional[List[Union[int, str]]] = Field(None, description="The columns to take from the right DataFrame, None means all columns", examples=[["Profit Center"]])
+    result_df_name: str = Field(..., description="The name to register the joined DataFrame under", examples=["ledger_with_pc"])
+    normalize_keys: bool = Field(True, description="Whether to compare keys of different types as stripped strings", examples=[True])
+
+class CreateView(SharedBaseModel):
+    """
+    CreateView 是用于将已注册 DataFrame 的一部分命名为视图的参数模型。
+
+    用途：
+        - 给行区间、列或过滤结果起名，之后像普通 DataFrame 对象一样读取、查询，不需要从磁盘重新加载。
+
+    字段说明：
+        df_name (str):
+            - 父 DataFrame 对象名称。
+        view_name (str):
+            - 视图名称，不能与父 DataFrame 相同。
+        rows (Optional[List[Optional[int]]]):
+            - 行区间 [start, stop]（不含 stop），null 表示到开头或末尾，None 表示全部行。
+        columns (Optional[List[Union[int, str]]]):
+            - 列列表，可以是列索引、列名或 Excel 列字母，None 表示全部列。
+        filters (Optional[List[List[Any]]]):
+            - 过滤条件列表，每个条件为 [列, 运算符, 值]，多个条件为 AND 关系。
+
+    注意事项：
+        - 行区间与父表共享内存，不复制数据；过滤条件和选列只复制选中的部分。
+        - 视图随父表更新；写入视图时先复制为独立的 DataFrame，不会修改父表。
+        - 从第0行开始、不过滤、不选列的视图沿用父表的文件信息。
+    """
+    df_name: str = Field(..., description="The name of the parent DataFrame object", examples=["ledger"])
+    view_name: str = Field(..., description="The name of the view to register", examples=["ledger_q1"])
+    rows: Optional[List[Optional[int]]] = Field(None, description="The row range [start, stop) to keep, None means all rows", examples=[[0, 1000], [100, None]])
+    columns: Optional[List[Union[int, str]]] = Field(None, description="The columns to keep, None means all columns", examples=[["A", "Amount"]])
+    filters: Optional[List[List[Any]]] = Field(None, description="Filter conditions as [column, operator, value], combined with AND", examples=[[["Amount", ">", 0]]])
@@ -0,0 +1,112 @@
+import os
+import glob
+import shutil
+import tempfile
+import pandas as pd
+from datetime import datetime
+from typing import Optional
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell.cell import MergedCell
+from openpyxl.worksheet.worksheet import Worksheet
+
+BACKUP_FORMAT = ".bak_%Y%m%d_%H%M%S_%f" # 与默认导出文件名 .backup_%Y%m%d_%H%M%S 区分，清理备份时不会删除导出结果
+OUTPUT_FORMAT = ".backup_%Y%m%d_%H%M%S"
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+def backup_path(file_path: str, now: Optional[datetime] = None) -> str:
+    """
+    生成带时间戳的备份文件路径，如 report.bak_20240101_120000_000000.xlsx。
+    """
+    base, ext = os.path.splitext(file_path)
+    return base + (now or datetime.now()).strftime(BACKUP_FORMAT) + ext
+
+def list_backups(file_path: str) -> list[str]:
+    """
+    按时间从旧到新列出文件的备份。
+    """
+    base, ext = os.path.splitext(file_path)
+    return sorted(glob.glob(glob.escape(base) + ".bak_*" + glob.escape(ext)))
+
+def prune_backups(file_path: str, keep: int) -> list[str]:
+    """
+    只保留最新的 keep 个备份，返回被删除的备份路径。
+    """
+    backups = list_backups(file_path)
+    removed = backups[:max(len(backups) - keep, 0)]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+def default_output_path(source_path: str) -> str:
+    """
+    未指定输出路径时的导出路径：源文件旁带时间戳的新文件，非 Excel 源文件导出为 .xlsx。
+    """
+    base, ext = os.path.splitext(source_path)
+    return base + datetime.now().strftime(OUTPUT_FORMAT) + (ext if ext.lower() in EXCEL_EXTENSIONS else '.xlsx')
+
+def make_backup(file_path: str) -> str:
+    """
+    为文件创建备份：优先使用硬链接（不复制数据），文件系统不支持时再复制。
+    """
+    path = backup_path(file_path)
+    try:
+        os.link(file_path, path)
+    except OSError:
+        shutil.copy2(file_path, path)
+    return path
+
+def save_workbook(wb: Workbook, file_path: str, keep_backups: int = 0) -> Optional[str]:
+    """
+    原子保存工作簿：先写入同目录下的临时文件，再用 os.replace 替换目标文件，写入失败不会损坏已有文件。
+
+    Args:
+        wb (Workbook): 要保存的工作簿。
+        file_path (str): 目标路径。
+        keep_backups (int): 目标文件已存在时保留的备份数量，0 表示不备份。
+
+    Returns:
+        Optional[str]: 本次创建的备份路径，未备份时为 None。
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix=os.path.splitext(file_path)[1])
+    os.close(fd)
+    try:
+        wb.save(tmp_path)
+        backup = make_backup(file_path) if keep_backups > 0 and os.path.exists(file_path) else None
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if keep_backups > 0:
+        prune_backups(file_path, keep_backups)
+    return backup
+
+def open_workbook(source_path: Optional[str], output_path: str) -> Workbook:
+    """
+    打开要写入的工作簿：有源文件时加载源文件，否则加载已存在的输出文件或新建工作簿。
+    """
+    if source_path:
+        return load_workbook(source_path, keep_vba=source_path.lower().endswith('.xlsm'))
+    if os.path.exists(output_path):
+        return load_workbook(output_path)
+    wb = Workbook()
+    wb.remove(wb.active)
+    return wb
+
+def write_frame(ws: Worksheet, df: pd.DataFrame, origin_header_row: int = 0):
+    """
+    将 DataFrame 的表头和数据写入工作表，表头写在第 origin_header_row + 1 行，合并单元格跳过，空值写为空单元格。
+    """
+    for col_idx, col_name in enumerate(df.columns, start=1):
+        cell = ws.cell(row=origin_header_row + 1, column=col_idx)
+        if not isinstance(cell, MergedCell):
+            cell.value = col_name
+
+    values = df.to_numpy(dtype=object, na_value=None)
+    for row_idx, row in enumerate(values, start=origin_header_row + 2):
+        for col_idx, value in enumerate(row, start=1):
+            cell = ws.cell(row=row_idx, column=col_idx)
+            if not isinstance(cell, MergedCell):
+                cell.value = value
@@ -0,0 +1,9 @@
+from workflow.service import WorkflowRecorder, WorkflowRunner
+from workflow.views import Workflow, WorkflowStep
+
+__all__=[
+    'WorkflowRecorder',
+    'WorkflowRunner',
+    'Workflow',
+    'WorkflowStep'
+]
@@ -0,0 +1,193 @@
+import os
+from datetime import datetime
+from termcolor import colored
+from typing import Any, Optional
+import logging
+
+from agent.views import AgentResult
+from agent.utils import AgentContext
+from registry.service import Registry
+from registry.views import ToolResult
+from workflow.views import Workflow, WorkflowStep, substitute
+from tools.service import get_dataframe
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(message)s')
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+PATH_PARAMS = {'file_path', 'output_path'} # 录制时提取为工作流参数的文件路径参数
+SKIP_TOOLS = {'Done Tool', 'Human Tool'} # 不录制的工具：最终回答和人工交互无法脱离 LLM 回放
+# 取值来自数据的参数：由表达式给出时回放前重新求值；模型直接写出的字面量来自录制时读取的数据，换了输入文件后原样回放会写入过期的数据，这类步骤只录制、不回放
+DATA_PARAMS = {
+    'Write DataFrame Tool': {'values'},
+    'Create View Tool': {'rows'},
+}
+
+class WorkflowRecorder:
+    """
+    工作流录制器，记录代理执行成功的工具调用（名称、解析后的参数和解析前的动态表达式），生成参数化工作流。
+
+    文件路径参数（file_path、output_path）的每个不同取值会提取为一个工作流参数（file_1、file_2 ...），查询中出现的路径同样替换为参数，
+    回放时可以替换为新的输入文件。动态表达式在回放时重新求值；来自数据的参数以字面量给出时无法重新求值，这类步骤标记为不可回放（见 DATA_PARAMS）。
+
+    Args:
+        path (Optional[str]): 运行成功后工作流的保存路径，None 表示不自动保存。
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.steps: list[WorkflowStep] = []
+
+    def record(self, name: str, params: dict, tool_result: ToolResult, expressions: Optional[dict] = None):
+        """
+        记录一次工具调用，失败的调用和不可回放的工具不会被记录。
+
+        Args:
+            name (str): 工具名称。
+            params (dict): 解析后的参数。
+            tool_result (ToolResult): 执行结果。
+            expressions (Optional[dict]): 解析前的动态表达式，回放时在新的数据上重新求值。
+        """
+        if not tool_result.is_success or name in SKIP_TOOLS:
+            return
+        expressions = dict(expressions or {})
+        literals = [key for key in DATA_PARAMS.get(name, ()) if params.get(key) is not None and key not in expressions]
+        self.steps.append(WorkflowStep(name=name, params=dict(params), expressions=expressions, replayable=not literals))
+
+    def reset(self):
+        self.steps = []
+
+    def to_workflow(self, query: Optional[str] = None, file_path: Optional[str] = None) -> Workflow:
+        """
+        将录制的步骤转换为参数化工作流。
+
+        Args:
+            query (Optional[str]): 用户查询。
+            file_path (Optional[str]): 代理的工作目录。
+
+        Returns:
+            Workflow: 参数化工作流。
+        """
+        parameters, names = {}, {}
+        steps = []
+        for step in self.steps:
+            params = {}
+            for key, value in step.params.items():
+                if key in PATH_PARAMS and isinstance(value, str):
+                    if value not in names:
+                        names[value] = f"file_{len(names) + 1}"
+                        parameters[names[value]] = value
+                    value = f"${{{names[value]}}}"
+                params[key] = value
+            steps.append(WorkflowStep(name=step.name, params=params, expressions=step.expressions, replayable=step.replayable))
+        for value in sorted(names, key=len, reverse=True): # 先替换较长的路径，避免替换其中包含的较短路径
+            if query:
+                query = query.replace(value, f"${{{names[value]}}}")
+        return Workflow(query=query, file_path=file_path, parameters=parameters, steps=steps, created_at=datetime.now().isoformat())
+
+    def finish(self, query: Optional[str] = None, file_path: Optional[str] = None) -> Workflow:
+        """
+        运行成功后生成工作流，设置了 path 时保存到文件。
+        """
+        workflow = self.to_workflow(query=query, file_path=file_path)
+        if self.path:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            workflow.save(self.path)
+        return workflow
+
+class WorkflowRunner:
+    """
+    工作流回放器，在新的输入文件上不调用 LLM 直接执行录制的工具调用，录制的动态表达式在执行该步骤前基于当前数据重新求值；
+    某一步失败、表达式无法求值或遇到不可回放的步骤时回退给代理继续完成任务。
+
+    Args:
+        workflow (Workflow): 要回放的工作流。
+        registry (Optional[Registry]): 工具注册表，默认使用 agent 的注册表。
+        agent (Optional[Agent]): 步骤失败时回退使用的代理，None 表示失败时直接返回错误。
+        max_workers (int): 并发执行互不依赖步骤的线程数，1 表示按顺序逐步执行。
+    """
+    def __init__(self, workflow: Workflow, registry: Optional[Registry] = None, agent: Any = None, max_workers: int = 1):
+        if registry is None and agent is None:
+            raise ValueError("Either registry or agent must be given")
+        self.workflow = workflow
+        self.registry = registry or agent.registry
+        self.agent = agent
+        self.max_workers = max_workers
+
+    def run(self, parameters: Optional[dict] = None) -> AgentResult:
+        """
+        回放工作流。
+
+        Args:
+            parameters (Optional[dict]): 覆盖的参数，如 {'file_1': '/path/to/new.xlsx'}，未提供的参数使用录制时的取值。
+
+        Returns:
+            AgentResult: 执行结果。
+        """
+        unknown = set(parameters or {}) - set(self.workflow.parameters)
+        if unknown:
+            raise ValueError(f"Unknown workflow parameters {sorted(unknown)}, should be in {sorted(self.workflow.parameters)}")
+        values = {**self.workflow.parameters, **(parameters or {})}
+
+        steps = self.workflow.steps
+        logger.info(colored(f"▶️: Replaying {len(steps)} steps", color='blue', attrs=['bold']))
+        outputs = []
+        start = 0
+        while start < len(steps):
+            # 含表达式的步骤只能在前面的步骤执行完后求值，因此作为一批的开头；批内互不依赖的步骤并发执行
+            end = start + 1
+            while end < len(steps) and steps[end].replayable and not steps[end].expressions:
+                end += 1
+            calls = []
+            for index, step in enumerate(steps[start:end], start=start + 1):
+                params = substitute(step.params, values)
+                if not step.replayable:
+                    logger.info(colored(f"⏸️: Step {index} ({step.name}) depends on the recorded data and is not replayed", color='yellow', attrs=['bold']))
+                    return self.fallback(index, step.name, params, "was not replayed: its parameters were derived from the data of the recorded run", outputs, values)
+                if step.expressions:
+                    resolved, error = self.resolve(step.expressions)
+                    if error:
+                        logger.info(colored(f"⏸️: Step {index} ({step.name}) could not be resolved: {error}", color='yellow', attrs=['bold']))
+                        return self.fallback(index, step.name, params, f"was not replayed: {error}", outputs, values)
+                    params.update(resolved)
+                calls.append((step.name, params))
+            results = self.registry.execute_many(calls, max_workers=self.max_workers, stop_on_error=True)
+            for index, ((name, params), tool_result) in enumerate(zip(calls, results), start=start + 1):
+                if not tool_result.is_success:
+                    logger.warning(colored(f"⚠️: Replay step {index} failed: {tool_result.error}", color='yellow', attrs=['bold']))
+                    return self.fallback(index, name, params, f"failed: {tool_result.error}", outputs, values)
+                outputs.append(f"{index}. {name}: {tool_result.content}")
+            start = end
+        return AgentResult(is_done=True, content="Workflow replayed without LLM calls:\n" + "\n".join(outputs), error=None)
+
+    def resolve(self, expressions: dict) -> tuple[dict, Optional[str]]:
+        """
+        在当前注册的 DataFrame 上重新求值录制的动态表达式。
+
+        Returns:
+            tuple[dict, Optional[str]]: 求值后的参数，以及第一个无法求值的表达式的错误信息（全部成功时为 None）。
+        """
+        context = AgentContext(resolver=get_dataframe)
+        resolved = {}
+        for key, expr in expressions.items():
+            value = context.resolve_expression(expr)
+            if context.is_unresolved(value):
+                return resolved, f"expression {key}={expr!r} could not be resolved: {value}"
+            resolved[key] = value
+        return resolved, None
+
+    def fallback(self, index: int, name: str, params: dict, error: str, outputs: list[str], values: dict) -> AgentResult:
+        """
+        步骤失败或不可回放时将已完成的步骤和原因交给代理，由代理从该步骤继续。
+        """
+        if self.agent is None:
+            return AgentResult(is_done=False, content=None, error=f"Workflow step {index} ({name}) {error}")
+        query = substitute(self.workflow.query or "", values)
+        completed = "\n".join(outputs) or "None"
+        query += (f"\n\n<replay_note>A recorded workflow was replayed for this task. Completed steps (their DataFrame objects are already registered):\n{completed}\n"
+                  f"Step {index} `{name}` with params {params} {error}\n"
+                  f"Continue the task from this step.</replay_note>")
+        return self.agent.invoke(query)
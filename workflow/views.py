@@ -0,0 +1,62 @@
+import re
+from pydantic import BaseModel, Field
+from typing import Any, Optional
+
+PARAMETER_PATTERN = re.compile(r'\$\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
+def substitute(value: Any, parameters: dict) -> Any:
+    """
+    将字符串（包括列表、字典中的字符串）中的 ${name} 替换为参数值。
+    整个字符串恰好是一个 ${name} 时保留参数值原本的类型。
+    """
+    if isinstance(value, str):
+        match = PARAMETER_PATTERN.fullmatch(value)
+        if match:
+            return parameters[match.group(1)]
+        return PARAMETER_PATTERN.sub(lambda m: str(parameters[m.group(1)]), value)
+    if isinstance(value, list):
+        return [substitute(v, parameters) for v in value]
+    if isinstance(value, dict):
+        return {k: substitute(v, parameters) for k, v in value.items()}
+    return value
+
+class WorkflowStep(BaseModel):
+    """
+    工作流中的一个步骤，即一次工具调用。
+
+    Args:
+        name (str): 工具名称。
+        params (dict): 工具参数，字符串中可以包含 ${name} 形式的参数占位符。
+        expressions (dict): 录制时模型给出的动态表达式（解析前的原文），回放时在当前数据上重新解析后覆盖 params 中的对应参数。
+        replayable (bool): 是否可以回放。写入的值等来自录制时读取的数据、又不是表达式的字面量参数无法重新求值，这类步骤不回放，执行到这里时交给代理。
+    """
+    name: str
+    params: dict = Field(default_factory=dict)
+    expressions: dict = Field(default_factory=dict)
+    replayable: bool = True
+
+class Workflow(BaseModel):
+    """
+    从一次成功运行中录制的参数化工作流。
+
+    Args:
+        query (Optional[str]): 录制时的用户查询，回退到代理时使用，可以包含参数占位符。
+        file_path (Optional[str]): 录制时代理的工作目录。
+        parameters (dict[str, Any]): 参数及其默认值（录制时的取值）。
+        steps (list[WorkflowStep]): 按顺序执行的工具调用。
+        created_at (Optional[str]): 录制时间。
+    """
+    query: Optional[str] = None
+    file_path: Optional[str] = None
+    parameters: dict[str, Any] = Field(default_factory=dict)
+    steps: list[WorkflowStep] = Field(default_factory=list)
+    created_at: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: str) -> 'Workflow':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.model_validate_json(f.read())
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.model_dump_json(indent=2))